@@ -0,0 +1,4 @@
+"""
+Benchmark suite for the Database layer and cog handlers
+Run with: python -m benchmarks.run --scale 1k
+"""
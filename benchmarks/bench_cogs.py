@@ -0,0 +1,144 @@
+"""
+Benchmarks for cog command handlers driven through fake interactions
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import discord
+
+
+from cogs.admin_tools import AdminTools
+from cogs.advanced_stats import AdvancedStats
+from cogs.club_management import ClubManagement
+from cogs.enhanced_player_management import EnhancedPlayerManagement
+from cogs.extra_commands import ExtraCommands
+from cogs.financial_management import FinancialManagement
+from cogs.player_management import PlayerManagement
+from cogs.scheduled_jobs import ScheduledJobs
+from cogs.season import Season
+from cogs.transfer_management import TransferManagement
+from cogs.utility_commands import UtilityCommands
+from cogs.visual_embeds import VisualEmbeds
+from benchmarks.fakes import FakeBot, FakeGuild, FakeInteraction
+from benchmarks.timing import measure_async
+
+class Case(NamedTuple):
+    cog: type
+    command: str
+    kwargs: Callable[[Dict[str, str]], Dict[str, Any]] = lambda sample: {}
+
+CASES = [
+    Case(ClubManagement, "list_clubs"),
+    Case(ClubManagement, "club_info", lambda s: {"name": s["club"]}),
+    Case(PlayerManagement, "list_players"),
+    Case(PlayerManagement, "player_info", lambda s: {"name": s["player"]}),
+    Case(PlayerManagement, "free_agents"),
+    Case(PlayerManagement, "update_player_value", lambda s: {"name": s["player"], "value": 25_000_000}),
+    Case(EnhancedPlayerManagement, "set_player_position", lambda s: {"player": s["player"], "position": "MID"}),
+    Case(EnhancedPlayerManagement, "players_by_position"),
+    Case(EnhancedPlayerManagement, "expiring_contracts", lambda s: {"months": 6}),
+    Case(EnhancedPlayerManagement, "club_squad_analysis", lambda s: {"club": s["club"]}),
+    Case(TransferManagement, "transfer_history"),
+    Case(TransferManagement, "market_activity"),
+    Case(FinancialManagement, "add_budget", lambda s: {"club": s["club"], "amount": 1_000_000}),
+    Case(FinancialManagement, "financial_report"),
+    Case(FinancialManagement, "club_finances", lambda s: {"club": s["club"]}),
+    Case(AdvancedStats, "top_players_league"),
+    Case(AdvancedStats, "richest_poorest_clubs"),
+    Case(AdvancedStats, "transfer_activity_ranking"),
+    Case(AdvancedStats, "league_table"),
+    Case(AdvancedStats, "compare_clubs", lambda s: {"club1": s["club"], "club2": s["other_club"]}),
+    Case(AdminTools, "average_values"),
+    Case(AdminTools, "clubs_needing_players", lambda s: {"threshold": 30}),
+    Case(AdminTools, "most_transferred_players"),
+    Case(ExtraCommands, "bulk_price_update", lambda s: {"percentage": 5.0}),
+    Case(ExtraCommands, "budget_multiplier", lambda s: {"multiplier": 1.01}),
+    Case(ExtraCommands, "market_crash"),
+    Case(ExtraCommands, "market_boom"),
+    Case(ExtraCommands, "inflation_adjustment", lambda s: {"rate": 2.0}),
+    Case(UtilityCommands, "player_age_groups"),
+    Case(UtilityCommands, "export_data"),
+    Case(UtilityCommands, "club_showcase", lambda s: {"club": s["club"]}),
+    Case(UtilityCommands, "player_card", lambda s: {"player": s["player"]}),
+    Case(UtilityCommands, "league_banner"),
+    Case(VisualEmbeds, "stats_infographic", lambda s: {"stat_type": "league"}),
+    Case(Season, "fixtures", lambda s: {"matchday": 1}),
+    Case(Season, "season_projection", lambda s: {"simulations": 1000}),
+    Case(Season, "standings"),
+    Case(Season, "results"),
+    Case(Season, "top_scorers"),
+    Case(ScheduledJobs, "list_jobs"),
+]
+
+# Scheduled job kinds run through the handlers ScheduledJobs registers, with their params;
+# backups are left out since they write to the working directory
+JOB_CASES = [
+    ("inflation", {"rate": 1.0}),
+    ("contract_report", {"months": 6}),
+]
+
+def sample_names(db, guild_id: int) -> Dict[str, str]:
+    """Pick existing club and player names to pass as command arguments"""
+    prefix = f"{guild_id}_"
+    clubs = [c for k, c in db.get_clubs().items() if k.startswith(prefix)]
+    players = [p for k, p in db.get_players().items() if k.startswith(prefix) and p.get('club_id')]
+    return {"club": clubs[0]['name'], "other_club": clubs[-1]['name'], "player": players[0]['name']}
+
+def run(db, guild_id: int, players: int, repeat: int) -> List[Dict[str, Any]]:
+    """Benchmark each command handler against the generated league"""
+    bot = FakeBot(db)
+    guild = FakeGuild(guild_id)
+    sample = sample_names(db, guild_id)
+    
+    def cog_of(cls: type):
+        if cls.__name__ not in bot.cogs:
+            bot.cogs[cls.__name__] = cls(bot)
+        return bot.cogs[cls.__name__]
+    
+    results = []
+    for case in CASES:
+        name = f"{case.cog.__name__}.{case.command}"
+        cog = cog_of(case.cog)
+        callback = getattr(case.cog, case.command).callback
+        kwargs = case.kwargs(sample)
+        errors = []
+        
+        async def invoke():
+            interaction = FakeInteraction(bot, guild, command_name=case.command)
+            try:
+                await callback(cog, interaction, **kwargs)
+            except Exception as e:
+                errors.append(repr(e))
+        
+        result = measure_async(invoke, repeat)
+        result["name"] = name
+        if errors:
+            result["error"] = errors[0]
+        results.append(result)
+    
+    # Job handlers call the cogs that own each operation
+    cog_of(ExtraCommands), cog_of(EnhancedPlayerManagement)
+    scheduler = cog_of(ScheduledJobs).scheduler
+    for kind, params in JOB_CASES:
+        job = {"id": f"{guild_id}_bench", "kind": kind, "params": params}
+        errors = []
+        
+        async def dispatch():
+            try:
+                await scheduler.handlers[job["kind"]](job)
+            except Exception as e:
+                errors.append(repr(e))
+        
+        result = measure_async(dispatch, repeat)
+        result["name"] = f"ScheduledJobs.job:{kind}"
+        if errors:
+            result["error"] = errors[0]
+        results.append(result)
+    
+    async def unload():
+        for cog in bot.cogs.values():
+            await discord.utils.maybe_coroutine(cog.cog_unload)
+    
+    asyncio.run(unload())
+    return results
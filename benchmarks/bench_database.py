@@ -0,0 +1,135 @@
+"""
+Micro-benchmarks for every Database method
+"""
+
+import itertools
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from utils.changesets import Changeset
+from utils.database import Database
+from utils.plans import ChangePlan
+from utils.player_stats import STAT_COLUMNS
+from benchmarks.timing import measure
+
+def _sample_ids(db: Database, guild_id: int):
+    prefix = f"{guild_id}_"
+    club_id = next(k for k in db.get_clubs() if k.startswith(prefix))
+    player_id = next(k for k in db.get_players() if k.startswith(prefix))
+    return club_id, player_id
+
+def _alternating(values: Dict[str, float], factor: float):
+    """Return values and values scaled by factor in turn, so every bulk write changes each record"""
+    turns = itertools.cycle([{k: round(v * factor, 2) for k, v in values.items()}, dict(values)])
+    return lambda: next(turns)
+
+def run(db: Database, guild_id: int, repeat: int) -> List[Dict[str, Any]]:
+    """Benchmark each public Database method and raw file parsing"""
+    club_id, player_id = _sample_ids(db, guild_id)
+    counter = iter(range(10 ** 9))
+    prefix = f"{guild_id}_"
+    clubs = {k: c for k, c in db.get_clubs().items() if k.startswith(prefix)}
+    players = {k: p for k, p in db.get_players().items() if k.startswith(prefix)}
+    next_values = _alternating({k: p['value'] for k, p in players.items()}, 1.01)
+    next_budgets = _alternating({k: c['budget'] for k, c in clubs.items()}, 1.01)
+    # One round of fixtures: each club plays at most once, so a round fits on one matchday
+    club_ids = list(clubs)
+    fixtures = [{'home': home, 'away': away, 'home_name': clubs[home]['name'], 'away_name': clubs[away]['name'],
+                 'home_goals': 2, 'away_goals': 1, 'date': datetime.now().isoformat(), 'scorers': []}
+                for home, away in zip(club_ids[0::2], club_ids[1::2])]
+    lineup = list(players)[:22]
+    snapshot = db.take_snapshot(guild_id, "bench")
+    
+    def scratch_club():
+        cid = f"{guild_id}_bench_club_{next(counter)}"
+        db.add_club(cid, "Bench Club", 1_000_000)
+        return cid
+    
+    def scratch_player():
+        pid = f"{guild_id}_bench_player_{next(counter)}"
+        db.add_player(pid, "Bench Player", 1_000_000, club_id, "MID", 25)
+        return pid
+    
+    def scratch_players(count: int = 100):
+        return {f"{guild_id}_bench_player_{next(counter)}": {
+            'name': "Bench Player", 'value': 1_000_000, 'club_id': club_id, 'position': "MID", 'age': 25
+        } for _ in range(count)}
+    
+    def value_plan():
+        plan = ChangePlan(guild_id, "bench", db.get_data_version(guild_id))
+        plan.values = {k: (players[k]['value'], v) for k, v in next_values().items()}
+        return plan
+    
+    def record_round():
+        matchday = next(counter) + 1
+        return db.record_results(guild_id, [{**match, 'matchday': matchday} for match in fixtures])
+    
+    def box_scores():
+        match_id = 10 ** 9 + next(counter)
+        columns = {'match': [match_id] * len(lineup), 'player': lineup, 'name': [players[k]['name'] for k in lineup]}
+        columns.update((stat, [0] * len(lineup)) for stat in STAT_COLUMNS)
+        columns['minutes'] = [90] * len(lineup)
+        columns['goals'][0] = 1
+        return columns
+    
+    changesets = []
+    
+    def stack_changesets():
+        # Undone newest first, so no changeset conflicts with a later one
+        for _ in range(repeat + 1):
+            changeset = Changeset(guild_id, "bench")
+            db.bulk_update_player_values(next_values(), changeset)
+            changesets.append(changeset.id)
+    
+    cases = {
+        "get_clubs": lambda: db.get_clubs(),
+        "get_club": lambda: db.get_club(club_id),
+        "add_club": scratch_club,
+        "update_club_budget": lambda: db.update_club_budget(club_id, 50_000_000),
+        "delete_club": lambda: db.delete_club(scratch_club()),
+        "get_players": lambda: db.get_players(),
+        "get_player": lambda: db.get_player(player_id),
+        "add_player": scratch_player,
+        "update_player_value": lambda: db.update_player_value(player_id, 12_345_678),
+        "delete_player": lambda: db.delete_player(scratch_player()),
+        "get_transfers": lambda: db.get_transfers(),
+        "add_transfer": lambda: db.add_transfer(player_id, club_id, club_id, 0),
+        "get_guild_settings": lambda: db.get_guild_settings(guild_id),
+        "update_guild_settings": lambda: db.update_guild_settings(guild_id, bench=True),
+        "bulk_add_players": lambda: db.bulk_add_players(scratch_players()),
+        "bulk_update_player_values": lambda: db.bulk_update_player_values(next_values()),
+        "bulk_update_club_budgets": lambda: db.bulk_update_club_budgets(next_budgets()),
+        "apply_plan": lambda: db.apply_plan(value_plan(), Changeset(guild_id, "bench")),
+        "get_expiring_contracts": lambda: db.get_expiring_contracts(guild_id, datetime.now(), datetime.now() + timedelta(days=180)),
+        "get_ledger": lambda: db.get_ledger(club_id),
+        "get_balance_at": lambda: db.get_balance_at(club_id, datetime.now() - timedelta(days=30)),
+        "get_ledger_totals": lambda: db.get_ledger_totals(club_id),
+        "take_snapshot": lambda: db.take_snapshot(guild_id, f"bench_{next(counter)}"),
+        "get_league_at": lambda: db.get_league_at(guild_id, snapshot['version']),
+        "record_results": record_round,
+        "get_standings": lambda: db.get_standings(guild_id),
+        "record_box_scores": lambda: db.record_box_scores(guild_id, box_scores()),
+        "get_stat_leaders": lambda: db.get_stat_leaders(guild_id, 'goals'),
+        "get_value_history": lambda: db.get_value_history(player_id),
+        "undo_changeset": lambda: db.undo_changeset(guild_id, changesets.pop()),
+        "release_expired_contracts": lambda: db.release_expired_contracts(datetime.now()),
+    }
+    # Untimed preparation run right before a case is measured
+    setups = {"undo_changeset": stack_changesets}
+    
+    results = []
+    for name, func in cases.items():
+        if name in setups:
+            setups[name]()
+        result = measure(func, repeat)
+        result["name"] = name
+        results.append(result)
+    
+    for filename in (db.clubs_file, db.players_file, db.transfers_file):
+        result = measure(lambda: db._read_json(filename), repeat)
+        result["name"] = f"parse:{os.path.basename(filename)}"
+        result["file_bytes"] = os.path.getsize(filename)
+        results.append(result)
+    
+    return results
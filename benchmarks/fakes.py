@@ -0,0 +1,175 @@
+"""
+Lightweight fakes for discord.py objects
+Lets cog handlers run in-process without a gateway connection or token
+"""
+
+import asyncio
+import itertools
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from utils.views import ConfirmView
+
+_ids = itertools.count(1_000_000)
+
+class FakeRole:
+    def __init__(self, name: str):
+        self.id = next(_ids)
+        self.name = name
+
+class FakeMember:
+    def __init__(self, member_id: int = None, name: str = "bench-admin", administrator: bool = True,
+                 roles: List[FakeRole] = None):
+        self.id = member_id or next(_ids)
+        self.name = name
+        self.display_name = name
+        self.roles = roles or []
+        self.guild_permissions = SimpleNamespace(administrator=administrator)
+        self.mention = f"<@{self.id}>"
+    
+    def __str__(self):
+        return self.name
+
+class FakeGuild:
+    def __init__(self, guild_id: int, name: str = None, owner_id: int = 0):
+        self.id = guild_id
+        self.name = name or f"Guild {guild_id}"
+        self.owner_id = owner_id
+        self.roles = [FakeRole("@everyone"), FakeRole("Admin")]
+
+class FakeChannel:
+    def __init__(self):
+        self.id = next(_ids)
+        self.sent: List[Dict[str, Any]] = []
+    
+    async def send(self, content=None, **kwargs):
+        self.sent.append({"content": content, **kwargs})
+        return FakeMessage(content, **kwargs)
+
+class FakeMessage:
+    def __init__(self, content=None, **kwargs):
+        self.id = next(_ids)
+        self.content = content
+        self.embed = kwargs.get("embed")
+    
+    async def edit(self, **kwargs):
+        self.content = kwargs.get("content", self.content)
+        self.embed = kwargs.get("embed", self.embed)
+        return self
+
+class InteractionAlreadyResponded(Exception):
+    """Raised when a handler responds twice, mirroring discord.InteractionResponded"""
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+    
+    def is_done(self) -> bool:
+        return self._done
+    
+    def _respond(self, kind: str, **kwargs):
+        if self._done:
+            raise InteractionAlreadyResponded(self._interaction.command_name)
+        self._done = True
+        self._interaction.responded_at = time.perf_counter()
+        self._interaction.responses.append({"type": kind, **kwargs})
+    
+    async def send_message(self, content=None, **kwargs):
+        await self._interaction.round_trip()
+        self._respond("message", content=content, **kwargs)
+        self._interaction.press_confirm(kwargs.get("view"))
+    
+    async def defer(self, **kwargs):
+        await self._interaction.round_trip()
+        self._respond("defer", **kwargs)
+    
+    async def edit_message(self, **kwargs):
+        await self._interaction.round_trip()
+        self._respond("edit", **kwargs)
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+    
+    async def send(self, content=None, **kwargs):
+        await self._interaction.round_trip()
+        self._interaction.responses.append({"type": "followup", "content": content, **kwargs})
+        return FakeMessage(content, **kwargs)
+
+class FakeInteraction:
+    """Minimal stand-in for discord.Interaction used by the cogs"""
+    
+    def __init__(self, client, guild: FakeGuild, user: FakeMember = None, channel: FakeChannel = None,
+                 command_name: str = "unknown", network_delay: float = 0.0, auto_confirm: bool = True):
+        self.id = next(_ids)
+        self.client = client
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user or FakeMember()
+        self.channel = channel or FakeChannel()
+        self.command_name = command_name
+        self.command = SimpleNamespace(qualified_name=command_name, name=command_name, binding=None, extras={})
+        self.extras: Dict[str, Any] = {}
+        self.responses: List[Dict[str, Any]] = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.command_failed = False
+        self.created_at = time.perf_counter()
+        self.responded_at: Optional[float] = None
+        self.network_delay = network_delay
+        self.auto_confirm = auto_confirm
+    
+    async def round_trip(self):
+        """Simulate the HTTP round trip to Discord, yielding to the event loop"""
+        if self.network_delay:
+            await asyncio.sleep(self.network_delay)
+    
+    def press_confirm(self, view):
+        """Press the confirm button of a ConfirmView on behalf of the invoking user"""
+        if isinstance(view, ConfirmView) and self.auto_confirm:
+            view.value = True
+            view.stop()
+    
+    async def edit_original_response(self, **kwargs):
+        await self.round_trip()
+        self.responses.append({"type": "edit_original", **kwargs})
+        self.press_confirm(kwargs.get("view"))
+        return FakeMessage(**kwargs)
+    
+    async def delete_original_response(self):
+        await self.round_trip()
+        self.responses.append({"type": "delete_original"})
+    
+    async def original_response(self):
+        return FakeMessage()
+    
+    @property
+    def first_response(self) -> Optional[Dict[str, Any]]:
+        return self.responses[0] if self.responses else None
+
+class FakeBot:
+    """Holds the shared Database the way FootballBot does"""
+    
+    def __init__(self, db):
+        self.db = db
+        self.user = SimpleNamespace(id=next(_ids), name="bench-bot")
+        self.guilds: List[FakeGuild] = []
+        # Cog name -> cog, for cogs that call each other through get_cog
+        self.cogs: Dict[str, Any] = {}
+    
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+    
+    def get_channel(self, channel_id: int):
+        return None
+    
+    async def wait_until_ready(self):
+        pass
+    
+    async def wait_for(self, *args, **kwargs):
+        raise TimeoutError()
+    
+    def dispatch(self, *args, **kwargs):
+        pass
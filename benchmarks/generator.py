@@ -0,0 +1,98 @@
+"""
+Deterministic synthetic league generator
+Builds guilds with N clubs, M players and T transfers in the bot's storage format
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Dict
+
+from utils.database import Database
+
+POSITIONS = ["GK", "DEF", "DEF", "DEF", "DEF", "MID", "MID", "MID", "FWD", "FWD"]
+FIRST_NAMES = ["Luca", "Mateo", "Noah", "Leo", "Hugo", "Ivan", "Omar", "Kai", "Jon", "Rui",
+               "Sami", "Theo", "Arda", "Yuto", "Emil", "Nico", "Dani", "Marco", "Pavel", "Idris"]
+LAST_NAMES = ["Silva", "Novak", "Berg", "Costa", "Kovac", "Moreau", "Rossi", "Larsen", "Haddad", "Tanaka",
+              "Okafor", "Schmidt", "Garcia", "Petrov", "Jansen", "Ferreira", "Yilmaz", "Dubois", "Nowak", "Ito"]
+
+SCALES = {
+    "1k": {"clubs": 40, "players": 1000, "transfers": 2000},
+    "10k": {"clubs": 200, "players": 10000, "transfers": 20000},
+    "100k": {"clubs": 1000, "players": 100000, "transfers": 200000},
+}
+
+def club_id(guild_id: int, name: str) -> str:
+    """Build a club id the same way the cogs do"""
+    return f"{guild_id}_{name.lower().replace(' ', '_')}"
+
+def generate_league(db: Database, guild_id: int, clubs: int, players: int, transfers: int,
+                    seed: int = 42, start: datetime = None) -> Dict[str, int]:
+    """Write a synthetic league for one guild into the database with one write per file
+    
+    The same seed always produces the same league. Existing data for other
+    guilds is preserved. Players go through Database.bulk_add_players, so the
+    contract index, value history and snapshots cover them as they would in a
+    live bot, and the ledger gets an opening balance per club and the generated
+    transfers, like a ledger started on an existing league.
+    """
+    rng = random.Random(f"{seed}-{guild_id}")
+    start = start or datetime(2024, 1, 1)
+    
+    clubs_data = db._read_json(db.clubs_file)
+    transfers_data = db._read_json(db.transfers_file)
+    
+    club_ids = []
+    for i in range(clubs):
+        name = f"Club {i:04d}"
+        cid = club_id(guild_id, name)
+        club_ids.append(cid)
+        clubs_data['clubs'][cid] = {
+            'name': name,
+            'budget': float(rng.randrange(5, 500) * 1_000_000),
+            'players': [],
+            'created_at': start.isoformat()
+        }
+    
+    db._write_json(db.clubs_file, clubs_data, club_ids)
+    
+    new_players = {}
+    player_ids = []
+    for i in range(players):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        pid = club_id(guild_id, name)
+        player_ids.append(pid)
+        # roughly one in ten players is a free agent
+        owner = rng.choice(club_ids) if club_ids and rng.random() > 0.1 else None
+        contract = None
+        if owner and rng.random() < 0.7:
+            contract = (start + timedelta(days=rng.randrange(0, 5 * 365))).isoformat()
+        new_players[pid] = {
+            'name': name,
+            'value': float(round(rng.lognormvariate(15.5, 1.2), 2)),
+            'club_id': owner,
+            'position': rng.choice(POSITIONS),
+            'age': rng.randrange(16, 38),
+            'contract_expires': contract,
+            'created_at': start.isoformat()
+        }
+    if db.bulk_add_players(new_players) != len(new_players):
+        raise RuntimeError("Adding the generated players failed; see the database log")
+    
+    for i in range(transfers):
+        from_club = rng.choice(club_ids) if club_ids and rng.random() > 0.2 else None
+        to_club = rng.choice(club_ids) if club_ids else None
+        transfers_data['transfers'].append({
+            'player_id': rng.choice(player_ids) if player_ids else f"{guild_id}_nobody",
+            'from_club': from_club,
+            'to_club': to_club,
+            'amount': float(rng.randrange(0, 150) * 500_000),
+            'date': (start + timedelta(minutes=i)).isoformat()
+        })
+    
+    db._write_json(db.transfers_file, transfers_data)
+    db.ledger.clear_guild(guild_id)
+    db._backfill_ledger({cid: clubs_data['clubs'][cid] for cid in club_ids},
+                        transfers_data['transfers'][-transfers:] if transfers else [])
+    db._touch(guild_id)
+    
+    return {"clubs": clubs, "players": players, "transfers": transfers}
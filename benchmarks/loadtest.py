@@ -0,0 +1,260 @@
+"""
+Concurrent load test for FootballBot
+Fires mixed read/write slash invocations across many synthetic guilds through
+the real command tree hooks and cogs, then checks the stored data for consistency.
+No gateway connection or token is needed.
+
+    python -m benchmarks.loadtest --guilds 50 --invocations 2000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from discord import app_commands
+
+from bot import FootballBot
+from utils.loop_monitor import LoopMonitor, loop_monitor
+from utils.admission import admission
+from benchmarks.fakes import FakeGuild, FakeInteraction, FakeMember
+from benchmarks.generator import generate_league
+from benchmarks.timing import summarize
+
+BASE_GUILD_ID = 910000000000000000
+# Discord drops interactions that are not acknowledged within this many seconds
+ACK_DEADLINE = 3.0
+
+class GuildState:
+    """Names known to exist in one synthetic guild, used to build arguments"""
+    
+    def __init__(self, guild: FakeGuild, clubs: List[str], players: List[str]):
+        self.guild = guild
+        self.clubs = clubs
+        self.players = players
+        self.created = 0
+    
+    def new_name(self, kind: str) -> str:
+        self.created += 1
+        return f"Load {kind} {self.created}"
+
+class Operation(NamedTuple):
+    command: str
+    weight: int
+    kwargs: Callable[[GuildState, random.Random], Dict[str, Any]] = lambda state, rng: {}
+    write: bool = False
+
+OPERATIONS = [
+    Operation("list_clubs", 8),
+    Operation("club_info", 10, lambda s, r: {"name": r.choice(s.clubs)}),
+    Operation("list_players", 6),
+    Operation("player_info", 12, lambda s, r: {"name": r.choice(s.players)}),
+    Operation("free_agents", 4),
+    Operation("transfer_history", 4),
+    Operation("market_activity", 4),
+    Operation("financial_report", 4),
+    Operation("club_finances", 4, lambda s, r: {"club": r.choice(s.clubs)}),
+    Operation("league_table", 4),
+    Operation("top_players_league", 4),
+    Operation("add_club", 2, lambda s, r: {"name": s.new_name("Club"), "budget": 50_000_000.0}, write=True),
+    Operation("add_player", 4, lambda s, r: {"name": s.new_name("Player"), "value": 1_000_000.0,
+                                              "club": r.choice(s.clubs), "position": "MID", "age": 24}, write=True),
+    Operation("update_player_value", 8, lambda s, r: {"name": r.choice(s.players),
+                                                      "value": float(r.randrange(1, 100) * 1_000_000)}, write=True),
+    Operation("transfer_player", 6, lambda s, r: {"player": r.choice(s.players), "to_club": r.choice(s.clubs),
+                                                  "amount": float(r.randrange(0, 20) * 100_000)}, write=True),
+    Operation("release_player", 2, lambda s, r: {"player": r.choice(s.players)}, write=True),
+    Operation("add_budget", 4, lambda s, r: {"club": r.choice(s.clubs), "amount": 1_000_000.0}, write=True),
+    Operation("set_player_position", 4, lambda s, r: {"player": r.choice(s.players),
+                                                      "position": r.choice(["GK", "DEF", "MID", "FWD"])}, write=True),
+]
+
+async def invoke(bot: FootballBot, command: app_commands.Command, interaction: FakeInteraction,
+                 kwargs: Dict[str, Any]) -> bool:
+    """Run one command the way CommandTree does: check, callback, then completion or on_error"""
+    interaction.command = command
+    if not await bot.tree.interaction_check(interaction):
+        return False
+    try:
+        await command.callback(command.binding, interaction, **kwargs)
+    except Exception as e:
+        await bot.tree.on_error(interaction, app_commands.CommandInvokeError(command, e))
+        return False
+    bot.tree.finish_interaction(interaction)
+    return True
+
+def check_consistency(db, guild_ids: List[int]) -> List[str]:
+    """Cross-check rosters, player club ids and budgets for the load-tested guilds"""
+    prefixes = tuple(f"{guild_id}_" for guild_id in guild_ids)
+    clubs = {k: v for k, v in db.get_clubs().items() if k.startswith(prefixes)}
+    players = {k: v for k, v in db.get_players().items() if k.startswith(prefixes)}
+    problems = []
+    
+    for player_id, player in players.items():
+        club_id = player.get('club_id')
+        if club_id is None:
+            continue
+        if club_id not in clubs:
+            problems.append(f"player {player_id} points at missing club {club_id}")
+        elif player_id not in clubs[club_id].get('players', []):
+            problems.append(f"player {player_id} missing from roster of {club_id}")
+    
+    for club_id, club in clubs.items():
+        roster = club.get('players', [])
+        if len(roster) != len(set(roster)):
+            problems.append(f"club {club_id} has duplicate roster entries")
+        for player_id in roster:
+            if player_id not in players:
+                problems.append(f"club {club_id} lists missing player {player_id}")
+            elif players[player_id].get('club_id') != club_id:
+                problems.append(f"club {club_id} lists {player_id} who belongs to {players[player_id].get('club_id')}")
+        if club.get('budget', 0) < 0:
+            problems.append(f"club {club_id} has negative budget {club['budget']}")
+    
+    return problems
+
+async def run_load(args) -> Dict[str, Any]:
+    data_dir = tempfile.mkdtemp(prefix="loadtest_")
+    bot = FootballBot(data_dir, web_port=None)
+    
+    async def skip_sync(*_args, **_kwargs):
+        return bot.tree.get_commands()
+    bot.tree.sync = skip_sync
+    
+    if args.guild_budget is not None:
+        admission.capacity = args.guild_budget
+    if args.guild_refill is not None:
+        admission.rate = args.guild_refill
+    
+    try:
+        await bot.setup_hook()
+        loop_monitor.stop()
+        
+        states = []
+        for i in range(args.guilds):
+            guild_id = BASE_GUILD_ID + i
+            generate_league(bot.db, guild_id, args.clubs, args.players, args.transfers, seed=args.seed)
+            prefix = f"{guild_id}_"
+            states.append(GuildState(
+                FakeGuild(guild_id),
+                [c['name'] for k, c in bot.db.get_clubs().items() if k.startswith(prefix)],
+                [p['name'] for k, p in bot.db.get_players().items() if k.startswith(prefix)],
+            ))
+        
+        rng = random.Random(args.seed)
+        admins = [FakeMember(name=f"admin-{i}") for i in range(5)]
+        members = [FakeMember(name=f"member-{i}", administrator=False) for i in range(5)]
+        weights = [op.weight for op in OPERATIONS]
+        plan = []
+        for _ in range(args.invocations):
+            op = rng.choices(OPERATIONS, weights)[0]
+            state = rng.choice(states)
+            user = rng.choice(members) if rng.random() < args.non_admin_ratio else rng.choice(admins)
+            kwargs = op.kwargs(state, rng)
+            # later invocations may target entities created earlier in the run
+            if op.command == "add_club":
+                state.clubs.append(kwargs["name"])
+            elif op.command == "add_player":
+                state.players.append(kwargs["name"])
+            plan.append((op, state, user, kwargs))
+        
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        outcomes = {"completed": 0, "errors": 0, "throttled": 0, "unanswered": 0, "late_ack": 0, "double_response": 0}
+        
+        async def worker(op: Operation, state: GuildState, user: FakeMember, kwargs: Dict[str, Any]):
+            async with semaphore:
+                interaction = FakeInteraction(bot, state.guild, user=user, command_name=op.command,
+                                              network_delay=args.network_delay)
+                started = time.perf_counter()
+                try:
+                    succeeded = await invoke(bot, bot.tree.get_command(op.command), interaction, kwargs)
+                except Exception:
+                    outcomes["double_response"] += 1
+                    succeeded = False
+                latencies[op.command].append(time.perf_counter() - started)
+                if succeeded:
+                    outcomes["completed"] += 1
+                else:
+                    outcomes["throttled" if interaction.extras.get('throttled') else "errors"] += 1
+                
+                if interaction.responded_at is None:
+                    outcomes["unanswered"] += 1
+                elif interaction.responded_at - interaction.created_at > ACK_DEADLINE:
+                    outcomes["late_ack"] += 1
+        
+        monitor = LoopMonitor(interval=0.05, threshold=args.stall_threshold, window=100_000)
+        monitor.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(*item) for item in plan))
+        elapsed = time.perf_counter() - started
+        monitor.stop()
+        
+        all_latencies = [value for values in latencies.values() for value in values]
+        problems = check_consistency(bot.db, [state.guild.id for state in states])
+        
+        return {
+            "config": vars(args),
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_per_second": round(len(all_latencies) / elapsed, 1) if elapsed else None,
+            "outcomes": outcomes,
+            "latency": summarize(all_latencies),
+            "p99_ms": round(sorted(all_latencies)[min(len(all_latencies) - 1, int(len(all_latencies) * 0.99))] * 1000, 3),
+            "commands": {name: summarize(values) for name, values in sorted(latencies.items())},
+            "event_loop": {**monitor.percentiles(), "stalls": monitor.stalls},
+            "consistency": {"problems": len(problems), "examples": problems[:20]},
+        }
+    finally:
+        await bot.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent load test against the real cogs")
+    parser.add_argument("--guilds", type=int, default=50, help="Synthetic guilds")
+    parser.add_argument("--clubs", type=int, default=8, help="Clubs per guild")
+    parser.add_argument("--players", type=int, default=40, help="Players per guild")
+    parser.add_argument("--transfers", type=int, default=40, help="Historical transfers per guild")
+    parser.add_argument("--invocations", type=int, default=2000, help="Total slash invocations")
+    parser.add_argument("--concurrency", type=int, default=200, help="Invocations in flight at once")
+    parser.add_argument("--non-admin-ratio", type=float, default=0.1, help="Share of invocations from non-admins")
+    parser.add_argument("--network-delay", type=float, default=0.02, help="Simulated Discord API round trip in seconds")
+    parser.add_argument("--stall-threshold", type=float, default=0.5, help="Loop stall threshold in seconds")
+    parser.add_argument("--guild-budget", type=float, help="Override the per-guild admission budget in tokens")
+    parser.add_argument("--guild-refill", type=float, help="Override the per-guild token refill per second")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data and the invocation mix")
+    parser.add_argument("--output", help="Optional path for JSON results")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.CRITICAL)
+    report = asyncio.run(run_load(args))
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    
+    latency = report["latency"]
+    loop = report["event_loop"]
+    print(f"{latency['runs']} invocations in {report['elapsed_seconds']}s "
+          f"({report['throughput_per_second']}/s) across {args.guilds} guilds")
+    print(f"latency p50 {latency['p50_ms']:.1f}ms  p95 {latency['p95_ms']:.1f}ms  "
+          f"p99 {report['p99_ms']:.1f}ms  max {latency['max_ms']:.1f}ms")
+    print(f"event loop lag p50 {loop['p50_ms']}ms  p99 {loop['p99_ms']}ms  max {loop['max_ms']}ms  stalls {loop['stalls']}")
+    print("outcomes: " + ", ".join(f"{k} {v}" for k, v in report["outcomes"].items()))
+    for name, stats in report["commands"].items():
+        print(f"  {name:<22} n {stats['runs']:>5}  p50 {stats['p50_ms']:>9.2f}ms  p95 {stats['p95_ms']:>9.2f}ms")
+    
+    consistency = report["consistency"]
+    print(f"consistency problems: {consistency['problems']}")
+    for problem in consistency["examples"]:
+        print(f"  - {problem}")
+    return 1 if consistency["problems"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
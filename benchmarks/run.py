@@ -0,0 +1,99 @@
+"""
+Benchmark runner
+Generates a synthetic league per scale, runs the Database and cog benchmarks
+and writes machine-readable JSON results.
+
+    python -m benchmarks.run --scale 1k --scale 10k --output bench_results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from utils.database import Database
+from benchmarks import bench_cogs, bench_database
+from benchmarks.generator import SCALES, generate_league
+
+BENCH_GUILD_ID = 900000000000000001
+
+def run_scale(scale: str, repeat: int, seed: int) -> dict:
+    """Run every benchmark against a fresh league of the given scale"""
+    sizes = SCALES[scale]
+    data_dir = tempfile.mkdtemp(prefix=f"bench_{scale}_")
+    try:
+        db = Database(data_dir)
+        
+        tracemalloc.start()
+        start = time.perf_counter()
+        generate_league(db, BENCH_GUILD_ID, seed=seed, **sizes)
+        generate_seconds = time.perf_counter() - start
+        _, generate_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        tracemalloc.start()
+        start = time.perf_counter()
+        db.get_clubs(), db.get_players(), db.get_transfers()
+        load_seconds = time.perf_counter() - start
+        _, load_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        return {
+            "scale": scale,
+            "sizes": sizes,
+            "generate": {"seconds": round(generate_seconds, 3), "peak_kib": round(generate_peak / 1024, 1)},
+            "load": {
+                "seconds": round(load_seconds, 4),
+                "peak_kib": round(load_peak / 1024, 1),
+                "bytes": sum(os.path.getsize(f) for f in (db.clubs_file, db.players_file, db.transfers_file))
+            },
+            "database": bench_database.run(db, BENCH_GUILD_ID, repeat),
+            "commands": bench_cogs.run(db, BENCH_GUILD_ID, sizes["players"], repeat),
+        }
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Database layer and cog handlers")
+    parser.add_argument("--scale", action="append", choices=sorted(SCALES), help="League size (repeatable, default: 1k)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=42, help="Generator seed")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write JSON results")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.WARNING)
+    scales = args.scale or ["1k"]
+    
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "results": []
+    }
+    
+    for scale in scales:
+        print(f"Running {scale} benchmarks...", file=sys.stderr)
+        report["results"].append(run_scale(scale, args.repeat, args.seed))
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    
+    for result in report["results"]:
+        print(f"\n== {result['scale']} ({result['sizes']}) load {result['load']['seconds'] * 1000:.1f}ms ==")
+        for row in result["database"] + result["commands"]:
+            note = f"  ERROR {row['error']}" if "error" in row else ""
+            peak = f"{row['peak_kib']:>9.1f}KiB" if row['peak_kib'] is not None else "      n/a"
+            print(f"  {row['name']:<45} p50 {row['p50_ms']:>9.2f}ms  p95 {row['p95_ms']:>9.2f}ms  peak {peak}{note}")
+    print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Timing and memory helpers shared by the benchmark modules
+"""
+
+import asyncio
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (seconds) in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+def measure(func: Callable[[], Any], repeat: int, trace_memory: bool = True) -> Dict[str, Any]:
+    """Time a synchronous callable and record its peak traced memory on one extra run"""
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    
+    result = summarize(samples)
+    result["peak_kib"] = round(peak / 1024, 1) if peak is not None else None
+    return result
+
+def measure_async(factory: Callable[[], Any], repeat: int, trace_memory: bool = True) -> Dict[str, Any]:
+    """Time a coroutine factory; each run awaits a fresh coroutine"""
+    return measure(lambda: asyncio.run(factory()), repeat, trace_memory)
@@ -5,30 +5,91 @@ Main bot class with slash commands and cogs
 
 import discord
 from discord.ext import commands
+import hashlib
+import json
 import logging
 import os
+import time
+from typing import Dict, Optional
 from utils.database import Database
-from utils.permissions import check_admin
+from utils.permissions import check_admin, permission_cache
+from utils.command_tree import FootballCommandTree
+from utils.loop_monitor import loop_monitor
+from utils.metrics import metrics
+from web_server import WebServer
 
 logger = logging.getLogger(__name__)
 
+def env_flag(name: str, default: bool) -> bool:
+    """Read a boolean environment variable (1/true/yes/on)"""
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def current_rss_mb() -> Optional[float]:
+    """Resident memory of this process in MiB, when the platform exposes it"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        return None
+
 class FootballBot(commands.Bot):
-    def __init__(self):
+    def __init__(self, data_dir: str = "data", web_port: Optional[int] = 5000):
+        self.created_at = time.perf_counter()
+        
+        # Slash commands and buttons arrive as interactions, so the privileged
+        # message_content intent (every message in every guild) is not needed.
+        # Permission checks read roles from the interaction's member payload, so
+        # the member list is only cached and chunked when explicitly enabled.
         intents = discord.Intents.default()
-        intents.message_content = True
         intents.guilds = True
-        intents.members = True
+        intents.members = env_flag('MEMBERS_INTENT', False)
+        
+        if os.getenv('MEMBER_CACHE', 'none').lower() == 'all':
+            member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+        else:
+            member_cache_flags = discord.MemberCacheFlags.none()
+        chunk_guilds = env_flag('CHUNK_GUILDS_AT_STARTUP', False) and intents.members
         
         super().__init__(
             command_prefix='!',
             intents=intents,
-            description='Football Club Management Bot'
+            member_cache_flags=member_cache_flags,
+            chunk_guilds_at_startup=chunk_guilds,
+            description='Football Club Management Bot',
+            tree_cls=FootballCommandTree
         )
         
-        self.db = Database()
+        self.db = Database(data_dir)
+        self.web_server = WebServer(self, port=web_port) if web_port is not None else None
+        self.sync_state_file = os.path.join(data_dir, "command_sync.json")
+        self.startup_report: Dict = {
+            "members_intent": intents.members,
+            "member_cache": "all" if member_cache_flags.value else "none",
+            "chunk_guilds_at_startup": chunk_guilds,
+            "cog_load_ms": {}
+        }
         
     async def setup_hook(self):
         """Load all cogs when bot starts"""
+        setup_started = time.perf_counter()
+        loop_monitor.start()
+        
+        if self.web_server:
+            try:
+                await self.web_server.start()
+            except OSError as e:
+                logger.error(f"Web server error: {e}")
+        
         cogs = [
             'cogs.club_management',
             'cogs.player_management',
@@ -39,34 +100,138 @@ class FootballBot(commands.Bot):
             'cogs.enhanced_player_management',
             'cogs.extra_commands',
             'cogs.utility_commands',
-            'cogs.visual_embeds'
+            'cogs.visual_embeds',
+            'cogs.scheduled_jobs',
+            'cogs.season'
         ]
         
         for cog in cogs:
+            started = time.perf_counter()
             try:
                 await self.load_extension(cog)
-                logger.info(f"Loaded cog: {cog}")
+                elapsed = time.perf_counter() - started
+                self.startup_report['cog_load_ms'][cog] = round(elapsed * 1000, 2)
+                metrics.observe_startup_step(f"load:{cog}", elapsed)
+                logger.info(f"Loaded cog: {cog} in {elapsed * 1000:.1f}ms")
             except Exception as e:
                 logger.error(f"Failed to load cog {cog}: {e}")
         
-        # Sync slash commands
+        # Sync slash commands only when the command tree changed
+        started = time.perf_counter()
+        self.startup_report['command_sync'] = await self.sync_commands()
+        metrics.observe_startup_step("command_sync", time.perf_counter() - started)
+        
+        elapsed = time.perf_counter() - setup_started
+        self.startup_report['setup_seconds'] = round(elapsed, 3)
+        metrics.observe_startup_step("setup_hook", elapsed)
+        logger.info(f"Setup finished in {elapsed:.2f}s (command sync: {self.startup_report['command_sync']})")
+    
+    def command_tree_hash(self, guild: Optional[discord.abc.Snowflake] = None) -> str:
+        """Stable hash of the serialized commands that would be synced"""
+        payload = sorted((command.to_dict(self.tree) for command in self.tree.get_commands(guild=guild)),
+                         key=lambda c: (c.get('type', 1), c['name']))
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def _read_sync_state(self) -> Dict:
+        try:
+            with open(self.sync_state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+    
+    def _write_sync_state(self, state: Dict):
+        try:
+            with open(self.sync_state_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2)
+        except OSError as e:
+            logger.error(f"Failed to store command sync state: {e}")
+    
+    async def sync_commands(self) -> str:
+        """Sync the command tree if its hash differs from the last successful sync
+        
+        With DEV_GUILD_ID set, commands are copied to and synced with that guild only,
+        which applies instantly. FORCE_COMMAND_SYNC=1 syncs regardless of the hash.
+        """
+        dev_guild_id = os.getenv('DEV_GUILD_ID')
+        guild = discord.Object(id=int(dev_guild_id)) if dev_guild_id else None
+        if guild:
+            self.tree.copy_global_to(guild=guild)
+        
+        scope = f"guild:{guild.id}" if guild else "global"
+        key = f"{self.application_id}:{scope}"
+        tree_hash = self.command_tree_hash(guild)
+        state = self._read_sync_state()
+        
+        if state.get(key) == tree_hash and os.getenv('FORCE_COMMAND_SYNC') != '1':
+            logger.info(f"Command tree unchanged ({tree_hash[:12]}), skipping {scope} sync")
+            return "skipped"
+        
         try:
-            synced = await self.tree.sync()
-            logger.info(f"Synced {len(synced)} command(s)")
+            synced = await self.tree.sync(guild=guild)
+            logger.info(f"Synced {len(synced)} command(s) to {scope}")
         except Exception as e:
             logger.error(f"Failed to sync commands: {e}")
+            return "failed"
+        
+        state[key] = tree_hash
+        self._write_sync_state(state)
+        return "synced"
+    
+    async def close(self):
+        """Stop the web server and background monitors before disconnecting"""
+        if self.web_server:
+            await self.web_server.stop()
+        loop_monitor.stop()
+        await super().close()
     
     async def on_ready(self):
         """Called when bot is ready"""
         logger.info(f'{self.user} has connected to Discord!')
         logger.info(f'Bot is in {len(self.guilds)} guilds')
         
+        # on_ready fires again after reconnects; only the first one measures startup
+        if 'ready_seconds' not in self.startup_report:
+            ready_seconds = time.perf_counter() - self.created_at
+            self.startup_report['ready_seconds'] = round(ready_seconds, 3)
+            self.startup_report['ready_rss_mb'] = current_rss_mb()
+            self.startup_report['cached_members'] = sum(len(guild.members) for guild in self.guilds)
+            metrics.observe_startup_step("ready", ready_seconds)
+            logger.info(f"Ready after {ready_seconds:.2f}s, RSS {self.startup_report['ready_rss_mb']} MiB, "
+                        f"{self.startup_report['cached_members']} cached members "
+                        f"(members intent: {self.intents.members}, chunking: {self.startup_report['chunk_guilds_at_startup']})")
+        
         # Set bot status
         await self.change_presence(
             activity=discord.Game(name="Managing Football Clubs ⚽"),
             status=discord.Status.online
         )
     
+    async def on_app_command_completion(self, interaction, command):
+        """Record latency for successfully completed slash commands"""
+        self.tree.finish_interaction(interaction)
+    
+    async def on_guild_role_update(self, before, after):
+        """Drop cached admin roles when a role changes"""
+        permission_cache.invalidate_guild(after.guild.id)
+    
+    async def on_guild_role_create(self, role):
+        """Drop cached admin roles when a role is created"""
+        permission_cache.invalidate_guild(role.guild.id)
+    
+    async def on_guild_role_delete(self, role):
+        """Drop cached admin roles when a role is deleted"""
+        permission_cache.invalidate_guild(role.guild.id)
+    
+    async def on_member_update(self, before, after):
+        """Drop a member's cached admin flag when their roles change (members intent only)"""
+        if before.roles != after.roles:
+            permission_cache.invalidate_member(after.guild.id, after.id)
+    
+    async def on_guild_update(self, before, after):
+        """Drop cached permissions when guild ownership changes"""
+        if before.owner_id != after.owner_id:
+            permission_cache.invalidate_guild(after.id)
+    
     async def on_command_error(self, ctx, error):
         """Global error handler"""
         if isinstance(error, commands.MissingPermissions):
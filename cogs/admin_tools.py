@@ -10,10 +10,18 @@ import logging
 import json
 import os
 from datetime import datetime
-from utils.permissions import check_admin
+from typing import Dict
+from utils.changesets import Changeset, MAX_CHANGESETS_PER_GUILD
+from utils.permissions import check_admin, check_server_admin, permission_cache, DEFAULT_ADMIN_ROLE_NAMES
+from utils.profiling import profiler
+from utils.views import confirm_action
+from utils.deferred import deferred, run_blocking
 
 logger = logging.getLogger(__name__)
 
+MAX_SNAPSHOT_NAME = 50
+SNAPSHOTS_SHOWN = 25
+
 class AdminTools(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -43,33 +51,8 @@ class AdminTools(commands.Cog):
             await interaction.response.send_message(f"❌ Club '{new_name}' already exists!", ephemeral=True)
             return
         
-        # Create new club with same data
-        if self.db.add_club(new_club_id, new_name, club_data['budget']):
-            # Copy players to new club
-            clubs_data = self.db._read_json(self.db.clubs_file)
-            clubs_data['clubs'][new_club_id]['players'] = club_data.get('players', [])
-            clubs_data['clubs'][new_club_id]['created_at'] = club_data.get('created_at')
-            self.db._write_json(self.db.clubs_file, clubs_data)
-            
-            # Update player assignments
-            players_data = self.db._read_json(self.db.players_file)
-            for player_id, player in players_data['players'].items():
-                if player.get('club_id') == old_club_id:
-                    player['club_id'] = new_club_id
-            self.db._write_json(self.db.players_file, players_data)
-            
-            # Update transfer history
-            transfers_data = self.db._read_json(self.db.transfers_file)
-            for transfer in transfers_data['transfers']:
-                if transfer.get('from_club') == old_club_id:
-                    transfer['from_club'] = new_club_id
-                if transfer.get('to_club') == old_club_id:
-                    transfer['to_club'] = new_club_id
-            self.db._write_json(self.db.transfers_file, transfers_data)
-            
-            # Delete old club
-            self.db.delete_club(old_club_id)
-            
+        # Move the club, its player assignments and transfer history to the new id
+        if self.db.rename_club(old_club_id, new_club_id, new_name):
             embed = discord.Embed(
                 title="✏️ Club Renamed Successfully",
                 color=discord.Color.green(),
@@ -103,35 +86,8 @@ class AdminTools(commands.Cog):
             await interaction.response.send_message(f"❌ Player '{new_name}' already exists!", ephemeral=True)
             return
         
-        # Create new player with same data
-        if self.db.add_player(new_player_id, new_name, player_data['value'], player_data.get('club_id')):
-            # Copy additional data
-            players_data = self.db._read_json(self.db.players_file)
-            players_data['players'][new_player_id]['position'] = player_data.get('position', '')
-            players_data['players'][new_player_id]['age'] = player_data.get('age', 0)
-            players_data['players'][new_player_id]['created_at'] = player_data.get('created_at')
-            self.db._write_json(self.db.players_file, players_data)
-            
-            # Update club rosters
-            if player_data.get('club_id'):
-                clubs_data = self.db._read_json(self.db.clubs_file)
-                club_id = player_data['club_id']
-                if club_id in clubs_data['clubs']:
-                    if old_player_id in clubs_data['clubs'][club_id]['players']:
-                        clubs_data['clubs'][club_id]['players'].remove(old_player_id)
-                        clubs_data['clubs'][club_id]['players'].append(new_player_id)
-                    self.db._write_json(self.db.clubs_file, clubs_data)
-            
-            # Update transfer history
-            transfers_data = self.db._read_json(self.db.transfers_file)
-            for transfer in transfers_data['transfers']:
-                if transfer.get('player_id') == old_player_id:
-                    transfer['player_id'] = new_player_id
-            self.db._write_json(self.db.transfers_file, transfers_data)
-            
-            # Delete old player
-            self.db.delete_player(old_player_id)
-            
+        # Move the player, their roster entry and transfer history to the new id
+        if self.db.rename_player(old_player_id, new_player_id, new_name):
             embed = discord.Embed(
                 title="✏️ Player Renamed Successfully",
                 color=discord.Color.green(),
@@ -141,7 +97,29 @@ class AdminTools(commands.Cog):
         else:
             await interaction.response.send_message("❌ Failed to rename player.", ephemeral=True)
     
+    def write_backup(self, guild_id, timestamp: str, prefix: str = "backup") -> str:
+        """Write a timestamped backup file and return its path; runs on a worker thread"""
+        # Create backup directory
+        backup_dir = "backups"
+        os.makedirs(backup_dir, exist_ok=True)
+        backup_file = os.path.join(backup_dir, f"{prefix}_{guild_id}_{timestamp}.json")
+        
+        # Collect all data
+        backup_data = {
+            'guild_id': int(guild_id),
+            'backup_date': datetime.now().isoformat(),
+            'clubs': self.db.get_clubs(),
+            'players': self.db.get_players(),
+            'transfers': self.db.get_transfers()
+        }
+        
+        # Write backup
+        with open(backup_file, 'w', encoding='utf-8') as f:
+            json.dump(backup_data, f, indent=2, ensure_ascii=False)
+        return backup_file
+    
     @app_commands.command(name="backup_data", description="Create a backup of all data")
+    @deferred()
     async def backup_data(self, interaction: discord.Interaction):
         """Create data backup"""
         if not check_admin(interaction):
@@ -149,26 +127,8 @@ class AdminTools(commands.Cog):
             return
         
         try:
-            # Create backup directory
-            backup_dir = "backups"
-            os.makedirs(backup_dir, exist_ok=True)
-            
-            # Create timestamped backup
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = os.path.join(backup_dir, f"backup_{interaction.guild.id}_{timestamp}.json")
-            
-            # Collect all data
-            backup_data = {
-                'guild_id': interaction.guild.id,
-                'backup_date': datetime.now().isoformat(),
-                'clubs': self.db.get_clubs(),
-                'players': self.db.get_players(),
-                'transfers': self.db.get_transfers()
-            }
-            
-            # Write backup
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(backup_data, f, indent=2, ensure_ascii=False)
+            backup_file = await run_blocking(self.write_backup, interaction.guild.id, timestamp)
             
             embed = discord.Embed(
                 title="💾 Backup Created",
@@ -180,65 +140,251 @@ class AdminTools(commands.Cog):
             embed.add_field(name="Guild ID", value=str(interaction.guild.id), inline=True)
             
             await interaction.response.send_message(embed=embed)
-            
+        
         except Exception as e:
             logger.error(f"Backup failed: {e}")
             await interaction.response.send_message("❌ Backup failed. Please try again.", ephemeral=True)
     
+    @app_commands.command(name="snapshot", description="Save the current league state under a name")
+    @app_commands.describe(name="Snapshot name, usable as as_of in /league_table, /financial_report and /top_players_league")
+    @deferred()
+    async def snapshot(self, interaction: discord.Interaction, name: str):
+        """Name the current state of the league"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        name = name.strip()
+        if not name or len(name) > MAX_SNAPSHOT_NAME or name[0].isdigit():
+            await interaction.response.send_message(f"❌ Snapshot names must be 1-{MAX_SNAPSHOT_NAME} characters and not start with a digit!", ephemeral=True)
+            return
+        
+        if await run_blocking(self.db.get_snapshot, interaction.guild.id, name):
+            await interaction.response.send_message(f"❌ A snapshot named '{name}' already exists!", ephemeral=True)
+            return
+        
+        snapshot = await run_blocking(self.db.take_snapshot, interaction.guild.id, name)
+        
+        embed = discord.Embed(
+            title="🕰️ Snapshot Saved",
+            color=discord.Color.green(),
+            description=f"Use `as_of: {name}` to see the league as it is now"
+        )
+        embed.add_field(name="Name", value=name, inline=True)
+        embed.add_field(name="Taken", value=snapshot['date'].strftime('%Y-%m-%d %H:%M'), inline=True)
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="snapshots", description="List this server's saved league snapshots")
+    @deferred()
+    async def snapshots(self, interaction: discord.Interaction):
+        """List saved snapshots"""
+        snapshots = await run_blocking(self.db.get_snapshots, interaction.guild.id)
+        if not snapshots:
+            await interaction.response.send_message("📋 No snapshots yet. Use `/snapshot` to save one.", ephemeral=True)
+            return
+        
+        lines = [f"`{s['label']}` - {s['date'].strftime('%Y-%m-%d %H:%M')}" for s in snapshots[:SNAPSHOTS_SHOWN]]
+        embed = discord.Embed(
+            title="🕰️ League Snapshots",
+            color=discord.Color.blue(),
+            description="\n".join(lines)
+        )
+        embed.set_footer(text=f"{len(snapshots)} snapshot(s), newest first · any date (YYYY-MM-DD) also works as as_of")
+        
+        await interaction.response.send_message(embed=embed)
+    
     @app_commands.command(name="clear_all_data", description="Clear all data (USE WITH CAUTION)")
-    @app_commands.describe(confirm="Type 'CONFIRM' to proceed")
-    async def clear_all_data(self, interaction: discord.Interaction, confirm: str):
+    async def clear_all_data(self, interaction: discord.Interaction):
         """Clear all data for this server"""
         if not check_admin(interaction):
             await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
             return
         
-        if confirm.upper() != "CONFIRM":
-            await interaction.response.send_message("❌ You must type 'CONFIRM' to proceed with data clearing!", ephemeral=True)
+        warning = discord.Embed(
+            title="⚠️ Clear All Server Data?",
+            description=f"This deletes every club, player, transfer, match result and box score in this server.\n\nClubs, players and transfers can be restored with `/undo` until {MAX_CHANGESETS_PER_GUILD} newer bulk operations have run.",
+            color=discord.Color.red()
+        )
+        warning.add_field(name="🚫 Cannot Be Restored",
+                          value="• Player value history\n• Budget ledger (`/ledger`, transfer totals in `/club_finances`)\n"
+                                "• Named snapshots and `as_of` history\n• Match results and standings\n"
+                                "• Player box scores and stat leaderboards",
+                          inline=False)
+        if not await confirm_action(interaction, warning, confirm_label="Clear All Data"):
             return
         
         try:
-            guild_id = str(interaction.guild.id)
-            
-            # Clear clubs
-            clubs_data = self.db._read_json(self.db.clubs_file)
-            clubs_to_remove = [k for k in clubs_data['clubs'].keys() if k.startswith(guild_id)]
-            for club_id in clubs_to_remove:
-                del clubs_data['clubs'][club_id]
-            self.db._write_json(self.db.clubs_file, clubs_data)
-            
-            # Clear players
-            players_data = self.db._read_json(self.db.players_file)
-            players_to_remove = [k for k in players_data['players'].keys() if k.startswith(guild_id)]
-            for player_id in players_to_remove:
-                del players_data['players'][player_id]
-            self.db._write_json(self.db.players_file, players_data)
-            
-            # Clear transfers
-            transfers_data = self.db._read_json(self.db.transfers_file)
-            transfers_data['transfers'] = [t for t in transfers_data['transfers'] if not t['player_id'].startswith(guild_id)]
-            self.db._write_json(self.db.transfers_file, transfers_data)
+            changeset = Changeset(interaction.guild.id, "clear_all_data", interaction.user.id)
+            clubs_removed, players_removed = await run_blocking(self.db.clear_guild_data, interaction.guild.id, changeset)
             
             embed = discord.Embed(
                 title="🗑️ All Data Cleared",
                 color=discord.Color.red(),
-                description="All clubs, players, and transfer data have been permanently deleted!"
+                description="All clubs, players, and transfer data have been deleted!"
             )
-            embed.add_field(name="Clubs Removed", value=str(len(clubs_to_remove)), inline=True)
-            embed.add_field(name="Players Removed", value=str(len(players_to_remove)), inline=True)
-            
-            await interaction.response.send_message(embed=embed)
+            embed.add_field(name="Clubs Removed", value=str(clubs_removed), inline=True)
+            embed.add_field(name="Players Removed", value=str(players_removed), inline=True)
+            if clubs_removed or players_removed:
+                embed.add_field(name="↩️ Undo", value=f"`/undo {changeset.id}` restores clubs, players and transfers only", inline=True)
             
+            await interaction.edit_original_response(embed=embed, view=None)
+        
         except Exception as e:
             logger.error(f"Data clearing failed: {e}")
-            await interaction.response.send_message("❌ Failed to clear data. Please try again.", ephemeral=True)
+            await interaction.edit_original_response(content="❌ Failed to clear data. Please try again.", embed=None, view=None)
+    
+    async def _undo(self, interaction: discord.Interaction, operation: Dict):
+        """Confirm and revert one recorded bulk operation"""
+        if operation['undone']:
+            await interaction.response.send_message(f"❌ Operation `{operation['id']}` was already undone!", ephemeral=True)
+            return
+        
+        warning = discord.Embed(
+            title="⚠️ Confirm Undo",
+            description=f"Revert **{operation['operation']}** from {operation['date'].strftime('%Y-%m-%d %H:%M')}, restoring **{operation['records']}** record(s)?",
+            color=discord.Color.orange()
+        )
+        if not await confirm_action(interaction, warning, confirm_label="Undo"):
+            return
+        
+        restored, conflicts = await run_blocking(self.db.undo_changeset, interaction.guild.id, operation['id'])
+        if conflicts:
+            shown = ", ".join(f"`{record_id.split('_', 1)[1]}`" for record_id in conflicts[:5])
+            more = f" and {len(conflicts) - 5} more" if len(conflicts) > 5 else ""
+            await interaction.edit_original_response(
+                content=f"❌ Cannot undo: {shown}{more} changed since the operation. Nothing was modified.",
+                embed=None, view=None)
+            return
+        if not restored:
+            await interaction.edit_original_response(content="❌ Failed to undo the operation. Nothing was modified.", embed=None, view=None)
+            return
+        
+        embed = discord.Embed(
+            title="↩️ Operation Undone",
+            color=discord.Color.green(),
+            description=f"Reverted **{operation['operation']}** (`{operation['id']}`)"
+        )
+        embed.add_field(name="Records Restored", value=str(restored), inline=True)
+        embed.add_field(name="Originally Run", value=operation['date'].strftime('%Y-%m-%d %H:%M'), inline=True)
+        
+        await interaction.edit_original_response(embed=embed, view=None)
+    
+    @app_commands.command(name="undo_last", description="Revert the most recent bulk operation")
+    @deferred()
+    async def undo_last(self, interaction: discord.Interaction):
+        """Undo the newest bulk operation"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        operation = self.db.get_changeset(interaction.guild.id)
+        if operation is None:
+            await interaction.response.send_message("📋 No bulk operations to undo.", ephemeral=True)
+            return
+        
+        await self._undo(interaction, operation)
+    
+    @app_commands.command(name="undo", description="Revert a bulk operation by its ID")
+    @app_commands.describe(operation_id="Operation ID shown when the operation ran")
+    @deferred()
+    async def undo(self, interaction: discord.Interaction, operation_id: str):
+        """Undo a bulk operation"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        operation = self.db.get_changeset(interaction.guild.id, operation_id.strip().strip('`'))
+        if operation is None:
+            recent = [f"`{op['id']}` {op['operation']} ({op['date'].strftime('%Y-%m-%d %H:%M')})"
+                      for op in self.db.get_changesets(interaction.guild.id) if not op['undone']][:5]
+            hint = "\nRecent operations: " + ", ".join(recent) if recent else ""
+            await interaction.response.send_message(f"❌ Operation '{operation_id}' not found!{hint}", ephemeral=True)
+            return
+        
+        await self._undo(interaction, operation)
+    
+    @app_commands.command(name="set_admin_roles", description="Set which role names grant bot admin access")
+    @app_commands.describe(roles="Comma-separated role names, or 'default' to restore the default roles")
+    async def set_admin_roles(self, interaction: discord.Interaction, roles: str):
+        """Configure admin role names for this server"""
+        # Admin roles must not be able to grant admin access to more roles
+        if not check_server_admin(interaction):
+            await interaction.response.send_message("❌ Only the server owner or members with the Administrator permission can change admin roles!", ephemeral=True)
+            return
+        
+        if roles.strip().lower() == "default":
+            role_names = DEFAULT_ADMIN_ROLE_NAMES
+        else:
+            role_names = [name.strip() for name in roles.split(',') if name.strip()]
+        
+        if not role_names:
+            await interaction.response.send_message("❌ Please provide at least one role name!", ephemeral=True)
+            return
+        
+        if any(name.lstrip('@').lower() == 'everyone' for name in role_names):
+            await interaction.response.send_message("❌ @everyone cannot be an admin role!", ephemeral=True)
+            return
+        
+        if self.db.update_guild_settings(interaction.guild.id, admin_roles=role_names):
+            permission_cache.invalidate_guild(interaction.guild.id)
+            
+            existing = {role.name for role in interaction.guild.roles}
+            missing = [name for name in role_names if name not in existing]
+            
+            embed = discord.Embed(
+                title="🔐 Admin Roles Updated",
+                color=discord.Color.green(),
+                description="Members with these roles can use admin commands"
+            )
+            embed.add_field(name="Admin Roles", value="\n".join(f"• {name}" for name in role_names), inline=False)
+            if missing:
+                embed.add_field(name="⚠️ Not Found In Server", value=", ".join(missing), inline=False)
+            
+            await interaction.response.send_message(embed=embed)
+        else:
+            await interaction.response.send_message("❌ Failed to update admin roles.", ephemeral=True)
+    
+    @app_commands.command(name="profile", description="Profile this server's next commands and post a report")
+    @app_commands.describe(
+        interactions="Number of upcoming commands to profile (default: 20)",
+        seconds="Stop after this many seconds (default: 300, 0 for no time limit)"
+    )
+    async def profile(self, interaction: discord.Interaction, interactions: int = 20, seconds: int = 300):
+        """Profile upcoming commands in this server"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        if interactions < 1 or interactions > 500:
+            await interaction.response.send_message("❌ Interactions must be between 1 and 500!", ephemeral=True)
+            return
+        
+        if seconds < 0 or seconds > 3600:
+            await interaction.response.send_message("❌ Seconds must be between 0 and 3600!", ephemeral=True)
+            return
+        
+        if not profiler.start(interaction.guild.id, interaction.channel, interactions, seconds, str(interaction.user)):
+            await interaction.response.send_message("❌ A profiling session is already running. Try again later.", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="📈 Profiling Started",
+            color=discord.Color.blue(),
+            description="The report will be posted in this channel when profiling finishes"
+        )
+        embed.add_field(name="Interactions", value=str(interactions), inline=True)
+        embed.add_field(name="Time Limit", value=f"{seconds}s" if seconds else "None", inline=True)
+        
+        await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="average_values", description="Show average player values per club")
+    @deferred()
     async def average_values(self, interaction: discord.Interaction):
         """Calculate average player values"""
-        clubs = self.db.get_clubs()
+        clubs = await run_blocking(self.db.get_clubs)
         guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
-        players = self.db.get_players()
+        players = await run_blocking(self.db.get_players)
         
         if not guild_clubs:
             await interaction.response.send_message("📋 No clubs found.", ephemeral=True)
@@ -283,11 +429,12 @@ class AdminTools(commands.Cog):
     
     @app_commands.command(name="clubs_needing_players", description="Show clubs with few players")
     @app_commands.describe(threshold="Minimum player count threshold (default: 5)")
+    @deferred()
     async def clubs_needing_players(self, interaction: discord.Interaction, threshold: int = 5):
         """Show clubs that need more players"""
-        clubs = self.db.get_clubs()
+        clubs = await run_blocking(self.db.get_clubs)
         guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
-        players = self.db.get_players()
+        players = await run_blocking(self.db.get_players)
         
         if not guild_clubs:
             await interaction.response.send_message("📋 No clubs found.", ephemeral=True)
@@ -324,9 +471,10 @@ class AdminTools(commands.Cog):
     
     @app_commands.command(name="most_transferred_players", description="Show players with most transfers")
     @app_commands.describe(limit="Number of players to show (default: 10)")
+    @deferred()
     async def most_transferred_players(self, interaction: discord.Interaction, limit: int = 10):
         """Show players with most transfers"""
-        transfers = self.db.get_transfers()
+        transfers = await run_blocking(self.db.get_transfers)
         guild_transfers = [t for t in transfers if t['player_id'].startswith(str(interaction.guild.id))]
         
         if not guild_transfers:
@@ -350,14 +498,15 @@ class AdminTools(commands.Cog):
             description=f"Players with most transfers"
         )
         
-        players = self.db.get_players()
+        players = await run_blocking(self.db.get_players)
+        clubs = await run_blocking(self.db.get_clubs)
         
         for i, (player_id, transfer_count) in enumerate(sorted_players):
             player_data = players.get(player_id)
             if player_data:
                 current_club = "Free Agent"
                 if player_data.get('club_id'):
-                    club = self.db.get_club(player_data['club_id'])
+                    club = clubs.get(player_data['club_id'])
                     if club:
                         current_club = club['name']
                 
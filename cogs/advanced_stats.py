@@ -8,6 +8,8 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 from utils.permissions import check_admin
+from utils.deferred import deferred, run_blocking
+from utils.league import league_as_of
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +19,23 @@ class AdvancedStats(commands.Cog):
         self.db = bot.db
     
     @app_commands.command(name="top_players_league", description="Show top players in the league by value")
-    @app_commands.describe(limit="Number of players to show (default: 10)")
-    async def top_players_league(self, interaction: discord.Interaction, limit: int = 10):
+    @app_commands.describe(
+        limit="Number of players to show (default: 10)",
+        as_of="Snapshot name or date (YYYY-MM-DD) to show the league as it was"
+    )
+    @deferred()
+    async def top_players_league(self, interaction: discord.Interaction, limit: int = 10, as_of: str = None):
         """Show top players in the league"""
-        players = self.db.get_players()
-        guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
+        period = None
+        if as_of:
+            try:
+                clubs, guild_players, _, period = await run_blocking(league_as_of, self.db, interaction.guild.id, as_of)
+            except ValueError as e:
+                await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+                return
+        else:
+            players = await run_blocking(self.db.get_players)
+            guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
         
         if not guild_players:
             await interaction.response.send_message("📋 No players found.", ephemeral=True)
@@ -36,10 +50,13 @@ class AdvancedStats(commands.Cog):
             description=f"Top {len(sorted_players)} most valuable players"
         )
         
+        if not as_of:
+            clubs = await run_blocking(self.db.get_clubs)
+        
         for i, player in enumerate(sorted_players):
             club_name = "Free Agent"
             if player.get('club_id'):
-                club = self.db.get_club(player['club_id'])
+                club = clubs.get(player['club_id'])
                 if club:
                     club_name = club['name']
             
@@ -49,12 +66,16 @@ class AdvancedStats(commands.Cog):
                 inline=True
             )
         
+        if period:
+            embed.set_footer(text=f"🕰️ {period}")
+        
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="richest_poorest_clubs", description="Show richest and poorest clubs")
+    @deferred()
     async def richest_poorest_clubs(self, interaction: discord.Interaction):
         """Show financial extremes"""
-        clubs = self.db.get_clubs()
+        clubs = await run_blocking(self.db.get_clubs)
         guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
         
         if not guild_clubs:
@@ -83,9 +104,10 @@ class AdvancedStats(commands.Cog):
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="transfer_activity_ranking", description="Show clubs by transfer activity")
+    @deferred()
     async def transfer_activity_ranking(self, interaction: discord.Interaction):
         """Show most active clubs in transfers"""
-        transfers = self.db.get_transfers()
+        transfers = await run_blocking(self.db.get_transfers)
         guild_transfers = [t for t in transfers if t['player_id'].startswith(str(interaction.guild.id))]
         
         if not guild_transfers:
@@ -94,7 +116,7 @@ class AdvancedStats(commands.Cog):
         
         # Count transfers per club
         club_activity = {}
-        clubs = self.db.get_clubs()
+        clubs = await run_blocking(self.db.get_clubs)
         
         for transfer in guild_transfers:
             # Count for buying club
@@ -142,11 +164,21 @@ class AdvancedStats(commands.Cog):
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="league_table", description="Show league table by total club value")
-    async def league_table(self, interaction: discord.Interaction):
+    @app_commands.describe(as_of="Snapshot name or date (YYYY-MM-DD) to show the table as it was")
+    @deferred()
+    async def league_table(self, interaction: discord.Interaction, as_of: str = None):
         """Generate league table by total value"""
-        clubs = self.db.get_clubs()
-        guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
-        players = self.db.get_players()
+        period = None
+        if as_of:
+            try:
+                guild_clubs, players, _, period = await run_blocking(league_as_of, self.db, interaction.guild.id, as_of)
+            except ValueError as e:
+                await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+                return
+        else:
+            clubs = await run_blocking(self.db.get_clubs)
+            guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
+            players = await run_blocking(self.db.get_players)
         
         if not guild_clubs:
             await interaction.response.send_message("📋 No clubs found.", ephemeral=True)
@@ -185,6 +217,9 @@ class AdvancedStats(commands.Cog):
                 inline=False
             )
         
+        if period:
+            embed.set_footer(text=f"🕰️ {period}")
+        
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="compare_clubs", description="Compare two clubs directly")
@@ -192,13 +227,14 @@ class AdvancedStats(commands.Cog):
         club1="First club name",
         club2="Second club name"
     )
+    @deferred()
     async def compare_clubs(self, interaction: discord.Interaction, club1: str, club2: str):
         """Compare two clubs"""
         club1_id = f"{interaction.guild.id}_{club1.lower().replace(' ', '_')}"
         club2_id = f"{interaction.guild.id}_{club2.lower().replace(' ', '_')}"
         
-        club1_data = self.db.get_club(club1_id)
-        club2_data = self.db.get_club(club2_id)
+        club1_data = await run_blocking(self.db.get_club, club1_id)
+        club2_data = await run_blocking(self.db.get_club, club2_id)
         
         if not club1_data:
             await interaction.response.send_message(f"❌ Club '{club1}' not found!", ephemeral=True)
@@ -208,8 +244,8 @@ class AdvancedStats(commands.Cog):
             await interaction.response.send_message(f"❌ Club '{club2}' not found!", ephemeral=True)
             return
         
-        players = self.db.get_players()
-        transfers = self.db.get_transfers()
+        players = await run_blocking(self.db.get_players)
+        transfers = await run_blocking(self.db.get_transfers)
         
         # Calculate squad values and stats
         club1_players = [players[pid] for pid in club1_data.get('players', []) if pid in players]
@@ -6,16 +6,95 @@ Advanced player management features including positions, ages, and contracts
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from utils.permissions import check_admin
+from utils.deferred import deferred, run_blocking
+from utils.database import guild_of
 
 logger = logging.getLogger(__name__)
 
+# Players released per storage write when contracts expire
+CONTRACT_RELEASE_BATCH = 100
+# Re-check the next expiry at least this often, in case the system clock jumps
+MAX_EXPIRY_SLEEP = 3600
+
 class EnhancedPlayerManagement(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.expiry_task: Optional[asyncio.Task] = None
+        self.expiry_wakeup = asyncio.Event()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def cog_load(self):
+        """Start releasing players whose contracts expire"""
+        self.loop = asyncio.get_running_loop()
+        self.db.add_listener(self._on_data_change)
+        self.expiry_task = self.loop.create_task(self._process_expired_contracts())
+    
+    async def cog_unload(self):
+        self.db.remove_listener(self._on_data_change)
+        if self.expiry_task:
+            self.expiry_task.cancel()
+    
+    def _on_data_change(self, guild_id: str, version: int):
+        """Wake the expiry task so it re-reads the next expiry, which may have moved earlier"""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.expiry_wakeup.set)
+    
+    async def _process_expired_contracts(self):
+        """Sleep until the next contract expires, then release expired players in batches"""
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                self.expiry_wakeup.clear()
+                next_expiry = self.db.next_contract_expiry()
+                delay = None if next_expiry is None else (next_expiry - datetime.now()).total_seconds()
+                if delay is None or delay > 0:
+                    try:
+                        await asyncio.wait_for(self.expiry_wakeup.wait(), min(delay or MAX_EXPIRY_SLEEP, MAX_EXPIRY_SLEEP))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                released = await run_blocking(self.db.release_expired_contracts, datetime.now(), CONTRACT_RELEASE_BATCH)
+                by_guild: Dict[str, List[Dict]] = defaultdict(list)
+                for player in released:
+                    by_guild[guild_of(player['player_id'])].append(player)
+                for guild_id, players in by_guild.items():
+                    logger.info(f"Released {len(players)} player(s) with expired contracts in guild {guild_id}")
+                    await self._post_contract_digest(guild_id, players)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Contract expiry processing failed: {e}")
+                await asyncio.sleep(60)
+    
+    async def _post_contract_digest(self, guild_id: str, players: List[Dict]):
+        """Post released players to the guild's digest channel, if one is configured"""
+        channel_id = self.db.get_guild_settings(guild_id).get('contract_digest_channel')
+        channel = self.bot.get_channel(channel_id) if channel_id else None
+        if channel is None:
+            return
+        
+        embed = discord.Embed(
+            title="📄 Contracts Expired",
+            color=discord.Color.orange(),
+            description=f"{len(players)} player(s) released to free agency"
+        )
+        lines = [f"• {p['name']}" + (f" (left {p['club']})" if p['club'] else "") for p in players[:20]]
+        if len(players) > 20:
+            lines.append(f"... and {len(players) - 20} more")
+        embed.add_field(name="🆓 Released", value="\n".join(lines), inline=False)
+        
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            logger.warning(f"Could not post contract digest in guild {guild_id}: {e}")
     
     @app_commands.command(name="set_player_position", description="Set a player's position")
     @app_commands.describe(
@@ -41,9 +120,7 @@ class EnhancedPlayerManagement(commands.Cog):
             return
         
         # Update player position
-        players_data = self.db._read_json(self.db.players_file)
-        players_data['players'][player_id]['position'] = position.upper()
-        self.db._write_json(self.db.players_file, players_data)
+        self.db.update_player_fields(player_id, position=position.upper())
         
         embed = discord.Embed(
             title="🎯 Position Updated",
@@ -76,9 +153,7 @@ class EnhancedPlayerManagement(commands.Cog):
             return
         
         # Update player age
-        players_data = self.db._read_json(self.db.players_file)
-        players_data['players'][player_id]['age'] = age
-        self.db._write_json(self.db.players_file, players_data)
+        self.db.update_player_fields(player_id, age=age)
         
         embed = discord.Embed(
             title="🎂 Age Updated",
@@ -118,9 +193,7 @@ class EnhancedPlayerManagement(commands.Cog):
         expiry_date = (datetime.now() + timedelta(days=years*365)).isoformat()
         
         # Update contract
-        players_data = self.db._read_json(self.db.players_file)
-        players_data['players'][player_id]['contract_expires'] = expiry_date
-        self.db._write_json(self.db.players_file, players_data)
+        self.db.update_player_fields(player_id, contract_expires=expiry_date)
         
         embed = discord.Embed(
             title="📄 Contract Updated",
@@ -135,9 +208,10 @@ class EnhancedPlayerManagement(commands.Cog):
     
     @app_commands.command(name="players_by_position", description="List players by position")
     @app_commands.describe(position="Position filter (GK, DEF, MID, FWD)")
+    @deferred()
     async def players_by_position(self, interaction: discord.Interaction, position: str = None):
         """List players by position"""
-        players = self.db.get_players()
+        players = await run_blocking(self.db.get_players)
         guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
         
         if not guild_players:
@@ -169,6 +243,7 @@ class EnhancedPlayerManagement(commands.Cog):
         
         position_emojis = {"GK": "🥅", "DEF": "🛡️", "MID": "⚽", "FWD": "🎯", "": "❓"}
         position_names = {"GK": "Goalkeepers", "DEF": "Defenders", "MID": "Midfielders", "FWD": "Forwards", "": "Unknown Position"}
+        clubs = await run_blocking(self.db.get_clubs)
         
         for pos, players_list in positions.items():
             if players_list and (not position or pos == position):
@@ -178,7 +253,7 @@ class EnhancedPlayerManagement(commands.Cog):
                 for i, p in enumerate(sorted_players[:8]):  # Show top 8 per position
                     club_name = "Free Agent"
                     if p.get('club_id'):
-                        club = self.db.get_club(p['club_id'])
+                        club = clubs.get(p['club_id'])
                         if club:
                             club_name = club['name'][:12]  # Truncate long names
                     
@@ -196,37 +271,19 @@ class EnhancedPlayerManagement(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
     
-    @app_commands.command(name="expiring_contracts", description="Show players with expiring contracts")
-    @app_commands.describe(months="Show contracts expiring within X months (default: 6)")
-    async def expiring_contracts(self, interaction: discord.Interaction, months: int = 6):
-        """Show expiring contracts"""
-        players = self.db.get_players()
-        guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
+    async def expiring_contracts_embed(self, guild_id, months: int) -> Tuple[Optional[discord.Embed], int]:
+        """Build the expiring contracts embed for a guild (None when nothing expires) and count the expiring contracts"""
+        now = datetime.now()
+        cutoff_date = now + timedelta(days=months*30)
+        expiring = await run_blocking(self.db.get_expiring_contracts, guild_id, now, cutoff_date)
         
-        if not guild_players:
-            await interaction.response.send_message("📋 No players found.", ephemeral=True)
-            return
+        if not expiring:
+            return None, 0
         
-        # Find players with expiring contracts
-        cutoff_date = datetime.now() + timedelta(days=months*30)
-        expiring_players = []
-        
-        for player_data in guild_players.values():
-            if player_data.get('contract_expires'):
-                try:
-                    expiry_date = datetime.fromisoformat(player_data['contract_expires'])
-                    if expiry_date <= cutoff_date and expiry_date >= datetime.now():
-                        days_remaining = (expiry_date - datetime.now()).days
-                        expiring_players.append((player_data, days_remaining))
-                except:
-                    continue
-        
-        if not expiring_players:
-            await interaction.response.send_message(f"📋 No contracts expiring in the next {months} months.", ephemeral=True)
-            return
-        
-        # Sort by days remaining
-        expiring_players.sort(key=lambda x: x[1])
+        # Already sorted by expiry, soonest first
+        players = await run_blocking(self.db.get_players)
+        expiring_players = [(players[player_id], (expiry_date - now).days)
+                            for player_id, expiry_date in expiring if player_id in players]
         
         embed = discord.Embed(
             title="📄 Expiring Contracts",
@@ -234,10 +291,12 @@ class EnhancedPlayerManagement(commands.Cog):
             description=f"Contracts expiring within {months} months"
         )
         
+        clubs = await run_blocking(self.db.get_clubs)
+        
         for player_data, days_remaining in expiring_players[:15]:  # Show top 15
             club_name = "Free Agent"
             if player_data.get('club_id'):
-                club = self.db.get_club(player_data['club_id'])
+                club = clubs.get(player_data['club_id'])
                 if club:
                     club_name = club['name']
             
@@ -251,21 +310,33 @@ class EnhancedPlayerManagement(commands.Cog):
         
         if len(expiring_players) > 15:
             embed.set_footer(text=f"Showing 15 of {len(expiring_players)} expiring contracts")
+        return embed, len(expiring_players)
+    
+    @app_commands.command(name="expiring_contracts", description="Show players with expiring contracts")
+    @app_commands.describe(months="Show contracts expiring within X months (default: 6)")
+    @deferred()
+    async def expiring_contracts(self, interaction: discord.Interaction, months: int = 6):
+        """Show expiring contracts"""
+        embed, _ = await self.expiring_contracts_embed(interaction.guild.id, months)
+        if embed is None:
+            await interaction.response.send_message(f"📋 No contracts expiring in the next {months} months.", ephemeral=True)
+            return
         
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="club_squad_analysis", description="Analyze club squad composition")
     @app_commands.describe(club="Club name")
+    @deferred()
     async def club_squad_analysis(self, interaction: discord.Interaction, club: str):
         """Analyze squad composition"""
         club_id = f"{interaction.guild.id}_{club.lower().replace(' ', '_')}"
-        club_data = self.db.get_club(club_id)
+        club_data = await run_blocking(self.db.get_club, club_id)
         
         if not club_data:
             await interaction.response.send_message(f"❌ Club '{club}' not found!", ephemeral=True)
             return
         
-        players = self.db.get_players()
+        players = await run_blocking(self.db.get_players)
         club_players = [players[pid] for pid in club_data.get('players', []) if pid in players]
         
         if not club_players:
@@ -325,6 +396,27 @@ class EnhancedPlayerManagement(commands.Cog):
             embed.add_field(name="✅ Squad Status", value="Well-balanced squad", inline=False)
         
         await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="contract_digest", description="Set the channel that lists players released when contracts expire")
+    @app_commands.describe(channel="Channel for the digest (leave empty to turn the digest off)")
+    async def contract_digest(self, interaction: discord.Interaction, channel: Optional[discord.TextChannel] = None):
+        """Configure the expired contracts digest"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        if not self.db.update_guild_settings(interaction.guild.id, contract_digest_channel=channel.id if channel else None):
+            await interaction.response.send_message("❌ Failed to update the contract digest.", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="📄 Contract Digest Updated",
+            color=discord.Color.green(),
+            description=f"Expired contracts will be listed in {channel.mention}" if channel
+            else "The expired contracts digest is turned off"
+        )
+        embed.set_footer(text="Players are released to free agency when their contracts expire.")
+        await interaction.response.send_message(embed=embed)
 
 async def setup(bot):
     await bot.add_cog(EnhancedPlayerManagement(bot))
\ No newline at end of file
@@ -8,7 +8,14 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 import random
+from datetime import datetime
+from typing import Optional, Tuple
+from utils.changesets import Changeset
+from utils.league import guild_clubs, guild_players
+from utils.plans import ChangePlan
 from utils.permissions import check_admin
+from utils.views import confirm_action
+from utils.deferred import deferred, run_blocking, Progress
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +24,84 @@ class ExtraCommands(commands.Cog):
         self.bot = bot
         self.db = bot.db
     
+    @staticmethod
+    def _new_values(ids, records: dict, field: str, compute, progress: Progress) -> dict:
+        """Compute record_id -> (old, new) for the given field; runs on a worker thread"""
+        changes = {}
+        for record_id in ids:
+            progress.advance()
+            if record_id not in records:
+                continue
+            old = records[record_id][field]
+            changes[record_id] = (old, compute(old))
+        return changes
+    
+    async def _plan(self, interaction: discord.Interaction, plan: ChangePlan, title: str, records: dict, field: str, compute):
+        """Compute the new value or budget of every record into the plan off the event loop"""
+        async with Progress(interaction, title, len(records)) as progress:
+            changes = await run_blocking(self._new_values, list(records), records, field, compute, progress)
+        (plan.values if field == 'value' else plan.budgets).update(changes)
+        plan.names.update((record_id, records[record_id]['name']) for record_id in changes)
+    
+    @staticmethod
+    def _preview(plan: ChangePlan, title: str, description: str) -> discord.Embed:
+        """Embed summarising what applying a plan would change"""
+        embed = discord.Embed(title=title, description=description, color=discord.Color.orange())
+        for changes, label, noun in ((plan.values, "Value", "👥 Players"), (plan.budgets, "Budget", "🏟️ Clubs")):
+            if not changes:
+                continue
+            delta = plan.delta(changes)
+            change_emoji = "📈" if delta > 0 else "📉" if delta < 0 else "➡️"
+            embed.add_field(name=f"{noun} Changed", value=str(len(changes)), inline=True)
+            embed.add_field(name=f"💰 Total {label} Change", value=f"{change_emoji} €{delta:+,.2f}", inline=True)
+            embed.add_field(name=f"🔝 Largest {label} Changes", value="\n".join(plan.movers(changes)), inline=False)
+        if plan.releases:
+            shown = list(plan.releases.items())[:8]
+            lines = [f"• {plan.names.get(pid, pid)} ({plan.names.get(cid, cid)})" for pid, cid in shown]
+            if len(plan.releases) > len(shown):
+                lines.append(f"... and {len(plan.releases) - len(shown)} more")
+            embed.add_field(name="🆓 Players Released", value=str(len(plan.releases)), inline=True)
+            embed.add_field(name="📤 Releases", value="\n".join(lines), inline=False)
+        embed.set_footer(text="Nothing has changed yet. Apply writes exactly these values.")
+        return embed
+    
+    async def _apply(self, interaction: discord.Interaction, plan: ChangePlan, changeset: Changeset,
+                     snapshot: Optional[str] = None) -> bool:
+        """Write a confirmed plan in one go, or report that it failed or the league changed since the preview"""
+        try:
+            if await run_blocking(self.db.apply_plan, plan, changeset, snapshot):
+                return True
+        except Exception as e:
+            logger.error(f"Applying {changeset.operation} failed: {e}")
+            embed = discord.Embed(
+                title="❌ Operation Failed",
+                description="Writing the changes failed. Anything written before the failure cannot be undone with `/undo`, so check the affected players and clubs before trying again.",
+                color=discord.Color.red()
+            )
+            await interaction.edit_original_response(embed=embed, view=None)
+            return False
+        embed = discord.Embed(
+            title="❌ Preview Out of Date",
+            description="League data changed after this preview was computed, so nothing was applied. Run the command again for a fresh preview.",
+            color=discord.Color.red()
+        )
+        await interaction.edit_original_response(embed=embed, view=None)
+        return False
+    
+    def apply_inflation(self, guild_id, rate: float) -> Tuple[int, int]:
+        """Raise a guild's player values and club budgets by rate percent in two bulk writes; runs on a worker thread"""
+        multiplier = 1 + (rate / 100)
+        values = {pid: round(p['value'] * multiplier, 2) for pid, p in guild_players(self.db, guild_id).items()}
+        budgets = {cid: round(c['budget'] * multiplier, 2) for cid, c in guild_clubs(self.db, guild_id).items()}
+        return self.db.bulk_update_player_values(values), self.db.bulk_update_club_budgets(budgets, 'inflation')
+    
     @app_commands.command(name="bulk_price_update", description="Update multiple players' values at once")
     @app_commands.describe(
         percentage="Percentage change (-50 to 200)",
         club="Club name (optional, affects all players if not specified)",
         position="Position filter (optional: GK, DEF, MID, FWD)"
     )
+    @deferred()
     async def bulk_price_update(self, interaction: discord.Interaction, percentage: float, club: str = None, position: str = None):
         """Bulk update player values"""
         if not check_admin(interaction):
@@ -33,12 +112,12 @@ class ExtraCommands(commands.Cog):
             await interaction.response.send_message("❌ Percentage must be between -50% and +200%!", ephemeral=True)
             return
         
-        players = self.db.get_players()
-        guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
+        version = self.db.get_data_version(interaction.guild.id)
+        league_players = await run_blocking(guild_players, self.db, interaction.guild.id)
         
         # Filter players
         filtered_players = {}
-        for player_id, player_data in guild_players.items():
+        for player_id, player_data in league_players.items():
             include = True
             
             # Club filter
@@ -59,20 +138,23 @@ class ExtraCommands(commands.Cog):
             await interaction.response.send_message("❌ No players found matching the criteria!", ephemeral=True)
             return
         
-        # Update values
         multiplier = 1 + (percentage / 100)
-        updated_count = 0
-        total_old_value = 0
-        total_new_value = 0
+        plan = ChangePlan(interaction.guild.id, "bulk_price_update", version)
+        await self._plan(interaction, plan, "📈 Computing new values...", filtered_players, 'value',
+                         lambda old: round(old * multiplier, 2))
         
-        for player_id, player_data in filtered_players.items():
-            old_value = player_data['value']
-            new_value = round(old_value * multiplier, 2)
-            
-            if self.db.update_player_value(player_id, new_value):
-                updated_count += 1
-                total_old_value += old_value
-                total_new_value += new_value
+        preview = self._preview(plan, "⚠️ Confirm Bulk Price Update",
+                                f"Change the value of **{len(filtered_players)}** player(s) by **{percentage:+.1f}%**?")
+        if not await confirm_action(interaction, preview, confirm_label="Apply"):
+            return
+        
+        changeset = Changeset(interaction.guild.id, "bulk_price_update", interaction.user.id)
+        if not await self._apply(interaction, plan, changeset):
+            return
+        changes = plan.values
+        updated_count = len(changes)
+        total_old_value = sum(old for old, new in changes.values())
+        total_new_value = sum(new for old, new in changes.values())
         
         embed = discord.Embed(
             title="📈 Bulk Price Update Completed",
@@ -91,11 +173,13 @@ class ExtraCommands(commands.Cog):
         value_change = total_new_value - total_old_value
         change_emoji = "📈" if value_change > 0 else "📉" if value_change < 0 else "➡️"
         embed.add_field(name="💰 Value Change", value=f"{change_emoji} €{value_change:,.2f}", inline=True)
+        embed.add_field(name="↩️ Undo", value=f"`/undo {changeset.id}`", inline=True)
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.edit_original_response(embed=embed, view=None)
     
     @app_commands.command(name="budget_multiplier", description="Multiply all club budgets by a factor")
     @app_commands.describe(multiplier="Budget multiplier (0.1 to 10.0)")
+    @deferred()
     async def budget_multiplier(self, interaction: discord.Interaction, multiplier: float):
         """Multiply all budgets"""
         if not check_admin(interaction):
@@ -106,25 +190,29 @@ class ExtraCommands(commands.Cog):
             await interaction.response.send_message("❌ Multiplier must be between 0.1 and 10.0!", ephemeral=True)
             return
         
-        clubs = self.db.get_clubs()
-        guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
+        version = self.db.get_data_version(interaction.guild.id)
+        league_clubs = await run_blocking(guild_clubs, self.db, interaction.guild.id)
         
-        if not guild_clubs:
+        if not league_clubs:
             await interaction.response.send_message("❌ No clubs found!", ephemeral=True)
             return
         
-        updated_clubs = []
-        total_old_budget = 0
-        total_new_budget = 0
+        plan = ChangePlan(interaction.guild.id, "budget_multiplier", version, reason="budget_multiplier")
+        await self._plan(interaction, plan, "💰 Computing new budgets...", league_clubs, 'budget',
+                         lambda old: round(old * multiplier, 2))
         
-        for club_id, club_data in guild_clubs.items():
-            old_budget = club_data['budget']
-            new_budget = round(old_budget * multiplier, 2)
-            
-            if self.db.update_club_budget(club_id, new_budget):
-                updated_clubs.append((club_data['name'], old_budget, new_budget))
-                total_old_budget += old_budget
-                total_new_budget += new_budget
+        preview = self._preview(plan, "⚠️ Confirm Budget Multiplier",
+                                f"Multiply the budgets of **{len(league_clubs)}** club(s) by **{multiplier}x**?")
+        if not await confirm_action(interaction, preview, confirm_label="Apply"):
+            return
+        
+        changeset = Changeset(interaction.guild.id, "budget_multiplier", interaction.user.id)
+        if not await self._apply(interaction, plan, changeset):
+            return
+        changes = plan.budgets
+        updated_clubs = [(league_clubs[club_id]['name'], old, new) for club_id, (old, new) in changes.items()]
+        total_old_budget = sum(old for _, old, _ in updated_clubs)
+        total_new_budget = sum(new for _, _, new in updated_clubs)
         
         embed = discord.Embed(
             title="💰 Budget Multiplier Applied",
@@ -138,6 +226,7 @@ class ExtraCommands(commands.Cog):
         budget_change = total_new_budget - total_old_budget
         change_emoji = "📈" if budget_change > 0 else "📉" if budget_change < 0 else "➡️"
         embed.add_field(name="💰 Budget Change", value=f"{change_emoji} €{budget_change:,.2f}", inline=True)
+        embed.add_field(name="↩️ Undo", value=f"`/undo {changeset.id}`", inline=True)
         
         # Show individual changes
         changes_text = ""
@@ -149,7 +238,7 @@ class ExtraCommands(commands.Cog):
         
         embed.add_field(name="🔄 Changes", value=changes_text, inline=False)
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.edit_original_response(embed=embed, view=None)
     
     @app_commands.command(name="random_player_value", description="Randomize player values within a range")
     @app_commands.describe(
@@ -157,6 +246,7 @@ class ExtraCommands(commands.Cog):
         max_value="Maximum value in Euros",
         club="Club name (optional)"
     )
+    @deferred()
     async def random_player_value(self, interaction: discord.Interaction, min_value: float, max_value: float, club: str = None):
         """Randomize player values"""
         if not check_admin(interaction):
@@ -167,8 +257,8 @@ class ExtraCommands(commands.Cog):
             await interaction.response.send_message("❌ Invalid value range!", ephemeral=True)
             return
         
-        players = self.db.get_players()
-        guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
+        version = self.db.get_data_version(interaction.guild.id)
+        league_players = await run_blocking(guild_players, self.db, interaction.guild.id)
         
         # Filter by club if specified
         if club:
@@ -176,17 +266,26 @@ class ExtraCommands(commands.Cog):
             if not self.db.get_club(club_id):
                 await interaction.response.send_message(f"❌ Club '{club}' not found!", ephemeral=True)
                 return
-            guild_players = {k: v for k, v in guild_players.items() if v.get('club_id') == club_id}
+            league_players = {k: v for k, v in league_players.items() if v.get('club_id') == club_id}
         
-        if not guild_players:
+        if not league_players:
             await interaction.response.send_message("❌ No players found!", ephemeral=True)
             return
         
-        updated_count = 0
-        for player_id in guild_players.keys():
-            new_value = round(random.uniform(min_value, max_value), 2)
-            if self.db.update_player_value(player_id, new_value):
-                updated_count += 1
+        plan = ChangePlan(interaction.guild.id, "random_player_value", version)
+        await self._plan(interaction, plan, "🎲 Drawing random values...", league_players, 'value',
+                         lambda old: round(random.uniform(min_value, max_value), 2))
+        
+        preview = self._preview(plan, "⚠️ Confirm Value Randomization",
+                                f"Set **{len(league_players)}** player value(s) to random amounts between €{min_value:,.2f} and €{max_value:,.2f}?")
+        if not await confirm_action(interaction, preview, confirm_label="Apply"):
+            return
+        
+        changeset = Changeset(interaction.guild.id, "random_player_value", interaction.user.id)
+        if not await self._apply(interaction, plan, changeset):
+            return
+        changes = plan.values
+        updated_count = len(changes)
         
         embed = discord.Embed(
             title="🎲 Player Values Randomized",
@@ -197,14 +296,16 @@ class ExtraCommands(commands.Cog):
         embed.add_field(name="💰 Value Range", value=f"€{min_value:,.2f} - €{max_value:,.2f}", inline=True)
         if club:
             embed.add_field(name="🏟️ Club", value=club, inline=True)
+        embed.add_field(name="↩️ Undo", value=f"`/undo {changeset.id}`", inline=True)
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.edit_original_response(embed=embed, view=None)
     
     @app_commands.command(name="salary_cap", description="Set a salary cap and adjust overvalued players")
     @app_commands.describe(
         cap="Maximum player value allowed",
         action="What to do with overvalued players: 'cap' or 'release'"
     )
+    @deferred()
     async def salary_cap(self, interaction: discord.Interaction, cap: float, action: str = "cap"):
         """Implement salary cap"""
         if not check_admin(interaction):
@@ -215,30 +316,40 @@ class ExtraCommands(commands.Cog):
             await interaction.response.send_message("❌ Action must be 'cap' or 'release'!", ephemeral=True)
             return
         
-        players = self.db.get_players()
-        guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
+        version = self.db.get_data_version(interaction.guild.id)
+        league_players = await run_blocking(guild_players, self.db, interaction.guild.id)
         
-        overvalued_players = {k: v for k, v in guild_players.items() if v['value'] > cap}
+        overvalued_players = {k: v for k, v in league_players.items() if v['value'] > cap}
         
         if not overvalued_players:
             await interaction.response.send_message(f"✅ All players are already under the salary cap of €{cap:,.2f}!", ephemeral=True)
             return
         
-        processed = 0
-        capped = 0
-        released = 0
+        plan = ChangePlan(interaction.guild.id, "salary_cap", version)
+        if action.lower() == "cap":
+            await self._plan(interaction, plan, "🧢 Capping player values...", overvalued_players, 'value',
+                             lambda old: min(old, cap))
+        else:  # release
+            # Only players at a club can be released to free agency
+            clubs = await run_blocking(guild_clubs, self.db, interaction.guild.id)
+            plan.releases = {pid: p['club_id'] for pid, p in overvalued_players.items() if p.get('club_id')}
+            plan.names.update((pid, overvalued_players[pid]['name']) for pid in plan.releases)
+            plan.names.update((cid, clubs[cid]['name']) for cid in plan.releases.values() if cid in clubs)
+            if not plan.releases:
+                await interaction.response.send_message("✅ Every overvalued player is already a free agent!", ephemeral=True)
+                return
         
-        for player_id, player_data in overvalued_players.items():
-            if action.lower() == "cap":
-                if self.db.update_player_value(player_id, cap):
-                    capped += 1
-                    processed += 1
-            else:  # release
-                # Transfer to free agency
-                if player_data.get('club_id'):
-                    if self.db.add_transfer(player_id, player_data['club_id'], None, 0):
-                        released += 1
-                        processed += 1
+        preview = self._preview(plan, "⚠️ Confirm Salary Cap",
+                                f"**{len(overvalued_players)}** player(s) are valued above €{cap:,.2f} and will be " + ("capped." if action.lower() == "cap" else "released to free agency."))
+        if not await confirm_action(interaction, preview, confirm_label="Apply"):
+            return
+        
+        changeset = Changeset(interaction.guild.id, "salary_cap", interaction.user.id)
+        if not await self._apply(interaction, plan, changeset):
+            return
+        capped = sum(1 for old, new in plan.values.values() if old > cap)
+        released = len(plan.releases)
+        processed = capped + released
         
         embed = discord.Embed(
             title="🧢 Salary Cap Applied",
@@ -254,14 +365,17 @@ class ExtraCommands(commands.Cog):
             embed.add_field(name="📉 Players Capped", value=str(capped), inline=True)
         else:
             embed.add_field(name="🆓 Players Released", value=str(released), inline=True)
+        if processed:
+            embed.add_field(name="↩️ Undo", value=f"`/undo {changeset.id}`", inline=True)
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.edit_original_response(embed=embed, view=None)
     
     @app_commands.command(name="market_crash", description="Simulate a market crash with random value decreases")
     @app_commands.describe(
         min_decrease="Minimum decrease percentage (5-50)",
         max_decrease="Maximum decrease percentage (10-80)"
     )
+    @deferred()
     async def market_crash(self, interaction: discord.Interaction, min_decrease: float = 10.0, max_decrease: float = 40.0):
         """Simulate market crash"""
         if not check_admin(interaction):
@@ -272,26 +386,30 @@ class ExtraCommands(commands.Cog):
             await interaction.response.send_message("❌ Invalid decrease range! Min: 5-50%, Max: 10-80%", ephemeral=True)
             return
         
-        players = self.db.get_players()
-        guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
+        version = self.db.get_data_version(interaction.guild.id)
+        league_players = await run_blocking(guild_players, self.db, interaction.guild.id)
         
-        if not guild_players:
+        if not league_players:
             await interaction.response.send_message("❌ No players found!", ephemeral=True)
             return
         
-        total_old_value = 0
-        total_new_value = 0
-        updated_count = 0
+        plan = ChangePlan(interaction.guild.id, "market_crash", version)
+        await self._plan(interaction, plan, "💥 Crashing the market...", league_players, 'value',
+                         lambda old: round(old * (1 - random.uniform(min_decrease, max_decrease) / 100), 2))
         
-        for player_id, player_data in guild_players.items():
-            old_value = player_data['value']
-            decrease_percent = random.uniform(min_decrease, max_decrease)
-            new_value = round(old_value * (1 - decrease_percent / 100), 2)
-            
-            if self.db.update_player_value(player_id, new_value):
-                total_old_value += old_value
-                total_new_value += new_value
-                updated_count += 1
+        preview = self._preview(plan, "⚠️ Confirm Market Crash",
+                                f"Decrease the value of **{len(league_players)}** player(s) by {min_decrease:.0f}-{max_decrease:.0f}%?")
+        if not await confirm_action(interaction, preview, confirm_label="Apply"):
+            return
+        
+        snapshot = f"before-crash-{datetime.now():%Y%m%d-%H%M}"
+        changeset = Changeset(interaction.guild.id, "market_crash", interaction.user.id)
+        if not await self._apply(interaction, plan, changeset, snapshot):
+            return
+        changes = plan.values
+        updated_count = len(changes)
+        total_old_value = sum(old for old, new in changes.values())
+        total_new_value = sum(new for old, new in changes.values())
         
         total_loss = total_old_value - total_new_value
         avg_decrease = ((total_old_value - total_new_value) / total_old_value) * 100
@@ -310,15 +428,19 @@ class ExtraCommands(commands.Cog):
         embed.add_field(name="📊 After Crash", value=f"€{total_new_value:,.2f}", inline=True)
         embed.add_field(name="📈 Recovery Needed", value=f"{((total_old_value / total_new_value - 1) * 100):.1f}%", inline=True)
         
+        embed.add_field(name="🕰️ Snapshot", value=f"`{snapshot}` (use as `as_of` to see the league before the crash)", inline=False)
+        embed.add_field(name="↩️ Undo", value=f"`/undo {changeset.id}`", inline=False)
+        
         embed.set_footer(text="💡 Use /market_boom to simulate a recovery!")
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.edit_original_response(embed=embed, view=None)
     
     @app_commands.command(name="market_boom", description="Simulate a market boom with value increases")
     @app_commands.describe(
         min_increase="Minimum increase percentage (5-100)",
         max_increase="Maximum increase percentage (20-200)"
     )
+    @deferred()
     async def market_boom(self, interaction: discord.Interaction, min_increase: float = 15.0, max_increase: float = 60.0):
         """Simulate market boom"""
         if not check_admin(interaction):
@@ -329,26 +451,30 @@ class ExtraCommands(commands.Cog):
             await interaction.response.send_message("❌ Invalid increase range! Min: 5-100%, Max: 20-200%", ephemeral=True)
             return
         
-        players = self.db.get_players()
-        guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
+        version = self.db.get_data_version(interaction.guild.id)
+        league_players = await run_blocking(guild_players, self.db, interaction.guild.id)
         
-        if not guild_players:
+        if not league_players:
             await interaction.response.send_message("❌ No players found!", ephemeral=True)
             return
         
-        total_old_value = 0
-        total_new_value = 0
-        updated_count = 0
+        plan = ChangePlan(interaction.guild.id, "market_boom", version)
+        await self._plan(interaction, plan, "🚀 Booming the market...", league_players, 'value',
+                         lambda old: round(old * (1 + random.uniform(min_increase, max_increase) / 100), 2))
         
-        for player_id, player_data in guild_players.items():
-            old_value = player_data['value']
-            increase_percent = random.uniform(min_increase, max_increase)
-            new_value = round(old_value * (1 + increase_percent / 100), 2)
-            
-            if self.db.update_player_value(player_id, new_value):
-                total_old_value += old_value
-                total_new_value += new_value
-                updated_count += 1
+        preview = self._preview(plan, "⚠️ Confirm Market Boom",
+                                f"Increase the value of **{len(league_players)}** player(s) by {min_increase:.0f}-{max_increase:.0f}%?")
+        if not await confirm_action(interaction, preview, confirm_label="Apply"):
+            return
+        
+        snapshot = f"before-boom-{datetime.now():%Y%m%d-%H%M}"
+        changeset = Changeset(interaction.guild.id, "market_boom", interaction.user.id)
+        if not await self._apply(interaction, plan, changeset, snapshot):
+            return
+        changes = plan.values
+        updated_count = len(changes)
+        total_old_value = sum(old for old, new in changes.values())
+        total_new_value = sum(new for old, new in changes.values())
         
         total_gain = total_new_value - total_old_value
         avg_increase = ((total_new_value - total_old_value) / total_old_value) * 100
@@ -366,11 +492,14 @@ class ExtraCommands(commands.Cog):
         embed.add_field(name="📊 Before Boom", value=f"€{total_old_value:,.2f}", inline=True)
         embed.add_field(name="📊 After Boom", value=f"€{total_new_value:,.2f}", inline=True)
         embed.add_field(name="🎯 Growth Rate", value=f"{((total_new_value / total_old_value - 1) * 100):.1f}%", inline=True)
+        embed.add_field(name="🕰️ Snapshot", value=f"`{snapshot}` (use as `as_of` to see the league before the boom)", inline=False)
+        embed.add_field(name="↩️ Undo", value=f"`/undo {changeset.id}`", inline=False)
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.edit_original_response(embed=embed, view=None)
     
     @app_commands.command(name="inflation_adjustment", description="Apply inflation to all values and budgets")
     @app_commands.describe(rate="Inflation rate percentage (1-20)")
+    @deferred()
     async def inflation_adjustment(self, interaction: discord.Interaction, rate: float):
         """Apply inflation adjustment"""
         if not check_admin(interaction):
@@ -381,30 +510,32 @@ class ExtraCommands(commands.Cog):
             await interaction.response.send_message("❌ Inflation rate must be between 1% and 20%!", ephemeral=True)
             return
         
+        version = self.db.get_data_version(interaction.guild.id)
+        
         # Update player values
-        players = self.db.get_players()
-        guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
+        league_players = await run_blocking(guild_players, self.db, interaction.guild.id)
         
         # Update club budgets
-        clubs = self.db.get_clubs()
-        guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
+        league_clubs = await run_blocking(guild_clubs, self.db, interaction.guild.id)
         
         multiplier = 1 + (rate / 100)
         
-        player_updates = 0
-        club_updates = 0
+        plan = ChangePlan(interaction.guild.id, "inflation_adjustment", version, reason="inflation")
+        await self._plan(interaction, plan, "📊 Adjusting player values...", league_players, 'value',
+                         lambda old: round(old * multiplier, 2))
+        await self._plan(interaction, plan, "📊 Adjusting club budgets...", league_clubs, 'budget',
+                         lambda old: round(old * multiplier, 2))
         
-        # Update players
-        for player_id, player_data in guild_players.items():
-            new_value = round(player_data['value'] * multiplier, 2)
-            if self.db.update_player_value(player_id, new_value):
-                player_updates += 1
+        preview = self._preview(plan, "⚠️ Confirm Inflation Adjustment",
+                                f"Increase **{len(league_players)}** player value(s) and **{len(league_clubs)}** club budget(s) by {rate}%?")
+        if not await confirm_action(interaction, preview, confirm_label="Apply"):
+            return
         
-        # Update clubs
-        for club_id, club_data in guild_clubs.items():
-            new_budget = round(club_data['budget'] * multiplier, 2)
-            if self.db.update_club_budget(club_id, new_budget):
-                club_updates += 1
+        changeset = Changeset(interaction.guild.id, "inflation_adjustment", interaction.user.id)
+        if not await self._apply(interaction, plan, changeset):
+            return
+        player_updates = len(plan.values)
+        club_updates = len(plan.budgets)
         
         embed = discord.Embed(
             title="📊 Inflation Adjustment Applied",
@@ -415,10 +546,11 @@ class ExtraCommands(commands.Cog):
         embed.add_field(name="👥 Players Updated", value=str(player_updates), inline=True)
         embed.add_field(name="🏟️ Clubs Updated", value=str(club_updates), inline=True)
         embed.add_field(name="📈 Rate Applied", value=f"{rate}%", inline=True)
+        embed.add_field(name="↩️ Undo", value=f"`/undo {changeset.id}`", inline=True)
         
         embed.set_footer(text="All player values and club budgets have been adjusted for inflation.")
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.edit_original_response(embed=embed, view=None)
 
 async def setup(bot):
     await bot.add_cog(ExtraCommands(bot))
\ No newline at end of file
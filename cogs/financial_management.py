@@ -7,10 +7,30 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import logging
+from datetime import datetime, timedelta
 from utils.permissions import check_admin
+from utils.deferred import deferred, run_blocking
+from utils.league import league_as_of
+from utils.ledger import league_account
 
 logger = logging.getLogger(__name__)
 
+LEDGER_PAGE_SIZE = 10
+
+# Display names of ledger entry kinds
+LEDGER_KINDS = {
+    "opening": "🏁 Opening balance",
+    "adjustment": "⚙️ Adjustment",
+    "set_budget": "💰 Budget set",
+    "add_budget": "➕ Budget added",
+    "deduct_budget": "➖ Budget deducted",
+    "budget_multiplier": "✖️ Budget multiplier",
+    "inflation": "📊 Inflation",
+    "transfer": "🔄 Transfer",
+    "closure": "🚪 Club removed",
+    "undo": "↩️ Undo",
+}
+
 class FinancialManagement(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -36,7 +56,7 @@ class FinancialManagement(commands.Cog):
         
         old_budget = club_data['budget']
         
-        if self.db.update_club_budget(club_id, budget):
+        if self.db.update_club_budget(club_id, budget, reason="set_budget"):
             embed = discord.Embed(
                 title="💰 Budget Updated",
                 color=discord.Color.green(),
@@ -75,7 +95,7 @@ class FinancialManagement(commands.Cog):
         
         new_budget = club_data['budget'] + amount
         
-        if self.db.update_club_budget(club_id, new_budget):
+        if self.db.update_club_budget(club_id, new_budget, reason="add_budget"):
             embed = discord.Embed(
                 title="💰 Budget Increased",
                 color=discord.Color.green(),
@@ -118,7 +138,7 @@ class FinancialManagement(commands.Cog):
             )
             return
         
-        if self.db.update_club_budget(club_id, new_budget):
+        if self.db.update_club_budget(club_id, new_budget, reason="deduct_budget"):
             embed = discord.Embed(
                 title="💸 Budget Decreased",
                 color=discord.Color.red(),
@@ -135,18 +155,31 @@ class FinancialManagement(commands.Cog):
             await interaction.response.send_message("❌ Failed to deduct budget. Please try again.", ephemeral=True)
     
     @app_commands.command(name="financial_report", description="Generate financial report for all clubs")
-    async def financial_report(self, interaction: discord.Interaction):
+    @app_commands.describe(as_of="Snapshot name or date (YYYY-MM-DD) to report on the league as it was")
+    @deferred()
+    async def financial_report(self, interaction: discord.Interaction, as_of: str = None):
         """Generate comprehensive financial report"""
-        clubs = self.db.get_clubs()
-        guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
+        period = None
+        if as_of:
+            try:
+                guild_clubs, players, when, period = await run_blocking(league_as_of, self.db, interaction.guild.id, as_of)
+            except ValueError as e:
+                await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+                return
+        else:
+            clubs = await run_blocking(self.db.get_clubs)
+            guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
         
         if not guild_clubs:
             await interaction.response.send_message("📋 No clubs found for financial report.", ephemeral=True)
             return
         
-        players = self.db.get_players()
-        transfers = self.db.get_transfers()
+        if not as_of:
+            players = await run_blocking(self.db.get_players)
+        transfers = await run_blocking(self.db.get_transfers)
         guild_transfers = [t for t in transfers if t['player_id'].startswith(str(interaction.guild.id))]
+        if as_of:
+            guild_transfers = [t for t in guild_transfers if datetime.fromisoformat(t['date']) <= when]
         
         embed = discord.Embed(
             title="📊 Financial Report",
@@ -193,6 +226,9 @@ class FinancialManagement(commands.Cog):
         
         embed.add_field(name="💎 Top 5 Clubs by Total Value", value=value_rankings, inline=False)
         
+        if period:
+            embed.set_footer(text=f"🕰️ {period}")
+        
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="club_finances", description="View detailed finances for a specific club")
@@ -209,9 +245,6 @@ class FinancialManagement(commands.Cog):
         players = self.db.get_players()
         club_players = [players[pid] for pid in club_data.get('players', []) if pid in players]
         
-        transfers = self.db.get_transfers()
-        club_transfers = [t for t in transfers if t['from_club'] == club_id or t['to_club'] == club_id]
-        
         embed = discord.Embed(
             title=f"💰 {club_data['name']} - Financial Details",
             color=discord.Color.blue()
@@ -225,12 +258,10 @@ class FinancialManagement(commands.Cog):
         embed.add_field(name="👥 Squad Value", value=f"€{squad_value:,.2f}", inline=True)
         embed.add_field(name="💎 Total Club Value", value=f"€{total_value:,.2f}", inline=True)
         
-        # Transfer activity
-        transfers_in = [t for t in club_transfers if t['to_club'] == club_id]
-        transfers_out = [t for t in club_transfers if t['from_club'] == club_id]
-        
-        money_spent = sum(t['amount'] for t in transfers_in)
-        money_received = sum(t['amount'] for t in transfers_out)
+        # Transfer activity, from the club's ledger totals
+        transfer_totals = self.db.get_ledger_totals(club_id).get('transfer', {})
+        money_spent = transfer_totals.get('debited', 0.0)
+        money_received = transfer_totals.get('credited', 0.0)
         net_spending = money_spent - money_received
         
         embed.add_field(name="📥 Money Spent", value=f"€{money_spent:,.2f}", inline=True)
@@ -248,5 +279,71 @@ class FinancialManagement(commands.Cog):
         embed.set_thumbnail(url="https://cdn-icons-png.flaticon.com/512/2936/2936525.png")
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="ledger", description="Show every change to a club's budget")
+    @app_commands.describe(
+        club="Name of the club",
+        page="Page number (10 entries per page, newest first)",
+        date="Also show the budget at the end of this date (YYYY-MM-DD)"
+    )
+    @deferred()
+    async def ledger(self, interaction: discord.Interaction, club: str, page: int = 1, date: str = None):
+        """Show a club's budget ledger"""
+        club_id = f"{interaction.guild.id}_{club.lower().replace(' ', '_')}"
+        clubs = await run_blocking(self.db.get_clubs)
+        club_data = clubs.get(club_id)
+        
+        if not club_data:
+            await interaction.response.send_message(f"❌ Club '{club}' not found!", ephemeral=True)
+            return
+        
+        as_of = None
+        if date:
+            try:
+                as_of = datetime.strptime(date, "%Y-%m-%d")
+            except ValueError:
+                await interaction.response.send_message("❌ Invalid date! Use the format YYYY-MM-DD.", ephemeral=True)
+                return
+        
+        total, _ = await run_blocking(self.db.get_ledger, club_id, 0, 0)
+        pages = max(1, -(-total // LEDGER_PAGE_SIZE))
+        if page < 1 or page > pages:
+            await interaction.response.send_message(f"❌ Page must be between 1 and {pages}!", ephemeral=True)
+            return
+        _, entries = await run_blocking(self.db.get_ledger, club_id, (page - 1) * LEDGER_PAGE_SIZE, LEDGER_PAGE_SIZE)
+        players = await run_blocking(self.db.get_players)
+        
+        embed = discord.Embed(
+            title=f"📒 {club_data['name']} - Budget Ledger",
+            color=discord.Color.blue(),
+            description=f"Current budget: **€{club_data['budget']:,.2f}**"
+        )
+        if as_of:
+            balance = await run_blocking(self.db.get_balance_at, club_id, as_of + timedelta(days=1))
+            embed.add_field(name=f"📅 Budget on {as_of.strftime('%Y-%m-%d')}", value=f"€{balance:,.2f}", inline=False)
+        
+        for entry in entries:
+            sign = "+" if entry['change'] >= 0 else "-"
+            details = [f"{sign}€{abs(entry['change']):,.2f} → €{entry['balance']:,.2f}"]
+            if entry['kind'] == 'transfer':
+                player = players.get(entry['memo'])
+                counterparties = [clubs[account]['name'] if account in clubs
+                                  else "Free agency" if account == league_account(interaction.guild.id)
+                                  else "Removed club" for account in entry['counterparties']]
+                details.append(f"⚽ {player['name'] if player else 'Former player'}")
+                details.append(f"⇄ {', '.join(counterparties)}")
+            elif entry['memo']:
+                details.append(entry['memo'])
+            embed.add_field(
+                name=f"{LEDGER_KINDS.get(entry['kind'], entry['kind'])} · {entry['date'].strftime('%Y-%m-%d %H:%M')}",
+                value="\n".join(details),
+                inline=False
+            )
+        
+        if not entries:
+            embed.add_field(name="📋 No entries", value="No budget changes recorded yet", inline=False)
+        embed.set_footer(text=f"Page {page} of {pages} · {total} entries")
+        
+        await interaction.response.send_message(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(FinancialManagement(bot))
@@ -6,15 +6,24 @@ Handles all player-related slash commands
 import discord
 from discord.ext import commands
 from discord import app_commands
+import io
 import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from utils.permissions import check_admin
+from utils.deferred import deferred, run_blocking
+from utils.charts import line_chart
 
 logger = logging.getLogger(__name__)
 
+# Rendered value charts kept in memory, keyed by the player's series version
+CHART_CACHE_SIZE = 64
+
 class PlayerManagement(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.chart_cache: OrderedDict = OrderedDict()
     
     @app_commands.command(name="add_player", description="Add a new player")
     @app_commands.describe(
@@ -210,9 +219,79 @@ class PlayerManagement(commands.Cog):
                 inline=False
             )
         
+        # Season totals from recorded box scores
+        season = self.db.get_player_season_stats(player_id)
+        if season:
+            embed.add_field(
+                name="📊 Season Stats",
+                value=f"👕 {season['appearances']} apps · ⏱️ {season['minutes']}'\n"
+                      f"⚽ {season['goals']} goals · 🅰️ {season['assists']} assists\n"
+                      f"🧤 {season['clean_sheets']} clean sheets · 🟨 {season['yellow_cards']} · 🟥 {season['red_cards']}",
+                inline=False
+            )
+        
         embed.set_thumbnail(url="https://cdn-icons-png.flaticon.com/512/3135/3135715.png")
         await interaction.response.send_message(embed=embed)
     
+    @app_commands.command(name="value_history", description="Chart a player's market value over time")
+    @app_commands.describe(
+        name="Name of the player",
+        days="Days of history to show (default: 365, 0 for all)"
+    )
+    @deferred()
+    async def value_history(self, interaction: discord.Interaction, name: str, days: int = 365):
+        """Show a chart of a player's recorded values"""
+        player_id = f"{interaction.guild.id}_{name.lower().replace(' ', '_')}"
+        player = await run_blocking(self.db.get_player, player_id)
+        
+        if not player:
+            await interaction.response.send_message(f"❌ Player '{name}' not found!", ephemeral=True)
+            return
+        
+        if days < 0:
+            await interaction.response.send_message("❌ Days cannot be negative!", ephemeral=True)
+            return
+        
+        version, history = await run_blocking(self.db.get_value_history, player_id)
+        now = datetime.now()
+        points = history + [(now, player['value'])]
+        if days:
+            # Start the window with the value that was current when it opened
+            cutoff = now - timedelta(days=days)
+            before = [(cutoff, value) for moment, value in points if moment < cutoff][-1:]
+            points = before + [(moment, value) for moment, value in points if moment >= cutoff]
+        
+        key = (player_id, version, days, now.date())
+        chart = self.chart_cache.get(key)
+        if chart is None:
+            chart = await run_blocking(line_chart, [(moment.timestamp(), value) for moment, value in points])
+            self.chart_cache[key] = chart
+            if len(self.chart_cache) > CHART_CACHE_SIZE:
+                self.chart_cache.popitem(last=False)
+        else:
+            self.chart_cache.move_to_end(key)
+        
+        values = [value for _, value in points]
+        start_value = values[0]
+        change = (player['value'] - start_value) / start_value * 100 if start_value else 0.0
+        
+        embed = discord.Embed(
+            title=f"📈 {player['name']} - Value History",
+            color=discord.Color.blue(),
+            description=f"Last {days} days" if days else "All recorded history"
+        )
+        embed.add_field(name="💎 Current", value=f"€{player['value']:,.2f}", inline=True)
+        embed.add_field(name="🏁 Start", value=f"€{start_value:,.2f}", inline=True)
+        embed.add_field(name="📊 Change", value=f"{change:+.1f}%", inline=True)
+        embed.add_field(name="⬆️ High", value=f"€{max(values):,.2f}", inline=True)
+        embed.add_field(name="⬇️ Low", value=f"€{min(values):,.2f}", inline=True)
+        embed.add_field(name="🔢 Changes", value=str(max(len(history) - 1, 0)), inline=True)
+        if not history:
+            embed.set_footer(text="No value changes recorded for this player yet")
+        embed.set_image(url="attachment://value_history.png")
+        
+        await interaction.response.send_message(embed=embed, file=discord.File(io.BytesIO(chart), filename="value_history.png"))
+    
     @app_commands.command(name="free_agents", description="List all free agents (players without clubs)")
     async def free_agents(self, interaction: discord.Interaction):
         """List all free agents"""
@@ -0,0 +1,224 @@
+"""
+Scheduled Jobs Cog
+Recurring league operations (inflation, backups, contract reports) run on a cron schedule
+"""
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+import glob
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from utils.permissions import check_admin
+from utils.database import guild_of
+from utils.deferred import run_blocking
+from utils.scheduler import CronSchedule, JobScheduler
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = {
+    "inflation": "Raise every player value and club budget by a percentage",
+    "backup": "Write a data backup file",
+    "contract_report": "Post contracts that expire soon",
+}
+MAX_JOBS_PER_GUILD = 10
+# Jobs rewrite or scan a whole guild, so they may not run more often than this
+MIN_JOB_INTERVAL = timedelta(hours=1)
+# Scheduled backups older than the newest few of a guild are deleted; the prefix keeps
+# them apart from /backup_data files, which are never pruned
+SCHEDULED_BACKUP_PREFIX = "scheduled_backup"
+SCHEDULED_BACKUPS_KEPT = 7
+
+class ScheduledJobs(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = bot.db
+        # Handlers post to channels, so no job runs before the gateway is ready
+        self.scheduler = JobScheduler(self.db, ready=bot.wait_until_ready)
+        self.scheduler.register("inflation", self._run_inflation)
+        self.scheduler.register("backup", self._run_backup)
+        self.scheduler.register("contract_report", self._run_contract_report)
+    
+    async def cog_load(self):
+        await self.scheduler.start()
+    
+    async def cog_unload(self):
+        await self.scheduler.stop()
+    
+    def _cog(self, name: str) -> commands.Cog:
+        cog = self.bot.get_cog(name)
+        if cog is None:
+            raise RuntimeError(f"{name} is not loaded")
+        return cog
+    
+    async def _post(self, job: Dict, embed: discord.Embed):
+        """Post a job's result to its channel, if it has one"""
+        channel_id = job['params'].get('channel_id')
+        channel = self.bot.get_channel(channel_id) if channel_id else None
+        if channel is None:
+            return
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            logger.warning(f"Could not post result of job {job['id']}: {e}")
+    
+    async def _run_inflation(self, job: Dict) -> str:
+        rate = job['params']['rate']
+        player_updates, club_updates = await run_blocking(
+            self._cog('ExtraCommands').apply_inflation, guild_of(job['id']), rate)
+        
+        embed = discord.Embed(
+            title="📊 Scheduled Inflation Applied",
+            color=discord.Color.blue(),
+            description=f"Applied {rate}% inflation to all values and budgets"
+        )
+        embed.add_field(name="👥 Players Updated", value=str(player_updates), inline=True)
+        embed.add_field(name="🏟️ Clubs Updated", value=str(club_updates), inline=True)
+        await self._post(job, embed)
+        return f"{player_updates} players and {club_updates} clubs raised by {rate}%"
+    
+    def _prune_backups(self, guild_id: str) -> int:
+        """Delete a guild's oldest scheduled backups beyond SCHEDULED_BACKUPS_KEPT; runs on a worker thread"""
+        # Timestamps in the file names sort chronologically
+        backups = sorted(glob.glob(os.path.join("backups", f"{SCHEDULED_BACKUP_PREFIX}_{guild_id}_*.json")))
+        stale = backups[:-SCHEDULED_BACKUPS_KEPT]
+        for path in stale:
+            os.remove(path)
+        return len(stale)
+    
+    async def _run_backup(self, job: Dict) -> str:
+        guild_id = guild_of(job['id'])
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_file = await run_blocking(self._cog('AdminTools').write_backup, guild_id, timestamp, SCHEDULED_BACKUP_PREFIX)
+        pruned = await run_blocking(self._prune_backups, guild_id)
+        
+        embed = discord.Embed(
+            title="💾 Scheduled Backup Created",
+            color=discord.Color.blue(),
+            description=f"Backup written to `{backup_file}`"
+        )
+        if pruned:
+            embed.set_footer(text=f"Removed {pruned} old scheduled backup(s)")
+        await self._post(job, embed)
+        return f"wrote {backup_file}, removed {pruned} old scheduled backup(s)"
+    
+    async def _run_contract_report(self, job: Dict) -> str:
+        months = job['params'].get('months', 1)
+        embed, expiring = await self._cog('EnhancedPlayerManagement').expiring_contracts_embed(guild_of(job['id']), months)
+        if embed is None:
+            return f"no contracts expiring within {months} months"
+        await self._post(job, embed)
+        return f"{expiring} expiring contract(s) reported"
+    
+    @app_commands.command(name="schedule_job", description="Run a league operation on a recurring schedule")
+    @app_commands.describe(
+        kind="Job kind: inflation, backup or contract_report",
+        schedule="Cron schedule 'minute hour day month weekday' or @daily/@weekly/@monthly (server time)",
+        rate="Inflation rate percentage (1-20), for inflation jobs",
+        months="Report contracts expiring within X months (default: 1), for contract_report jobs",
+        channel="Channel to post each run's result in (optional)"
+    )
+    async def schedule_job(self, interaction: discord.Interaction, kind: str, schedule: str,
+                           rate: Optional[float] = None, months: int = 1,
+                           channel: Optional[discord.TextChannel] = None):
+        """Schedule a recurring job"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        kind = kind.lower()
+        if kind not in JOB_KINDS:
+            await interaction.response.send_message(f"❌ Invalid job kind! Valid kinds: {', '.join(JOB_KINDS)}", ephemeral=True)
+            return
+        
+        try:
+            cron = CronSchedule(schedule)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ Invalid schedule: {e}", ephemeral=True)
+            return
+        
+        if cron.shortest_interval() < MIN_JOB_INTERVAL:
+            await interaction.response.send_message("❌ Jobs can run at most once per hour!", ephemeral=True)
+            return
+        
+        params = {'channel_id': channel.id if channel else None}
+        if kind == "inflation":
+            if rate is None or rate < 1 or rate > 20:
+                await interaction.response.send_message("❌ Inflation jobs need a rate between 1% and 20%!", ephemeral=True)
+                return
+            params['rate'] = rate
+        elif kind == "contract_report":
+            if months < 1 or months > 24:
+                await interaction.response.send_message("❌ Months must be between 1 and 24!", ephemeral=True)
+                return
+            params['months'] = months
+        
+        if len(self.scheduler.guild_jobs(interaction.guild.id)) >= MAX_JOBS_PER_GUILD:
+            await interaction.response.send_message(f"❌ A server can have at most {MAX_JOBS_PER_GUILD} scheduled jobs!", ephemeral=True)
+            return
+        
+        job = self.scheduler.add_job(interaction.guild.id, kind, cron, params, interaction.user.id)
+        if job is None:
+            await interaction.response.send_message("❌ Failed to save the job.", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="⏰ Job Scheduled",
+            color=discord.Color.green(),
+            description=JOB_KINDS[kind]
+        )
+        embed.add_field(name="🆔 Job ID", value=f"`{job['id'].split('_', 1)[1]}`", inline=True)
+        embed.add_field(name="📅 Schedule", value=f"`{cron.expression}`", inline=True)
+        embed.add_field(name="⏭️ Next Run", value=datetime.fromisoformat(job['next_run']).strftime('%Y-%m-%d %H:%M'), inline=True)
+        if channel:
+            embed.add_field(name="📢 Channel", value=channel.mention, inline=True)
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="list_jobs", description="List this server's scheduled jobs")
+    async def list_jobs(self, interaction: discord.Interaction):
+        """List scheduled jobs"""
+        jobs = self.scheduler.guild_jobs(interaction.guild.id)
+        if not jobs:
+            await interaction.response.send_message("📋 No scheduled jobs. Use `/schedule_job` to add one.", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="⏰ Scheduled Jobs",
+            color=discord.Color.blue(),
+            description=f"{len(jobs)} job(s), next due first"
+        )
+        for job in jobs:
+            details = [f"📅 `{job['schedule']}`",
+                       f"⏭️ {datetime.fromisoformat(job['next_run']).strftime('%Y-%m-%d %H:%M')}"]
+            if job['params'].get('rate'):
+                details.append(f"📈 {job['params']['rate']}%")
+            if job['last_run']:
+                details.append(f"🕑 Last: {datetime.fromisoformat(job['last_run']).strftime('%Y-%m-%d %H:%M')} - {str(job['last_result'])[:100]}")
+            embed.add_field(name=f"{job['kind']} (`{job['id'].split('_', 1)[1]}`)", value="\n".join(details), inline=False)
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="remove_job", description="Remove a scheduled job")
+    @app_commands.describe(job_id="Job ID shown by /list_jobs")
+    async def remove_job(self, interaction: discord.Interaction, job_id: str):
+        """Remove a scheduled job"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        if not self.scheduler.remove_job(f"{interaction.guild.id}_{job_id.strip()}"):
+            await interaction.response.send_message(f"❌ Job '{job_id}' not found!", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="🗑️ Job Removed",
+            color=discord.Color.orange(),
+            description=f"Scheduled job `{job_id}` will no longer run"
+        )
+        await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(ScheduledJobs(bot))
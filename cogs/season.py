@@ -0,0 +1,570 @@
+"""
+Season Cog
+Round-robin fixtures, match results, standings and Monte Carlo projections of the final table
+"""
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List
+from utils.permissions import check_admin
+from utils.deferred import deferred, run_blocking
+from utils.league import guild_clubs, guild_players
+from utils.results import parse_match
+from utils.player_stats import STAT_COLUMNS
+from utils.season import SeasonSimulator, round_robin
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIMULATIONS = 10_000
+MAX_SIMULATIONS = 50_000
+# Projections kept per (guild, data version, simulations)
+PROJECTION_CACHE_SIZE = 32
+# Room left in the embed description for the "and N more" line
+DESCRIPTION_LIMIT = 4000
+RESULTS_PAGE_SIZE = 10
+MAX_RESULTS_FILE_BYTES = 1024 * 1024
+FORM_EMOJI = {'W': '🟩', 'D': '⬜', 'L': '🟥'}
+# Box score bounds and the minutes a player needs for a clean sheet
+MAX_MINUTES = 130
+MAX_PLAYER_GOALS = 20
+CLEAN_SHEET_MINUTES = 60
+MAX_LEADERS_SHOWN = 25
+
+class Season(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = bot.db
+        self.simulator = SeasonSimulator()
+        self.projection_cache: OrderedDict = OrderedDict()
+    
+    async def cog_unload(self):
+        self.simulator.close()
+    
+    @app_commands.command(name="fixtures", description="Show the round-robin fixtures of a matchday")
+    @app_commands.describe(matchday="Matchday to show (default: 1)")
+    @deferred()
+    async def fixtures(self, interaction: discord.Interaction, matchday: int = 1):
+        """Show one matchday of the double round-robin schedule"""
+        clubs = await run_blocking(guild_clubs, self.db, interaction.guild.id)
+        schedule = round_robin(list(clubs))
+        
+        if not schedule:
+            await interaction.response.send_message("❌ At least 2 clubs are needed for a season!", ephemeral=True)
+            return
+        
+        if not 1 <= matchday <= len(schedule):
+            await interaction.response.send_message(f"❌ Matchday must be between 1 and {len(schedule)}!", ephemeral=True)
+            return
+        
+        lines = [f"🏠 **{clubs[home]['name']}** vs **{clubs[away]['name']}** ✈️" for home, away in schedule[matchday - 1]]
+        resting = set(clubs) - {club_id for match in schedule[matchday - 1] for club_id in match}
+        
+        embed = discord.Embed(
+            title=f"📅 Matchday {matchday} of {len(schedule)}",
+            description="\n".join(lines),
+            color=discord.Color.blue()
+        )
+        if resting:
+            embed.add_field(name="💤 Not Playing", value=", ".join(clubs[club_id]['name'] for club_id in resting), inline=False)
+        embed.set_footer(text=f"{len(clubs)} clubs play each other home and away")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="season_projection", description="Simulate the season and show title, top and relegation chances")
+    @app_commands.describe(simulations=f"Number of seasons to simulate (default: {DEFAULT_SIMULATIONS:,})")
+    @deferred()
+    async def season_projection(self, interaction: discord.Interaction, simulations: int = DEFAULT_SIMULATIONS):
+        """Project the final table by simulating the season many times"""
+        if not 100 <= simulations <= MAX_SIMULATIONS:
+            await interaction.response.send_message(f"❌ Simulations must be between 100 and {MAX_SIMULATIONS:,}!", ephemeral=True)
+            return
+        
+        version = self.db.get_data_version(interaction.guild.id)
+        clubs = await run_blocking(guild_clubs, self.db, interaction.guild.id)
+        if len(clubs) < 2:
+            await interaction.response.send_message("❌ At least 2 clubs are needed for a season!", ephemeral=True)
+            return
+        
+        key = (interaction.guild.id, version, simulations)
+        projection = self.projection_cache.get(key)
+        if projection is None:
+            players = await run_blocking(guild_players, self.db, interaction.guild.id)
+            standings = await run_blocking(self.db.get_standings, interaction.guild.id)
+            played = await run_blocking(self.db.get_played_fixtures, interaction.guild.id)
+            projection = await self.simulator.project(clubs, players, simulations, standings, played)
+            self.projection_cache[key] = projection
+            if len(self.projection_cache) > PROJECTION_CACHE_SIZE:
+                self.projection_cache.popitem(last=False)
+        else:
+            self.projection_cache.move_to_end(key)
+        
+        top = projection['top_places']
+        relegated = projection['relegation_places']
+        ranked = sorted(projection['clubs'].items(), key=lambda item: item[1]['expected_points'], reverse=True)
+        lines = []
+        for i, (club_id, result) in enumerate(ranked, 1):
+            line = f"**{i}. {clubs[club_id]['name']}** · {result['expected_points']:.1f} pts · 🏆 {result['title']:.1%}"
+            if top:
+                line += f" · 🔝 {result['top']:.1%}"
+            if relegated:
+                line += f" · ⬇️ {result['relegation']:.1%}"
+            if sum(len(existing) + 1 for existing in lines) + len(line) > DESCRIPTION_LIMIT:
+                lines.append(f"... and {len(ranked) - i + 1} more")
+                break
+            lines.append(line)
+        
+        embed = discord.Embed(
+            title="🔮 Season Projection",
+            description="\n".join(lines),
+            color=discord.Color.purple()
+        )
+        legend = "🏆 title"
+        if top:
+            legend += f" · 🔝 top {top}"
+        if relegated:
+            legend += f" · ⬇️ bottom {relegated}"
+        embed.add_field(name="📖 Chances", value=legend, inline=False)
+        total = sum(len(matchday) for matchday in projection['fixtures'])
+        embed.set_footer(text=f"{projection['seasons']:,} simulations of the {projection['remaining']} of {total} fixtures left · "
+                              f"strength from squad value and position balance · {projection['seconds']:.1f}s")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @staticmethod
+    def _score_line(match: Dict) -> str:
+        return f"{match['home_name']} **{match['home_goals']} - {match['away_goals']}** {match['away_name']}"
+    
+    @staticmethod
+    def _scorer_text(match: Dict) -> str:
+        """Scorers as 'Name (2), Name' per side"""
+        sides = []
+        for club_id in (match['home'], match['away']):
+            counts: Dict[str, int] = {}
+            for scorer in match['scorers']:
+                if scorer['club'] == club_id:
+                    counts[scorer['name']] = counts.get(scorer['name'], 0) + 1
+            if counts:
+                sides.append(", ".join(name if count == 1 else f"{name} ({count})" for name, count in counts.items()))
+        return " | ".join(sides)
+    
+    @app_commands.command(name="record_result", description="Record a match result in the standings")
+    @app_commands.describe(
+        home="Home club",
+        away="Away club",
+        home_score="Goals scored by the home club",
+        away_score="Goals scored by the away club",
+        scorers="Goal scorers, comma-separated, once per goal",
+        date="Date played (YYYY-MM-DD, default: today)",
+        matchday="Matchday number"
+    )
+    @deferred()
+    async def record_result(self, interaction: discord.Interaction, home: str, away: str, home_score: int,
+                            away_score: int, scorers: str = None, date: str = None, matchday: int = None):
+        """Record one result"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        clubs = await run_blocking(self.db.get_clubs)
+        players = await run_blocking(self.db.get_players)
+        try:
+            match = parse_match(interaction.guild.id, clubs, players, home, away,
+                                home_score, away_score, scorers.split(',') if scorers else None, date, matchday)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+        
+        try:
+            match = (await run_blocking(self.db.record_results, interaction.guild.id, [match]))[0]
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="✅ Result Recorded",
+            description=self._score_line(match),
+            color=discord.Color.green()
+        )
+        scorer_text = self._scorer_text(match)
+        if scorer_text:
+            embed.add_field(name="⚽ Scorers", value=scorer_text, inline=False)
+        if match['matchday']:
+            embed.add_field(name="📅 Matchday", value=str(match['matchday']), inline=True)
+        embed.add_field(name="🆔 Match", value=f"#{match['id']}", inline=True)
+        embed.set_footer(text="Use /standings to see the updated table")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @staticmethod
+    def _parse_results_file(guild_id, text: str, clubs: Dict, players: Dict, date: str, matchday: int,
+                            recorded: Dict[str, List[Dict]]):
+        """Validate 'Home,Away,2-1,Scorer;Scorer' lines into matches; runs on a worker thread
+        
+        recorded holds the matches already stored for the matchday, per club.
+        """
+        matches: List[Dict] = []
+        errors: List[str] = []
+        playing = set(recorded)
+        for line_num, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = [part.strip() for part in line.split(',')]
+            try:
+                if len(parts) < 3:
+                    raise ValueError("Expected Home,Away,Score[,Scorers]")
+                home_goals, away_goals = (int(goals) for goals in parts[2].replace(':', '-').split('-'))
+                match = parse_match(guild_id, clubs, players, parts[0], parts[1], home_goals, away_goals,
+                                    parts[3].split(';') if len(parts) > 3 else None, date, matchday)
+            except ValueError as e:
+                message = str(e)
+                if message.startswith(("invalid literal", "not enough values", "too many values")):
+                    message = f"Invalid score '{parts[2]}', use 2-1"
+                errors.append(f"Line {line_num}: {message}")
+                continue
+            if matchday is not None:
+                # A matchday has each club play at most once
+                for club_id in (match['home'], match['away']):
+                    if club_id in recorded:
+                        errors.append(f"Line {line_num}: {clubs[club_id]['name']} already has a result on this matchday")
+                    elif club_id in playing:
+                        errors.append(f"Line {line_num}: {clubs[club_id]['name']} already plays on this matchday")
+                    playing.add(club_id)
+            matches.append(match)
+        return matches, errors
+    
+    @app_commands.command(name="import_results", description="Record a matchday of results from a file")
+    @app_commands.describe(
+        file="Text file with one result per line: Home,Away,2-1,Scorer;Scorer",
+        matchday="Matchday number of these results",
+        date="Date played (YYYY-MM-DD, default: today)"
+    )
+    @deferred()
+    async def import_results(self, interaction: discord.Interaction, file: discord.Attachment,
+                             matchday: int = None, date: str = None):
+        """Record every result in a file at once, or none of them"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        if file.size > MAX_RESULTS_FILE_BYTES:
+            await interaction.response.send_message("❌ File is too large (1 MiB max)!", ephemeral=True)
+            return
+        
+        try:
+            text = (await file.read()).decode('utf-8-sig')
+        except (discord.HTTPException, UnicodeDecodeError) as e:
+            await interaction.response.send_message(f"❌ Could not read the file: {e}", ephemeral=True)
+            return
+        
+        clubs = await run_blocking(self.db.get_clubs)
+        players = await run_blocking(self.db.get_players)
+        recorded = await run_blocking(self.db.get_matchday_results, interaction.guild.id, matchday) if matchday is not None else {}
+        matches, errors = await run_blocking(self._parse_results_file, interaction.guild.id, text, clubs,
+                                             players, date, matchday, recorded)
+        
+        stored = []
+        if matches and not errors:
+            # Every result goes into one journal write; the matchday is checked again under the lock
+            try:
+                stored = await run_blocking(self.db.record_results, interaction.guild.id, matches)
+            except ValueError as e:
+                errors.append(str(e))
+        
+        if errors or not matches:
+            embed = discord.Embed(
+                title="❌ Results Not Imported",
+                description="Nothing was recorded; fix these lines and upload the file again." if errors
+                            else "The file contains no results.",
+                color=discord.Color.red()
+            )
+            if errors:
+                shown = errors[:10]
+                if len(errors) > len(shown):
+                    shown.append(f"... and {len(errors) - len(shown)} more")
+                embed.add_field(name=f"Errors ({len(errors)})", value="\n".join(shown)[:1024], inline=False)
+            await interaction.response.send_message(embed=embed)
+            return
+        
+        embed = discord.Embed(
+            title=f"📥 Matchday {matchday} Recorded" if matchday else "📥 Results Recorded",
+            description="\n".join(self._score_line(match) for match in stored[:20]),
+            color=discord.Color.green()
+        )
+        if len(stored) > 20:
+            embed.description += f"\n... and {len(stored) - 20} more"
+        embed.add_field(name="✅ Results", value=str(len(stored)), inline=True)
+        embed.add_field(name="⚽ Goals", value=str(sum(m['home_goals'] + m['away_goals'] for m in stored)), inline=True)
+        embed.set_footer(text="Use /standings to see the updated table")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="standings", description="Show the league standings from recorded results")
+    @deferred()
+    async def standings(self, interaction: discord.Interaction):
+        """Show the points table"""
+        rows = await run_blocking(self.db.get_standings, interaction.guild.id)
+        
+        if not rows:
+            await interaction.response.send_message("❌ No results recorded yet! Use /record_result or /import_results.", ephemeral=True)
+            return
+        
+        lines = ["```", f"{'#':>2} {'Club':<16} {'P':>2} {'W':>2} {'D':>2} {'L':>2} {'GF':>3} {'GA':>3} {'GD':>4} {'Pts':>3}"]
+        for position, row in enumerate(rows, 1):
+            lines.append(f"{position:>2} {row['name'][:16]:<16} {row['played']:>2} {row['won']:>2} {row['drawn']:>2} "
+                         f"{row['lost']:>2} {row['goals_for']:>3} {row['goals_against']:>3} {row['goal_difference']:>+4} "
+                         f"{row['points']:>3}")
+        lines.append("```")
+        
+        embed = discord.Embed(
+            title="🏆 League Standings",
+            description="\n".join(lines),
+            color=discord.Color.gold()
+        )
+        form = [f"{position}. {row['name']} {''.join(FORM_EMOJI[result] for result in row['form'])}"
+                for position, row in enumerate(rows[:10], 1)]
+        embed.add_field(name="📈 Form (last 5, oldest first)", value="\n".join(form)[:1024], inline=False)
+        
+        total, _ = await run_blocking(self.db.get_results, interaction.guild.id, limit=0)
+        embed.set_footer(text=f"{total} match(es) recorded in {interaction.guild.name}")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="results", description="Show recorded match results")
+    @app_commands.describe(
+        club="Only show this club's matches",
+        page=f"Page number ({RESULTS_PAGE_SIZE} results per page, newest first)"
+    )
+    @deferred()
+    async def results(self, interaction: discord.Interaction, club: str = None, page: int = 1):
+        """Show recorded results"""
+        club_id = None
+        title = "📋 Results"
+        if club:
+            club_id = f"{interaction.guild.id}_{club.lower().replace(' ', '_')}"
+            club_data = await run_blocking(self.db.get_club, club_id)
+            if not club_data:
+                await interaction.response.send_message(f"❌ Club '{club}' not found!", ephemeral=True)
+                return
+            title = f"📋 {club_data['name']} - Results"
+        
+        total, _ = await run_blocking(self.db.get_results, interaction.guild.id, club_id, 0, 0)
+        pages = max(1, -(-total // RESULTS_PAGE_SIZE))
+        if page < 1 or page > pages:
+            await interaction.response.send_message(f"❌ Page must be between 1 and {pages}!", ephemeral=True)
+            return
+        _, matches = await run_blocking(self.db.get_results, interaction.guild.id, club_id,
+                                        (page - 1) * RESULTS_PAGE_SIZE, RESULTS_PAGE_SIZE)
+        
+        embed = discord.Embed(title=title, color=discord.Color.blue())
+        for match in matches:
+            details = [self._score_line(match)]
+            scorer_text = self._scorer_text(match)
+            if scorer_text:
+                details.append(f"⚽ {scorer_text}")
+            matchday = f" · Matchday {match['matchday']}" if match['matchday'] else ""
+            embed.add_field(
+                name=f"#{match['id']} · {datetime.fromisoformat(match['date']):%Y-%m-%d}{matchday}",
+                value="\n".join(details)[:1024],
+                inline=False
+            )
+        
+        if not matches:
+            embed.add_field(name="📋 No results", value="No matches recorded yet", inline=False)
+        embed.set_footer(text=f"Page {page} of {pages} · {total} match(es)")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="delete_result", description="Delete a recorded match result from the standings")
+    @app_commands.describe(match_id="Match number, as shown by /results")
+    @deferred()
+    async def delete_result(self, interaction: discord.Interaction, match_id: int):
+        """Delete one result"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        deleted = await run_blocking(self.db.delete_result, interaction.guild.id, match_id)
+        if deleted is None:
+            await interaction.response.send_message(f"❌ Match #{match_id} not found!", ephemeral=True)
+            return
+        match, box_scores = deleted
+        
+        embed = discord.Embed(
+            title="🗑️ Result Deleted",
+            description=self._score_line(match),
+            color=discord.Color.orange()
+        )
+        if match['matchday']:
+            embed.add_field(name="📅 Matchday", value=str(match['matchday']), inline=True)
+        embed.add_field(name="🆔 Match", value=f"#{match['id']}", inline=True)
+        if box_scores:
+            embed.add_field(name="📊 Box Scores Removed", value=str(box_scores), inline=True)
+        embed.set_footer(text="Both clubs' standings no longer count this match")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @staticmethod
+    def _parse_box_scores(guild_id, text: str, players: Dict, matchday_results: Dict):
+        """Validate 'Player,Minutes,Goals,Assists,Yellow,Red' lines into box score columns; runs on a worker thread"""
+        columns: Dict[str, List] = {'match': [], 'player': [], 'name': []}
+        columns.update((stat, []) for stat in STAT_COLUMNS)
+        errors: List[str] = []
+        listed = set()
+        # (match id, club id) -> [goals in box scores, goals in the result]
+        goals: Dict = {}
+        for line_num, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = [part.strip() for part in line.split(',')]
+            try:
+                if len(parts) < 4:
+                    raise ValueError("Expected Player,Minutes,Goals,Assists[,Yellow,Red]")
+                player_id = f"{guild_id}_{parts[0].lower().replace(' ', '_')}"
+                player = players.get(player_id)
+                if player is None:
+                    raise ValueError(f"Player '{parts[0]}' not found")
+                if player_id in listed:
+                    raise ValueError(f"{player['name']} is listed twice")
+                minutes, scored, assists, yellow, red = (int(value) if value else 0 for value in (parts[1:6] + [''] * 5)[:5])
+                if not 0 <= minutes <= MAX_MINUTES:
+                    raise ValueError(f"Minutes must be between 0 and {MAX_MINUTES}")
+                if not (0 <= scored <= MAX_PLAYER_GOALS and 0 <= assists <= MAX_PLAYER_GOALS):
+                    raise ValueError(f"Goals and assists must be between 0 and {MAX_PLAYER_GOALS}")
+                if not (0 <= yellow <= 2 and 0 <= red <= 1):
+                    raise ValueError("A player gets at most 2 yellow cards and 1 red card")
+                club_matches = matchday_results.get(player.get('club_id'), [])
+                if len(club_matches) != 1:
+                    raise ValueError(f"{player['name']}'s club has {len(club_matches)} results on this matchday, expected 1")
+            except ValueError as e:
+                message = str(e)
+                if message.startswith("invalid literal"):
+                    message = "Minutes, goals, assists and cards must be whole numbers"
+                errors.append(f"Line {line_num}: {message}")
+                continue
+            
+            match = club_matches[0]
+            side = 'home' if match['home'] == player['club_id'] else 'away'
+            conceded = match['away_goals'] if side == 'home' else match['home_goals']
+            listed.add(player_id)
+            tally = goals.setdefault((match['id'], player['club_id']), [0, match[f'{side}_goals']])
+            tally[0] += scored
+            columns['match'].append(match['id'])
+            columns['player'].append(player_id)
+            columns['name'].append(player['name'])
+            for stat, value in zip(STAT_COLUMNS, (minutes, scored, assists,
+                                                  int(conceded == 0 and minutes >= CLEAN_SHEET_MINUTES), yellow, red)):
+                columns[stat].append(value)
+        
+        for (match_id, club_id), (scored, result) in goals.items():
+            if scored > result:
+                errors.append(f"Match #{match_id}: {scored} goals listed for a club that scored {result}")
+        return columns, errors
+    
+    @app_commands.command(name="import_box_scores", description="Record a matchday of player stats from a file")
+    @app_commands.describe(
+        file="Text file with one player per line: Player,Minutes,Goals,Assists,Yellow,Red",
+        matchday="Matchday whose recorded results these stats belong to"
+    )
+    @deferred()
+    async def import_box_scores(self, interaction: discord.Interaction, file: discord.Attachment, matchday: int):
+        """Record every box score in a file at once, or none of them"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        if file.size > MAX_RESULTS_FILE_BYTES:
+            await interaction.response.send_message("❌ File is too large (1 MiB max)!", ephemeral=True)
+            return
+        
+        try:
+            text = (await file.read()).decode('utf-8-sig')
+        except (discord.HTTPException, UnicodeDecodeError) as e:
+            await interaction.response.send_message(f"❌ Could not read the file: {e}", ephemeral=True)
+            return
+        
+        matchday_results = await run_blocking(self.db.get_matchday_results, interaction.guild.id, matchday)
+        if not matchday_results:
+            await interaction.response.send_message(f"❌ No results recorded for matchday {matchday}! Record them first with /import_results.", ephemeral=True)
+            return
+        
+        players = await run_blocking(guild_players, self.db, interaction.guild.id)
+        columns, errors = await run_blocking(self._parse_box_scores, interaction.guild.id, text, players, matchday_results)
+        
+        if not errors and columns['match']:
+            try:
+                # The whole matchday goes into one append
+                added = await run_blocking(self.db.record_box_scores, interaction.guild.id, columns)
+            except ValueError as e:
+                errors.append(str(e))
+        
+        if errors or not columns['match']:
+            embed = discord.Embed(
+                title="❌ Box Scores Not Imported",
+                description="Nothing was recorded; fix these lines and upload the file again." if errors
+                            else "The file contains no box scores.",
+                color=discord.Color.red()
+            )
+            if errors:
+                shown = errors[:10]
+                if len(errors) > len(shown):
+                    shown.append(f"... and {len(errors) - len(shown)} more")
+                embed.add_field(name=f"Errors ({len(errors)})", value="\n".join(shown)[:1024], inline=False)
+            await interaction.response.send_message(embed=embed)
+            return
+        
+        embed = discord.Embed(
+            title=f"📊 Matchday {matchday} Box Scores Recorded",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="👥 Players", value=str(added), inline=True)
+        embed.add_field(name="🏟️ Matches", value=str(len(set(columns['match']))), inline=True)
+        embed.add_field(name="⚽ Goals", value=str(sum(columns['goals'])), inline=True)
+        embed.add_field(name="🅰️ Assists", value=str(sum(columns['assists'])), inline=True)
+        embed.add_field(name="🧤 Clean Sheets", value=str(sum(columns['clean_sheets'])), inline=True)
+        embed.add_field(name="🟨 Cards", value=f"{sum(columns['yellow_cards'])} 🟨 · {sum(columns['red_cards'])} 🟥", inline=True)
+        embed.set_footer(text="Use /top_scorers and /top_assists to see the leaderboards")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    async def _leaderboard(self, interaction: discord.Interaction, stat: str, title: str, emoji: str, limit: int):
+        if not 1 <= limit <= MAX_LEADERS_SHOWN:
+            await interaction.response.send_message(f"❌ Limit must be between 1 and {MAX_LEADERS_SHOWN}!", ephemeral=True)
+            return
+        
+        leaders = await run_blocking(self.db.get_stat_leaders, interaction.guild.id, stat, limit)
+        if not leaders:
+            await interaction.response.send_message("❌ No box scores recorded yet! Use /import_box_scores.", ephemeral=True)
+            return
+        
+        lines = []
+        for position, row in enumerate(leaders, 1):
+            per_game = row[stat] / row['appearances'] if row['appearances'] else 0.0
+            lines.append(f"**{position}. {row['name']}** · {emoji} {row[stat]} in {row['appearances']} apps "
+                         f"({per_game:.2f}/game) · {row['minutes']}'")
+        
+        embed = discord.Embed(title=title, description="\n".join(lines), color=discord.Color.gold())
+        embed.set_footer(text="Ties go to the player with the earliest box score")
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="top_scorers", description="Show the league's top goal scorers")
+    @app_commands.describe(limit="Number of players to show (default: 10)")
+    @deferred()
+    async def top_scorers(self, interaction: discord.Interaction, limit: int = 10):
+        """Show the goal leaderboard"""
+        await self._leaderboard(interaction, 'goals', "⚽ Top Scorers", "⚽", limit)
+    
+    @app_commands.command(name="top_assists", description="Show the league's top assist providers")
+    @app_commands.describe(limit="Number of players to show (default: 10)")
+    @deferred()
+    async def top_assists(self, interaction: discord.Interaction, limit: int = 10):
+        """Show the assist leaderboard"""
+        await self._leaderboard(interaction, 'assists', "🅰️ Top Assists", "🅰️", limit)
+
+async def setup(bot):
+    await bot.add_cog(Season(bot))
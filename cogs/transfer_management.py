@@ -8,6 +8,7 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 from utils.permissions import check_admin
+from utils.deferred import deferred, run_blocking
 
 logger = logging.getLogger(__name__)
 
@@ -134,9 +135,10 @@ class TransferManagement(commands.Cog):
         player="Player name (optional)",
         club="Club name (optional)"
     )
+    @deferred()
     async def transfer_history(self, interaction: discord.Interaction, player: str = None, club: str = None):
         """View transfer history"""
-        transfers = self.db.get_transfers()
+        transfers = await run_blocking(self.db.get_transfers)
         guild_transfers = [t for t in transfers if t['player_id'].startswith(str(interaction.guild.id))]
         
         if not guild_transfers:
@@ -167,9 +169,12 @@ class TransferManagement(commands.Cog):
         # Sort by date (most recent first)
         sorted_transfers = sorted(filtered_transfers, key=lambda x: x['date'], reverse=True)
         
+        players = await run_blocking(self.db.get_players)
+        clubs = await run_blocking(self.db.get_clubs)
+        
         for i, transfer in enumerate(sorted_transfers[:10]):  # Show last 10 transfers
             # Get player name
-            player_data = self.db.get_player(transfer['player_id'])
+            player_data = players.get(transfer['player_id'])
             player_name = player_data['name'] if player_data else "Unknown Player"
             
             # Get club names
@@ -177,12 +182,12 @@ class TransferManagement(commands.Cog):
             to_club_name = "Free Agency"
             
             if transfer['from_club']:
-                from_club = self.db.get_club(transfer['from_club'])
+                from_club = clubs.get(transfer['from_club'])
                 if from_club:
                     from_club_name = from_club['name']
             
             if transfer['to_club']:
-                to_club = self.db.get_club(transfer['to_club'])
+                to_club = clubs.get(transfer['to_club'])
                 if to_club:
                     to_club_name = to_club['name']
             
@@ -200,9 +205,10 @@ class TransferManagement(commands.Cog):
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="market_activity", description="View recent market activity")
+    @deferred()
     async def market_activity(self, interaction: discord.Interaction):
         """Show recent market activity with statistics"""
-        transfers = self.db.get_transfers()
+        transfers = await run_blocking(self.db.get_transfers)
         guild_transfers = [t for t in transfers if t['player_id'].startswith(str(interaction.guild.id))]
         
         if not guild_transfers:
@@ -227,8 +233,10 @@ class TransferManagement(commands.Cog):
         embed.add_field(name="💰 Total Spent", value=f"€{total_spent:,.2f}", inline=True)
         embed.add_field(name="📈 Average Fee", value=f"€{average_fee:,.2f}", inline=True)
         
+        players = await run_blocking(self.db.get_players)
+        
         if most_expensive:
-            player_data = self.db.get_player(most_expensive['player_id'])
+            player_data = players.get(most_expensive['player_id'])
             player_name = player_data['name'] if player_data else "Unknown"
             embed.add_field(
                 name="💎 Most Expensive Transfer",
@@ -241,7 +249,7 @@ class TransferManagement(commands.Cog):
         if recent_transfers:
             recent_text = ""
             for transfer in recent_transfers:
-                player_data = self.db.get_player(transfer['player_id'])
+                player_data = players.get(transfer['player_id'])
                 player_name = player_data['name'] if player_data else "Unknown"
                 recent_text += f"• {player_name} - €{transfer['amount']:,.2f}\n"
             
@@ -10,6 +10,8 @@ import logging
 import json
 from datetime import datetime, timedelta
 from utils.permissions import check_admin
+from utils.views import confirm_action
+from utils.deferred import deferred, run_blocking, Progress
 
 logger = logging.getLogger(__name__)
 
@@ -77,9 +79,10 @@ class UtilityCommands(commands.Cog):
             await interaction.response.send_message("❌ Failed to duplicate player.", ephemeral=True)
     
     @app_commands.command(name="player_age_groups", description="Show players grouped by age ranges")
+    @deferred()
     async def player_age_groups(self, interaction: discord.Interaction):
         """Show age group distribution"""
-        players = self.db.get_players()
+        players = await run_blocking(self.db.get_players)
         guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
         
         if not guild_players:
@@ -130,21 +133,14 @@ class UtilityCommands(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
     
-    @app_commands.command(name="import_players_csv", description="Import players from CSV-like format")
-    @app_commands.describe(
-        data="Players in format: Name,Value,Position,Age,Club (one per line)"
-    )
-    async def import_players_csv(self, interaction: discord.Interaction, data: str):
-        """Import players from CSV format"""
-        if not check_admin(interaction):
-            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
-            return
-        
-        lines = data.strip().split('\n')
-        imported = 0
+    @staticmethod
+    def _parse_players_csv(guild_id, lines, players: dict, clubs: dict, progress: Progress):
+        """Validate CSV lines into player_id -> player fields; runs on a worker thread"""
+        new_players = {}
         errors = []
         
         for line_num, line in enumerate(lines, 1):
+            progress.advance()
             try:
                 parts = [part.strip() for part in line.split(',')]
                 if len(parts) < 2:
@@ -162,29 +158,55 @@ class UtilityCommands(commands.Cog):
                     errors.append(f"Line {line_num}: Empty name")
                     continue
                 
-                player_id = f"{interaction.guild.id}_{name.lower().replace(' ', '_')}"
-                if self.db.get_player(player_id):
+                player_id = f"{guild_id}_{name.lower().replace(' ', '_')}"
+                if player_id in players or player_id in new_players:
                     errors.append(f"Line {line_num}: Player '{name}' already exists")
                     continue
                 
                 club_id = None
                 if club_name:
-                    club_id = f"{interaction.guild.id}_{club_name.lower().replace(' ', '_')}"
-                    if not self.db.get_club(club_id):
+                    club_id = f"{guild_id}_{club_name.lower().replace(' ', '_')}"
+                    if club_id not in clubs:
                         errors.append(f"Line {line_num}: Club '{club_name}' not found")
                         continue
                 
-                # Import player
-                if self.db.add_player(player_id, name, value, club_id, position.upper(), age):
-                    imported += 1
-                else:
-                    errors.append(f"Line {line_num}: Failed to import '{name}'")
-                    
+                new_players[player_id] = {
+                    'name': name,
+                    'value': value,
+                    'club_id': club_id,
+                    'position': position.upper(),
+                    'age': age
+                }
+            
             except ValueError as e:
                 errors.append(f"Line {line_num}: Invalid data format")
             except Exception as e:
                 errors.append(f"Line {line_num}: {str(e)}")
         
+        return new_players, errors
+    
+    @app_commands.command(name="import_players_csv", description="Import players from CSV-like format")
+    @app_commands.describe(
+        data="Players in format: Name,Value,Position,Age,Club (one per line)"
+    )
+    @deferred()
+    async def import_players_csv(self, interaction: discord.Interaction, data: str):
+        """Import players from CSV format"""
+        if not check_admin(interaction):
+            await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
+            return
+        
+        lines = data.strip().split('\n')
+        players = await run_blocking(self.db.get_players)
+        clubs = await run_blocking(self.db.get_clubs)
+        
+        async with Progress(interaction, "📥 Importing players...", len(lines)) as progress:
+            new_players, errors = await run_blocking(self._parse_players_csv, interaction.guild.id, lines,
+                                                     players, clubs, progress)
+            imported = await run_blocking(self.db.bulk_add_players, new_players)
+            if new_players and not imported:
+                errors.append(f"Failed to import {len(new_players)} player(s)")
+        
         embed = discord.Embed(
             title="📥 Player Import Results",
             color=discord.Color.green() if imported > 0 else discord.Color.red(),
@@ -202,15 +224,16 @@ class UtilityCommands(commands.Cog):
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="export_data", description="Export all data in readable format")
+    @deferred()
     async def export_data(self, interaction: discord.Interaction):
         """Export all data"""
         if not check_admin(interaction):
             await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
             return
         
-        clubs = self.db.get_clubs()
-        players = self.db.get_players()
-        transfers = self.db.get_transfers()
+        clubs = await run_blocking(self.db.get_clubs)
+        players = await run_blocking(self.db.get_players)
+        transfers = await run_blocking(self.db.get_transfers)
         
         guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
         guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
@@ -660,6 +683,7 @@ class UtilityCommands(commands.Cog):
         image="Upload background image from album",
         banner_color="Banner color theme"
     )
+    @deferred()
     async def league_banner(self, interaction: discord.Interaction, title: str = None, subtitle: str = None, 
                            image: discord.Attachment = None, banner_color: str = "gold"):
         """Create league banner"""
@@ -668,9 +692,9 @@ class UtilityCommands(commands.Cog):
             return
         
         # Get league stats
-        clubs = self.db.get_clubs()
-        players = self.db.get_players()
-        transfers = self.db.get_transfers()
+        clubs = await run_blocking(self.db.get_clubs)
+        players = await run_blocking(self.db.get_players)
+        transfers = await run_blocking(self.db.get_transfers)
         
         guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
         guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
@@ -735,13 +759,20 @@ class UtilityCommands(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
     
+    def _record_counts(self):
+        """(clubs, players, transfers) stored for every server; runs on a worker thread"""
+        return len(self.db.get_clubs()), len(self.db.get_players()), len(self.db.get_transfers())
+    
     @app_commands.command(name="reset_all", description="Reset entire system - ALL data will be deleted!")
+    @deferred()
     async def reset_all(self, interaction: discord.Interaction):
         """Reset all system data"""
         if not check_admin(interaction):
             await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
             return
         
+        clubs, players, transfers = await run_blocking(self._record_counts)
+        
         # Create confirmation embed
         embed = discord.Embed(
             title="⚠️ SYSTEM RESET WARNING",
@@ -751,7 +782,7 @@ class UtilityCommands(commands.Cog):
         
         embed.add_field(
             name="💀 Data to be deleted",
-            value=f"• {len(self.db.get_clubs())} Clubs\n• {len(self.db.get_players())} Players\n• {len(self.db.get_transfers())} Transfers",
+            value=f"• {clubs} Clubs\n• {players} Players\n• {transfers} Transfers",
             inline=True
         )
         
@@ -761,30 +792,15 @@ class UtilityCommands(commands.Cog):
             inline=True
         )
         
-        embed.set_footer(text="Type 'CONFIRM RESET' exactly to proceed or wait 30 seconds to cancel")
+        embed.set_footer(text="Press 'Confirm Reset' to proceed or wait 30 seconds to cancel")
         embed.timestamp = datetime.now()
         
-        await interaction.response.send_message(embed=embed)
-        
-        # Wait for confirmation
-        def check(m):
-            return (m.author == interaction.user and 
-                   m.channel == interaction.channel and 
-                   m.content == "CONFIRM RESET")
+        if not await confirm_action(interaction, embed, confirm_label="Confirm Reset"):
+            return
         
         try:
-            msg = await self.bot.wait_for('message', timeout=30.0, check=check)
-            
             # Perform reset
-            import os
-            data_files = ['data/clubs.json', 'data/players.json', 'data/transfers.json']
-            
-            for file_path in data_files:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            
-            # Reinitialize database
-            self.db = self.bot.db = Database()
+            await run_blocking(self.db.reset)
             
             # Create success embed
             success_embed = discord.Embed(
@@ -808,16 +824,11 @@ class UtilityCommands(commands.Cog):
             success_embed.set_footer(text=f"Reset performed by {interaction.user.display_name}")
             success_embed.timestamp = datetime.now()
             
-            await msg.reply(embed=success_embed)
-            
-        except:
-            # Timeout or invalid confirmation
-            cancel_embed = discord.Embed(
-                title="❌ RESET CANCELLED",
-                description="System reset was cancelled. No data was modified.",
-                color=discord.Color.orange()
-            )
-            await interaction.followup.send(embed=cancel_embed)
+            await interaction.edit_original_response(embed=success_embed, view=None)
+        
+        except Exception as e:
+            logger.error(f"System reset failed: {e}")
+            await interaction.edit_original_response(content="❌ System reset failed. Please try again.", embed=None, view=None)
 
 async def setup(bot):
     await bot.add_cog(UtilityCommands(bot))
\ No newline at end of file
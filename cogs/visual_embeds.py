@@ -9,6 +9,8 @@ from discord import app_commands
 import logging
 from datetime import datetime
 from utils.permissions import check_admin
+from utils.deferred import deferred, run_blocking
+from utils.results import parse_match
 
 logger = logging.getLogger(__name__)
 
@@ -165,11 +167,14 @@ class VisualEmbeds(commands.Cog):
         away_score="Away team score",
         match_image="Upload match image from album",
         home_logo="Upload home team logo from album",
-        away_logo="Upload away team logo from album"
+        away_logo="Upload away team logo from album",
+        matchday="Also record the result in the standings under this matchday"
     )
+    @deferred()
     async def match_result(self, interaction: discord.Interaction, home_team: str, away_team: str,
                           home_score: int, away_score: int, match_image: discord.Attachment = None,
-                          home_logo: discord.Attachment = None, away_logo: discord.Attachment = None):
+                          home_logo: discord.Attachment = None, away_logo: discord.Attachment = None,
+                          matchday: int = None):
         """Create match result embed"""
         if not check_admin(interaction):
             await interaction.response.send_message("❌ Administrator permissions required!", ephemeral=True)
@@ -226,6 +231,17 @@ class VisualEmbeds(commands.Cog):
         if home_logo:
             embed.set_thumbnail(url=home_logo.url)
         
+        # Only recorded when asked for, with a matchday, so the one-result-per-matchday check applies
+        if matchday is not None:
+            try:
+                match = parse_match(interaction.guild.id, await run_blocking(self.db.get_clubs), {}, home_team, away_team,
+                                    home_score, away_score, matchday=matchday)
+                match = (await run_blocking(self.db.record_results, interaction.guild.id, [match]))[0]
+                standings = f"Recorded as match #{match['id']} on matchday {matchday}"
+            except ValueError as e:
+                standings = f"Not recorded: {e}"
+            embed.add_field(name="📋 Standings", value=standings, inline=True)
+        
         embed.set_footer(text=f"Match played in {interaction.guild.name} League")
         embed.timestamp = datetime.now()
         
@@ -238,6 +254,7 @@ class VisualEmbeds(commands.Cog):
         background_image="Upload background image from album",
         stat_color="Color theme"
     )
+    @deferred()
     async def stats_infographic(self, interaction: discord.Interaction, stat_type: str, subject: str = None,
                               background_image: discord.Attachment = None, stat_color: str = "blue"):
         """Create stats infographic"""
@@ -257,14 +274,14 @@ class VisualEmbeds(commands.Cog):
         
         if stat_type.lower() == "player" and subject:
             player_id = f"{interaction.guild.id}_{subject.lower().replace(' ', '_')}"
-            player_data = self.db.get_player(player_id)
+            player_data = await run_blocking(self.db.get_player, player_id)
             
             if not player_data:
                 await interaction.response.send_message(f"❌ Player '{subject}' not found!", ephemeral=True)
                 return
             
             # Get transfers
-            transfers = self.db.get_transfers()
+            transfers = await run_blocking(self.db.get_transfers)
             player_transfers = [t for t in transfers if t['player_id'] == player_id]
             
             embed = discord.Embed(
@@ -313,7 +330,7 @@ class VisualEmbeds(commands.Cog):
             # Club info
             club_name = "Free Agent"
             if player_data.get('club_id'):
-                club = self.db.get_club(player_data['club_id'])
+                club = await run_blocking(self.db.get_club, player_data['club_id'])
                 if club:
                     club_name = club['name']
             
@@ -322,16 +339,16 @@ class VisualEmbeds(commands.Cog):
                 value=club_name,
                 inline=True
             )
-            
+        
         elif stat_type.lower() == "club" and subject:
             club_id = f"{interaction.guild.id}_{subject.lower().replace(' ', '_')}"
-            club_data = self.db.get_club(club_id)
+            club_data = await run_blocking(self.db.get_club, club_id)
             
             if not club_data:
                 await interaction.response.send_message(f"❌ Club '{subject}' not found!", ephemeral=True)
                 return
             
-            players = self.db.get_players()
+            players = await run_blocking(self.db.get_players)
             club_players = [players[pid] for pid in club_data.get('players', []) if pid in players]
             
             embed = discord.Embed(
@@ -388,9 +405,9 @@ class VisualEmbeds(commands.Cog):
         
         else:
             # League stats
-            clubs = self.db.get_clubs()
-            players = self.db.get_players()
-            transfers = self.db.get_transfers()
+            clubs = await run_blocking(self.db.get_clubs)
+            players = await run_blocking(self.db.get_players)
+            transfers = await run_blocking(self.db.get_transfers)
             
             guild_clubs = {k: v for k, v in clubs.items() if k.startswith(str(interaction.guild.id))}
             guild_players = {k: v for k, v in players.items() if k.startswith(str(interaction.guild.id))}
@@ -1,58 +1,46 @@
 #!/usr/bin/env python3
 """
 Discord Football Club Management Bot - Main Entry Point
-Handles bot startup and keep-alive web server
+Handles bot startup; the keep-alive web server runs inside the bot's event loop
 """
 
-import asyncio
-import threading
 import os
+import sys
 import logging
 from bot import FootballBot
-from web_server import app
+from utils.log_config import setup_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
-def run_web_server():
-    """Run Flask web server in a separate thread"""
-    try:
-        app.run(host='0.0.0.0', port=5000, debug=False)
-    except Exception as e:
-        logger.error(f"Web server error: {e}")
-
-def main():
+def main() -> int:
     """Main function to start bot and web server"""
-    # Get Discord bot token from environment
-    bot_token = os.getenv('DISCORD_BOT_TOKEN')
-    
-    if not bot_token:
-        logger.error("DISCORD_BOT_TOKEN environment variable is required!")
-        return
-    
-    # Start web server in background thread
-    logger.info("Starting keep-alive web server...")
-    web_thread = threading.Thread(target=run_web_server, daemon=True)
-    web_thread.start()
-    
-    # Initialize and run the Discord bot
-    logger.info("Starting Discord bot...")
-    bot = FootballBot()
+    # Configure logging; file writes happen on a background listener thread
+    log_listener = setup_logging()
     
     try:
-        bot.run(bot_token)
-    except Exception as e:
-        logger.error(f"Bot error: {e}")
+        # Get Discord bot token from environment
+        bot_token = os.getenv('DISCORD_BOT_TOKEN')
+        
+        if not bot_token:
+            logger.error("DISCORD_BOT_TOKEN environment variable is required!")
+            return 1
+        
+        # Initialize and run the Discord bot; it starts the keep-alive web server in setup_hook
+        logger.info("Starting Discord bot...")
+        bot = FootballBot(web_port=int(os.getenv('PORT', 5000)))
+        
+        try:
+            # discord.py logs through the root logger's queue instead of adding its own handler
+            bot.run(bot_token, log_handler=None)
+        except Exception as e:
+            logger.error(f"Bot error: {e}")
+            return 1
+        finally:
+            logger.info("Bot shutting down...")
+        return 0
     finally:
-        logger.info("Bot shutting down...")
+        # Flushes every queued record, including startup errors
+        log_listener.stop()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""
+Admission control for slash commands
+Each guild spends tokens from its own bucket per command, weighted by how
+expensive the command is, and heavy commands share a global concurrency cap.
+Calls slightly over budget are delayed; the rest are rejected with a retry hint.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import discord
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COST = 1
+
+# Token cost per command; anything not listed is a cheap lookup or single-record write
+COMMAND_COSTS: Dict[str, int] = {
+    # analytics that scan every club, player or transfer of the guild
+    "financial_report": 4,
+    "league_table": 4,
+    "market_activity": 4,
+    "transfer_history": 3,
+    "average_values": 4,
+    "clubs_needing_players": 3,
+    "most_transferred_players": 4,
+    "top_players_league": 4,
+    "richest_poorest_clubs": 4,
+    "transfer_activity_ranking": 4,
+    "compare_clubs": 3,
+    "club_squad_analysis": 3,
+    "expiring_contracts": 3,
+    "players_by_position": 3,
+    "player_age_groups": 4,
+    "stats_infographic": 4,
+    "league_banner": 3,
+    "value_history": 3,
+    "fixtures": 3,
+    # Monte Carlo season simulation on the process pool
+    "season_projection": 6,
+    # a whole matchday of results validated and journalled at once
+    "import_results": 4,
+    "import_box_scores": 4,
+    # bulk market operations that rewrite every player or club
+    "market_crash": 8,
+    "market_boom": 8,
+    "bulk_price_update": 8,
+    "budget_multiplier": 8,
+    "random_player_value": 8,
+    "salary_cap": 8,
+    "inflation_adjustment": 8,
+    # whole-dataset operations
+    "export_data": 6,
+    "backup_data": 6,
+    "import_players_csv": 8,
+    "quick_setup": 6,
+    "reset_all": 8,
+    "clear_all_data": 8,
+    "undo": 8,
+    "undo_last": 8,
+}
+
+# Commands at or above this cost also need one of the global heavy slots
+HEAVY_COST = 4
+
+def command_cost(command_name: str) -> int:
+    """Get the token cost of a command"""
+    return COMMAND_COSTS.get(command_name, DEFAULT_COST)
+
+class TokenBucket:
+    """Token bucket that may be reserved into debt by calls willing to wait"""
+    
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_for(self, cost: float) -> float:
+        """Seconds until cost tokens are available"""
+        self._refill()
+        return max(0.0, (cost - self.tokens) / self.rate)
+    
+    def take(self, cost: float):
+        self._refill()
+        self.tokens -= cost
+    
+    def refund(self, cost: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+class AdmissionController:
+    """Per-guild token buckets plus a global cap on concurrent heavy commands"""
+    
+    def __init__(self):
+        self.capacity = float(os.getenv('GUILD_COMMAND_BUDGET', 20))
+        self.rate = float(os.getenv('GUILD_COMMAND_REFILL', 1.0))
+        self.max_wait = float(os.getenv('ADMISSION_MAX_WAIT', 1.5))
+        self.heavy_limit = int(os.getenv('HEAVY_COMMAND_CONCURRENCY', 2))
+        self.buckets: Dict[str, TokenBucket] = {}
+        self._heavy_slots: Optional[asyncio.Semaphore] = None
+        self.heavy_running = 0
+        self.admitted = 0
+        self.delayed = 0
+        self.rejected = 0
+    
+    @property
+    def heavy_slots(self) -> asyncio.Semaphore:
+        # created lazily so it binds to the running event loop
+        if self._heavy_slots is None:
+            self._heavy_slots = asyncio.Semaphore(self.heavy_limit)
+        return self._heavy_slots
+    
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.capacity, self.rate)
+        return bucket
+    
+    async def admit(self, interaction: discord.Interaction, command_name: str) -> Tuple[bool, float]:
+        """Admit an interaction, waiting up to max_wait; returns (admitted, retry-after seconds)"""
+        key = str(interaction.guild_id) if interaction.guild_id else f"user:{interaction.user.id}"
+        guild_label = str(interaction.guild_id) if interaction.guild_id else 'dm'
+        cost = min(command_cost(command_name), self.capacity)
+        bucket = self._bucket(key)
+        started = time.perf_counter()
+        
+        wait = bucket.wait_for(cost)
+        if wait > self.max_wait:
+            self.rejected += 1
+            interaction.extras['throttled'] = 'budget'
+            metrics.observe_admission(command_name, guild_label, 'rejected')
+            return False, wait
+        bucket.take(cost)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        
+        if cost >= HEAVY_COST:
+            remaining = max(0.0, self.max_wait - (time.perf_counter() - started))
+            try:
+                await asyncio.wait_for(self.heavy_slots.acquire(), timeout=remaining)
+            except asyncio.TimeoutError:
+                bucket.refund(cost)
+                self.rejected += 1
+                interaction.extras['throttled'] = 'busy'
+                metrics.observe_admission(command_name, guild_label, 'busy')
+                return False, self.max_wait
+            interaction.extras['heavy_slot'] = True
+            self.heavy_running += 1
+        
+        waited = time.perf_counter() - started
+        if waited > 0.001:
+            self.delayed += 1
+            metrics.observe_admission(command_name, guild_label, 'delayed')
+        else:
+            metrics.observe_admission(command_name, guild_label, 'admitted')
+        self.admitted += 1
+        return True, 0.0
+    
+    def release(self, interaction: discord.Interaction):
+        """Give back the interaction's heavy slot, if it holds one"""
+        if interaction.extras.pop('heavy_slot', False):
+            self.heavy_running -= 1
+            self.heavy_slots.release()
+    
+    def pause(self, interaction: discord.Interaction):
+        """Release a heavy slot while waiting on the user so other guilds are not blocked"""
+        if interaction.extras.get('heavy_slot'):
+            self.release(interaction)
+            interaction.extras['heavy_released'] = True
+    
+    async def reacquire(self, interaction: discord.Interaction):
+        """Take the heavy slot back after pause(), once the user has confirmed"""
+        if interaction.extras.get('heavy_released'):
+            await self.heavy_slots.acquire()
+            interaction.extras.pop('heavy_released')
+            interaction.extras['heavy_slot'] = True
+            self.heavy_running += 1
+    
+    async def reject(self, interaction: discord.Interaction, command_name: str, retry_after: float):
+        """Tell the user their command was not run and when to try again"""
+        seconds = max(1, math.ceil(retry_after))
+        reason = interaction.extras.get('throttled')
+        logger.info(f"Throttled /{command_name} in guild {interaction.guild_id} ({reason}); retry after {seconds}s")
+        if reason == 'busy':
+            description = "The bot is busy with other heavy commands right now."
+        else:
+            description = "This server is sending commands faster than the bot can handle."
+        embed = discord.Embed(
+            title="⏳ Slow down",
+            description=f"{description} Try `/{command_name}` again in {seconds} second{'s' if seconds != 1 else ''}.",
+            color=discord.Color.orange()
+        )
+        try:
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except discord.HTTPException:
+            pass
+    
+    def snapshot(self) -> Dict:
+        """Counters for /health"""
+        return {
+            "guild_budget": self.capacity,
+            "refill_per_second": self.rate,
+            "max_wait_seconds": self.max_wait,
+            "heavy_limit": self.heavy_limit,
+            "heavy_running": self.heavy_running,
+            "admitted": self.admitted,
+            "delayed": self.delayed,
+            "rejected": self.rejected
+        }
+
+admission = AdmissionController()
@@ -0,0 +1,167 @@
+"""
+Reversible changesets
+Bulk operations record the old and new values of every field they change, per touched
+club or player, plus the transfers they add or remove. Undoing one restores the old values
+of just those records, so its cost follows the size of the operation, not of the league.
+"""
+
+import copy
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Older changesets of a guild are forgotten and can no longer be undone
+MAX_CHANGESETS_PER_GUILD = 20
+
+class Changeset:
+    """Old and new field values of every record one bulk operation touched
+    
+    records maps 'clubs' and 'players' to id -> [old, new], where old and new hold only
+    the changed fields, or are None when the operation created or deleted the record.
+    transfers holds the transfers it 'added' and the [position, transfer] pairs it 'removed'.
+    """
+    
+    def __init__(self, guild_id, operation: str, user_id: Optional[int] = None):
+        self.id = uuid.uuid4().hex[:6]
+        self.guild = str(guild_id)
+        self.operation = operation
+        self.user = user_id
+        self.ts = time.time()
+        self.records: Dict[str, Dict[str, List[Optional[Dict]]]] = {'clubs': {}, 'players': {}}
+        self.transfers: Dict[str, List[Dict]] = {'added': [], 'removed': []}
+        self.undone = False
+    
+    def __len__(self) -> int:
+        return sum(len(records) for records in self.records.values())
+    
+    def touch(self, kind: str, record_id: str, old: Optional[Dict], new: Optional[Dict]):
+        """Record a change; a field changed twice keeps its first old value and its last new one"""
+        entry = self.records[kind].get(record_id)
+        if entry is None:
+            self.records[kind][record_id] = [copy.deepcopy(old), copy.deepcopy(new)]
+            return
+        if entry[0] is not None and old is not None:
+            for field, value in old.items():
+                entry[0].setdefault(field, copy.deepcopy(value))
+        entry[1] = copy.deepcopy(new) if new is None or entry[1] is None else {**entry[1], **copy.deepcopy(new)}
+    
+    def to_dict(self) -> Dict:
+        return {'id': self.id, 'guild': self.guild, 'operation': self.operation, 'user': self.user,
+                'ts': self.ts, 'records': self.records, 'transfers': self.transfers, 'undone': self.undone}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Changeset':
+        changeset = cls(data['guild'], data['operation'], data.get('user'))
+        changeset.id = data['id']
+        changeset.ts = data['ts']
+        changeset.records = data['records']
+        changeset.transfers = data['transfers']
+        changeset.undone = data.get('undone', False)
+        return changeset
+
+class ChangesetLog:
+    """The newest changesets of every guild, backed by an append-only journal
+    
+    Not thread-safe on its own; Database calls it under its lock.
+    """
+    
+    def __init__(self, journal_file: str):
+        self.journal_file = journal_file
+        # guild id -> changesets, oldest first
+        self.changesets: Dict[str, List[Changeset]] = {}
+        self._load()
+    
+    def _load(self):
+        lines = 0
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                metrics.observe_read(os.path.basename(self.journal_file), os.fstat(f.fileno()).st_size)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-write
+                        break
+                    lines += 1
+                    if record.get('op') == 'save':
+                        self._put(Changeset.from_dict(record['changeset']))
+                    elif record.get('op') == 'undone':
+                        changeset = self.get(record['guild'], record['id'])
+                        if changeset is not None:
+                            changeset.undone = True
+        except FileNotFoundError:
+            return
+        # Drop records of forgotten changesets once they outnumber the kept ones
+        if lines > 2 * sum(len(changesets) for changesets in self.changesets.values()):
+            self._rewrite()
+    
+    def _journal(self, records: List[Dict]):
+        text = ''.join(json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n' for record in records)
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(text)
+            metrics.observe_write(os.path.basename(self.journal_file), len(text))
+        except OSError as e:
+            logger.error(f"Error writing {self.journal_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.journal_file))
+    
+    def _rewrite(self):
+        temp_file = self.journal_file + '.tmp'
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for changesets in self.changesets.values():
+                    for changeset in changesets:
+                        f.write(json.dumps({'op': 'save', 'changeset': changeset.to_dict()},
+                                           separators=(',', ':'), ensure_ascii=False) + '\n')
+            os.replace(temp_file, self.journal_file)
+        except OSError as e:
+            logger.error(f"Error compacting {self.journal_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.journal_file))
+    
+    def _put(self, changeset: Changeset):
+        changesets = self.changesets.setdefault(changeset.guild, [])
+        for i, existing in enumerate(changesets):
+            if existing.id == changeset.id:
+                changesets[i] = changeset
+                return
+        changesets.append(changeset)
+        del changesets[:-MAX_CHANGESETS_PER_GUILD]
+    
+    def save(self, changeset: Changeset):
+        """Store a changeset, replacing an earlier save of the same one"""
+        if not len(changeset) and not changeset.transfers['added'] and not changeset.transfers['removed']:
+            return
+        self._put(changeset)
+        self._journal([{'op': 'save', 'changeset': changeset.to_dict()}])
+    
+    def get(self, guild_id, changeset_id: str) -> Optional[Changeset]:
+        for changeset in self.changesets.get(str(guild_id), []):
+            if changeset.id == changeset_id:
+                return changeset
+        return None
+    
+    def latest(self, guild_id) -> Optional[Changeset]:
+        """Newest changeset of a guild that was not undone yet"""
+        for changeset in reversed(self.changesets.get(str(guild_id), [])):
+            if not changeset.undone:
+                return changeset
+        return None
+    
+    def mark_undone(self, changeset: Changeset):
+        changeset.undone = True
+        self._journal([{'op': 'undone', 'guild': changeset.guild, 'id': changeset.id}])
+    
+    def clear(self):
+        """Forget everything and empty the journal"""
+        self.changesets.clear()
+        try:
+            open(self.journal_file, 'w').close()
+        except OSError as e:
+            logger.error(f"Error clearing {self.journal_file}: {e}")
@@ -0,0 +1,86 @@
+"""
+Chart images
+Renders simple line charts straight to PNG bytes with the standard library, so
+charts need no imaging packages. Rendering is CPU-bound; call it via run_blocking.
+"""
+
+import struct
+import zlib
+from typing import List, Sequence, Tuple
+
+BACKGROUND = (47, 49, 54)
+GRID = (66, 69, 73)
+LINE = (88, 101, 242)
+FILL = (60, 66, 110)
+
+def _png(width: int, height: int, pixels: bytearray) -> bytes:
+    """Encode RGB rows as a PNG"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    
+    stride = width * 3
+    raw = b''.join(b'\x00' + bytes(pixels[y * stride:(y + 1) * stride]) for y in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw, 6)) + chunk(b'IEND', b'')
+
+def line_chart(points: Sequence[Tuple[float, float]], width: int = 640, height: int = 240,
+               padding: int = 12) -> bytes:
+    """Line chart of (x, y) points with the area below the line filled"""
+    pixels = bytearray(BACKGROUND * (width * height))
+    
+    def fill_column(x: int, top: int, bottom: int, color: Tuple[int, int, int]):
+        for y in range(max(top, 0), min(bottom, height)):
+            offset = (y * width + x) * 3
+            pixels[offset:offset + 3] = bytes(color)
+    
+    def plot(x: int, y: int, color: Tuple[int, int, int]):
+        if 0 <= x < width and 0 <= y < height:
+            offset = (y * width + x) * 3
+            pixels[offset:offset + 3] = bytes(color)
+    
+    inner_w, inner_h = width - 2 * padding, height - 2 * padding
+    for i in range(5):
+        y = padding + round(i * (inner_h - 1) / 4)
+        pixels[(y * width + padding) * 3:(y * width + padding + inner_w) * 3] = bytes(GRID) * inner_w
+    if not points:
+        return _png(width, height, pixels)
+    
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    x_low, x_high = min(xs), max(xs)
+    y_low, y_high = min(ys), max(ys)
+    if y_high == y_low:
+        y_low, y_high = y_low - 1, y_high + 1
+    if x_high == x_low:
+        x_low, x_high = x_low - 1, x_high + 1
+    
+    def to_pixel(x: float, y: float) -> Tuple[int, int]:
+        px = padding + round((x - x_low) / (x_high - x_low) * (inner_w - 1))
+        py = padding + round((y_high - y) / (y_high - y_low) * (inner_h - 1))
+        return px, py
+    
+    # Height of the line at every pixel column, interpolated between points
+    line_y: List[int] = [-1] * width
+    pixel_points = [to_pixel(x, y) for x, y in points]
+    if len(pixel_points) == 1:
+        pixel_points = [(padding, pixel_points[0][1]), (padding + inner_w - 1, pixel_points[0][1])]
+    for (x0, y0), (x1, y1) in zip(pixel_points, pixel_points[1:]):
+        span = max(x1 - x0, 1)
+        for x in range(x0, x1 + 1):
+            line_y[x] = round(y0 + (y1 - y0) * (x - x0) / span)
+    
+    bottom = padding + inner_h
+    for x, y in enumerate(line_y):
+        if y >= 0:
+            fill_column(x, y, bottom, FILL)
+    # Draw the line three pixels thick, joining consecutive columns vertically
+    previous = None
+    for x, y in enumerate(line_y):
+        if y < 0:
+            previous = None
+            continue
+        top, low = (y, y) if previous is None else (min(y, previous), max(y, previous))
+        for yy in range(top - 1, low + 2):
+            plot(x, yy, LINE)
+        previous = y
+    return _png(width, height, pixels)
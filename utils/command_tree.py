@@ -0,0 +1,65 @@
+"""
+Command tree with tree-level hooks for every slash command
+Applies admission control, starts per-interaction timing and records completions and failures
+"""
+
+import discord
+from discord import app_commands
+import logging
+import time
+from utils.metrics import metrics, current_labels
+from utils.log_config import correlation_id
+from utils.profiling import profiler
+from utils.admission import admission
+
+logger = logging.getLogger(__name__)
+
+def command_labels(interaction: discord.Interaction):
+    """Get the (command, guild) metric labels for an interaction"""
+    command = interaction.command
+    command_name = command.qualified_name if command else 'unknown'
+    guild_id = str(interaction.guild_id) if interaction.guild_id else 'dm'
+    return command_name, guild_id
+
+class FootballCommandTree(app_commands.CommandTree):
+    """CommandTree that instruments every application command"""
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Apply admission control, then start timing the interaction before its command runs"""
+        command_name, guild_id = command_labels(interaction)
+        current_labels.set((command_name, guild_id))
+        correlation_id.set(str(interaction.id))
+        
+        admitted, retry_after = await admission.admit(interaction, command_name)
+        if not admitted:
+            await admission.reject(interaction, command_name, retry_after)
+            return False
+        
+        interaction.extras['started_at'] = time.perf_counter()
+        profiler.begin(interaction)
+        return True
+    
+    def finish_interaction(self, interaction: discord.Interaction, error: bool = False):
+        """Record latency for a finished interaction and free its admission slot"""
+        admission.release(interaction)
+        profiler.end(interaction)
+        started_at = interaction.extras.pop('started_at', None)
+        if started_at is None:
+            return
+        command_name, guild_id = command_labels(interaction)
+        metrics.observe_command(command_name, guild_id, time.perf_counter() - started_at, error=error)
+    
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        """Record the failure and let the user know"""
+        self.finish_interaction(interaction, error=True)
+        
+        command_name = interaction.command.qualified_name if interaction.command else 'unknown'
+        logger.error(f"Command error in /{command_name}: {error}", exc_info=error)
+        
+        try:
+            if interaction.response.is_done():
+                await interaction.followup.send("❌ An error occurred while processing the command.", ephemeral=True)
+            else:
+                await interaction.response.send_message("❌ An error occurred while processing the command.", ephemeral=True)
+        except discord.HTTPException:
+            pass
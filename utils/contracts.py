@@ -0,0 +1,85 @@
+"""
+Contract expiry index
+Keeps contract expiry times sorted per guild and across all guilds, so expiry
+windows and the next contract to expire are found without scanning every player.
+"""
+
+import bisect
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Sorts after any player id, to make bisect_right include every entry at a timestamp
+_LAST_ID = '\U0010ffff'
+
+def parse_expiry(value) -> Optional[float]:
+    """Timestamp of a contract_expires value, or None when unset or invalid"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+class ContractIndex:
+    """Sorted (expiry timestamp, player id) entries per guild and overall"""
+    
+    def __init__(self):
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        self._by_guild: Dict[str, List[Tuple[float, str]]] = {}
+        self._all: List[Tuple[float, str]] = []
+    
+    def __len__(self) -> int:
+        return len(self._all)
+    
+    def set(self, guild_id, player_id: str, contract_expires):
+        """Index a player's contract expiry, replacing any previous entry"""
+        self.remove(player_id)
+        expires_at = parse_expiry(contract_expires)
+        if expires_at is None:
+            return
+        guild_id = str(guild_id)
+        entry = (expires_at, player_id)
+        self._entries[player_id] = (guild_id, expires_at)
+        bisect.insort(self._by_guild.setdefault(guild_id, []), entry)
+        bisect.insort(self._all, entry)
+    
+    def remove(self, player_id: str):
+        """Drop a player's entry, if any"""
+        indexed = self._entries.pop(player_id, None)
+        if indexed is None:
+            return
+        guild_id, expires_at = indexed
+        entry = (expires_at, player_id)
+        guild_entries = self._by_guild[guild_id]
+        for entries in (guild_entries, self._all):
+            position = bisect.bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+        if not guild_entries:
+            del self._by_guild[guild_id]
+    
+    def clear_guild(self, guild_id):
+        """Drop every entry of a guild"""
+        for _, player_id in list(self._by_guild.get(str(guild_id), [])):
+            self.remove(player_id)
+    
+    def clear(self):
+        self._entries.clear()
+        self._by_guild.clear()
+        self._all.clear()
+    
+    def window(self, guild_id, start: float, end: float) -> List[Tuple[float, str]]:
+        """Entries of a guild expiring between start and end, soonest first"""
+        entries = self._by_guild.get(str(guild_id), [])
+        low = bisect.bisect_left(entries, (start, ''))
+        high = bisect.bisect_right(entries, (end, _LAST_ID))
+        return entries[low:high]
+    
+    def due(self, now: float, limit: int) -> List[str]:
+        """Up to limit player ids whose contracts expired at or before now, oldest first"""
+        high = min(bisect.bisect_right(self._all, (now, _LAST_ID)), limit)
+        return [player_id for _, player_id in self._all[:high]]
+    
+    def next_expiry(self) -> Optional[float]:
+        """Timestamp of the next contract to expire in any guild"""
+        return self._all[0][0] if self._all else None
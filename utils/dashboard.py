@@ -0,0 +1,221 @@
+"""
+Live dashboard broker
+Turns Database change notifications into server-sent event deltas per guild.
+Changes are coalesced per guild, each event is serialized once and the same
+bytes are queued for every viewer, and slow viewers get a fresh snapshot
+instead of an unbounded backlog.
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from utils.deferred import run_blocking
+from utils.league import guild_clubs, guild_players, guild_transfers, league_rows
+
+logger = logging.getLogger(__name__)
+
+RECENT_TRANSFERS = 15
+RECENT_MOVEMENTS = 25
+
+def encode_event(event: str, data: Dict, event_id: Optional[int] = None) -> bytes:
+    """Serialize one server-sent event"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode('utf-8')
+
+class GuildFeed:
+    """Viewers and last published state of one guild"""
+    
+    def __init__(self):
+        self.viewers: Set[asyncio.Queue] = set()
+        self.version = 0
+        self.table: Dict[str, Dict] = {}
+        self.order: List[str] = []
+        self.values: Dict[str, float] = {}
+        self.last_transfer: str = ''
+        self.transfers = deque(maxlen=RECENT_TRANSFERS)
+        self.movements = deque(maxlen=RECENT_MOVEMENTS)
+        self.pending = False
+        self.loaded = False
+
+class DashboardBroker:
+    """Fans out per-guild league deltas to dashboard viewers"""
+    
+    def __init__(self, db, debounce: float = 0.5, queue_size: int = 64):
+        self.db = db
+        self.debounce = debounce
+        self.queue_size = queue_size
+        self.feeds: Dict[str, GuildFeed] = {}
+        self.events_published = 0
+        self.resyncs = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+        db.add_listener(self.on_change)
+    
+    @property
+    def viewer_count(self) -> int:
+        return sum(len(feed.viewers) for feed in self.feeds.values())
+    
+    async def subscribe(self, guild_id: str) -> asyncio.Queue:
+        """Register a viewer; its queue starts with a full snapshot"""
+        self.loop = asyncio.get_running_loop()
+        feed = self.feeds.get(guild_id)
+        if feed is None:
+            feed = self.feeds[guild_id] = GuildFeed()
+        if not feed.loaded:
+            await self._refresh(guild_id, feed)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        queue.put_nowait(self._snapshot_event(feed))
+        feed.viewers.add(queue)
+        return queue
+    
+    def unsubscribe(self, guild_id: str, queue: asyncio.Queue):
+        """Remove a viewer and forget the guild's state once nobody watches it"""
+        feed = self.feeds.get(guild_id)
+        if feed is None:
+            return
+        feed.viewers.discard(queue)
+        if not feed.viewers:
+            del self.feeds[guild_id]
+    
+    def close(self):
+        """Tell every open stream to finish"""
+        for task in self._tasks:
+            task.cancel()
+        for feed in self.feeds.values():
+            for queue in feed.viewers:
+                self._drain(queue)
+                queue.put_nowait(None)
+    
+    def on_change(self, guild_id: str, version: int):
+        """Database listener: schedule one delta for a burst of changes"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Changes made on a worker thread are handed over to the viewers' event loop
+            if self.loop is not None and not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(self.on_change, guild_id, version)
+            return
+        feed = self.feeds.get(guild_id)
+        if feed is None or feed.pending:
+            return
+        feed.pending = True
+        task = loop.create_task(self._publish(guild_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _publish(self, guild_id: str):
+        await asyncio.sleep(self.debounce)
+        feed = self.feeds.get(guild_id)
+        if feed is None:
+            return
+        feed.pending = False
+        try:
+            delta = await self._refresh(guild_id, feed)
+        except Exception as e:
+            logger.error(f"Failed to build dashboard delta for guild {guild_id}: {e}")
+            return
+        if delta is None:
+            return
+        
+        payload = encode_event('delta', delta, feed.version)
+        self.events_published += 1
+        for queue in feed.viewers:
+            if queue.full():
+                # A viewer that cannot keep up skips the backlog and resyncs from a snapshot
+                self._drain(queue)
+                queue.put_nowait(self._snapshot_event(feed))
+                self.resyncs += 1
+            else:
+                queue.put_nowait(payload)
+    
+    def _load(self, guild_id: str):
+        """Read a guild's clubs, players, transfers and data version; runs on a worker thread"""
+        return (guild_clubs(self.db, guild_id), guild_players(self.db, guild_id),
+                guild_transfers(self.db, guild_id), self.db.get_data_version(guild_id))
+    
+    async def _refresh(self, guild_id: str, feed: GuildFeed) -> Optional[Dict]:
+        """Reload the guild's state and return what changed since the last refresh"""
+        # Reads queue behind bulk writes on the worker, in order, so a newer load never lands first
+        clubs, players, transfers, version = await run_blocking(self._load, guild_id)
+        rows = league_rows(clubs, players)
+        first_load = not feed.loaded
+        feed.loaded = True
+        
+        table = {row['id']: row for row in rows}
+        order = [row['id'] for row in rows]
+        changed_rows = [row for row in rows if feed.table.get(row['id']) != row]
+        removed = [club_id for club_id in feed.table if club_id not in table]
+        
+        new_transfers = []
+        for transfer in transfers:
+            if transfer.get('date', '') > feed.last_transfer:
+                new_transfers.append(self._describe_transfer(transfer, clubs, players))
+        if transfers:
+            feed.last_transfer = max(feed.last_transfer, max(t.get('date', '') for t in transfers))
+        
+        now = datetime.now().isoformat()
+        movements = []
+        values = {}
+        for player_id, player in players.items():
+            values[player_id] = player['value']
+            old = feed.values.get(player_id)
+            if old is not None and old != player['value']:
+                club = clubs.get(player.get('club_id'))
+                movements.append({
+                    "player": player['name'],
+                    "club": club['name'] if club else None,
+                    "old": old,
+                    "new": player['value'],
+                    "change_pct": round((player['value'] - old) / old * 100, 2) if old else None,
+                    "at": now
+                })
+        
+        feed.table, feed.order, feed.values = table, order, values
+        feed.version = version
+        feed.transfers.extend(new_transfers[-RECENT_TRANSFERS:])
+        movements.sort(key=lambda m: abs(m['new'] - m['old']), reverse=True)
+        movements = movements[:RECENT_MOVEMENTS]
+        feed.movements.extend(reversed(movements))
+        
+        if first_load or not (changed_rows or removed or new_transfers or movements):
+            return None
+        return {
+            "version": feed.version,
+            "rows": changed_rows,
+            "removed": removed,
+            "order": order,
+            "transfers": new_transfers[-RECENT_TRANSFERS:],
+            "movements": movements
+        }
+    
+    @staticmethod
+    def _describe_transfer(transfer: Dict, clubs: Dict, players: Dict) -> Dict:
+        player = players.get(transfer['player_id'])
+        from_club = clubs.get(transfer.get('from_club'))
+        to_club = clubs.get(transfer.get('to_club'))
+        return {
+            "player": player['name'] if player else transfer['player_id'],
+            "from_club": from_club['name'] if from_club else None,
+            "to_club": to_club['name'] if to_club else None,
+            "amount": transfer.get('amount', 0),
+            "date": transfer.get('date')
+        }
+    
+    def _snapshot_event(self, feed: GuildFeed) -> bytes:
+        return encode_event('snapshot', {
+            "version": feed.version,
+            "rows": [feed.table[club_id] for club_id in feed.order],
+            "transfers": list(feed.transfers),
+            "movements": list(reversed(feed.movements))
+        }, feed.version)
+    
+    @staticmethod
+    def _drain(queue: asyncio.Queue):
+        while not queue.empty():
+            queue.get_nowait()
@@ -3,32 +3,122 @@ Database utility for managing JSON data storage
 Handles clubs, players, and transfer data persistence
 """
 
+import copy
+import functools
 import json
 import os
 import logging
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple
+from utils.metrics import metrics, instrument
+from utils.contracts import ContractIndex
+from utils.value_history import ValueHistory
+from utils.ledger import Ledger, league_account
+from utils.snapshots import SnapshotStore
+from utils.changesets import Changeset, ChangesetLog
+from utils.plans import ChangePlan
+from utils.results import MatchResults
+from utils.player_stats import PlayerStats
 
 logger = logging.getLogger(__name__)
 
+def guild_of(record_id: str) -> str:
+    """Get the guild id prefix of a club or player id"""
+    return str(record_id).split('_', 1)[0]
+
+def synchronized(cls):
+    """Class decorator that serializes every public method on the instance lock, except lock_free ones"""
+    for name, func in list(vars(cls).items()):
+        if name.startswith('_') or not callable(func) or getattr(func, 'lock_free', False):
+            continue
+        setattr(cls, name, _locked(func))
+    return cls
+
+def lock_free(func):
+    """Mark a method that only does atomic reads, so callers on the event loop never wait for a bulk write"""
+    func.lock_free = True
+    return func
+
+def _locked(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        # Everything one call writes to the clubs and players files becomes a single snapshot version
+        with self._lock, self.snapshots.batch():
+            return func(self, *args, **kwargs)
+    return wrapper
+
+@instrument
+@synchronized
 class Database:
-    def __init__(self):
-        self.data_dir = "data"
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = data_dir
         self.clubs_file = os.path.join(self.data_dir, "clubs.json")
         self.players_file = os.path.join(self.data_dir, "players.json")
         self.transfers_file = os.path.join(self.data_dir, "transfers.json")
+        self.settings_file = os.path.join(self.data_dir, "settings.json")
+        self.jobs_file = os.path.join(self.data_dir, "jobs.json")
+        self.value_history_file = os.path.join(self.data_dir, "value_history.json")
+        self.value_journal_file = os.path.join(self.data_dir, "value_history.log")
+        self.ledger_file = os.path.join(self.data_dir, "ledger.log")
+        self.snapshots_base_file = os.path.join(self.data_dir, "snapshots.json")
+        self.snapshots_file = os.path.join(self.data_dir, "snapshots.log")
+        self.changesets_file = os.path.join(self.data_dir, "changesets.log")
+        self.results_file = os.path.join(self.data_dir, "results.log")
+        self.player_stats_file = os.path.join(self.data_dir, "player_stats.log")
+        
+        # Methods may be called from worker threads (see utils.deferred.run_blocking);
+        # each read-modify-write runs under this lock
+        self._lock = threading.RLock()
+        
+        # In-memory per-guild data versions, bumped on every write to a guild's league data.
+        # The epoch changes on restart so clients never reuse versions from a previous process.
+        self.data_epoch = format(int(time.time()), 'x')
+        self._versions: Dict[str, int] = {}
+        self._listeners: List[Callable[[str, int], None]] = []
         
         # Ensure data directory exists
         os.makedirs(self.data_dir, exist_ok=True)
         
+        # Versions of every club and player record, appended to by each write of their files;
+        # records changed while the bot was offline (or before snapshots existed) get a version here
+        self.snapshots = SnapshotStore(self.snapshots_base_file, self.snapshots_file)
+        self._snapshot_files = {self.clubs_file: 'clubs', self.players_file: 'players'}
+        
         # Initialize files if they don't exist
         self._initialize_files()
+        for filename, kind in self._snapshot_files.items():
+            self.snapshots.observe(kind, self._read_json(filename).get(kind, {}))
+        
+        # Sorted contract expiries, built once here and kept current by every write below
+        self.contracts = ContractIndex()
+        for player_id, player in self.get_players().items():
+            self.contracts.set(guild_of(player_id), player_id, player.get('contract_expires'))
+        
+        # Compact per-player value series; every write that changes a value appends to it
+        self.value_history = ValueHistory(self.value_history_file, self.value_journal_file)
+        
+        # Double-entry record of every budget change; budgets set before it existed get an opening entry
+        self.ledger = Ledger(self.ledger_file)
+        self._reconcile_ledger()
+        
+        # Old and new values of the records each recent bulk operation changed, for undo
+        self.changesets = ChangesetLog(self.changesets_file)
+        
+        # Match results with standings kept current as each result is recorded
+        self.results = MatchResults(self.results_file)
+        
+        # Per-match player box scores in columns, with season totals and leaderboards
+        self.player_stats = PlayerStats(self.player_stats_file)
     
     def _initialize_files(self):
         """Initialize JSON files with default structure"""
         default_clubs = {"clubs": {}, "last_updated": None}
         default_players = {"players": {}, "last_updated": None}
         default_transfers = {"transfers": [], "last_updated": None}
+        default_settings = {"guilds": {}, "last_updated": None}
+        default_jobs = {"jobs": {}, "last_updated": None}
         
         if not os.path.exists(self.clubs_file):
             self._write_json(self.clubs_file, default_clubs)
@@ -38,24 +128,145 @@ class Database:
         
         if not os.path.exists(self.transfers_file):
             self._write_json(self.transfers_file, default_transfers)
+        
+        if not os.path.exists(self.settings_file):
+            self._write_json(self.settings_file, default_settings)
+        
+        if not os.path.exists(self.jobs_file):
+            self._write_json(self.jobs_file, default_jobs)
     
     def _read_json(self, filename: str) -> Dict:
         """Read JSON file safely"""
         try:
             with open(filename, 'r', encoding='utf-8') as f:
+                metrics.observe_read(os.path.basename(filename), os.fstat(f.fileno()).st_size)
                 return json.load(f)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             logger.error(f"Error reading {filename}: {e}")
+            metrics.observe_storage_error(os.path.basename(filename))
             return {}
     
-    def _write_json(self, filename: str, data: Dict):
-        """Write JSON file safely"""
+    def _write_json(self, filename: str, data: Dict, touched: Optional[Iterable[str]] = None):
+        """Write JSON file safely; readers never see a half-written file, and failures are logged and re-raised
+        
+        For the clubs and players files, touched names the records the write changed so only
+        those are compared for snapshots; None compares them all.
+        """
         try:
             data['last_updated'] = datetime.now().isoformat()
-            with open(filename, 'w', encoding='utf-8') as f:
+            temp_file = filename + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
+                metrics.observe_write(os.path.basename(filename), f.tell())
+            os.replace(temp_file, filename)
+            if filename in self._snapshot_files:
+                kind = self._snapshot_files[filename]
+                self.snapshots.observe(kind, data.get(kind, {}), touched)
         except Exception as e:
             logger.error(f"Error writing {filename}: {e}")
+            metrics.observe_storage_error(os.path.basename(filename))
+            raise
+    
+    def _touch(self, guild_id):
+        """Mark a guild's league data as changed and notify listeners"""
+        guild_id = str(guild_id)
+        version = self._versions.get(guild_id, 0) + 1
+        self._versions[guild_id] = version
+        for listener in self._listeners:
+            try:
+                listener(guild_id, version)
+            except Exception as e:
+                logger.error(f"Database change listener failed: {e}")
+    
+    def add_listener(self, listener: Callable[[str, int], None]):
+        """Call listener(guild_id, version) after every change to a guild's league data"""
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[str, int], None]):
+        """Stop calling a listener added with add_listener"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _record_values(self, players: Dict, values: Dict[str, float]):
+        """Append new values to the value history; call before overwriting the old ones"""
+        now = time.time()
+        points = []
+        for player_id, new_value in values.items():
+            player = players[player_id]
+            if not self.value_history.has(player_id):
+                # First change since history was kept: start the series with the value it replaces
+                try:
+                    created = datetime.fromisoformat(player['created_at']).timestamp()
+                except (KeyError, TypeError, ValueError):
+                    created = now
+                points.append((player_id, min(created, now), player['value']))
+            points.append((player_id, now, new_value))
+        self.value_history.record(points)
+    
+    def _backfill_ledger(self, clubs: Dict, transfers: List[Dict]):
+        """Post transfers recorded outside the ledger (before it existed, or by the benchmark generator), after an opening balance per club"""
+        history = []
+        for transfer in transfers:
+            try:
+                when = datetime.fromisoformat(transfer['date'])
+            except (KeyError, TypeError, ValueError):
+                when = datetime.now()
+            # The same legs add_transfer posts
+            cents = round(transfer['amount'] * 100)
+            legs = []
+            if transfer.get('from_club') in clubs:
+                legs.append((transfer['from_club'], cents))
+            if transfer.get('to_club') in clubs:
+                legs.append((transfer['to_club'], -cents))
+            if len(legs) == 1:
+                legs.append((league_account(guild_of(legs[0][0])), -legs[0][1]))
+            history.append((when, 'transfer', legs, transfer.get('player_id')))
+        
+        # Opening balances are what the budgets were before those transfers
+        net: Dict[str, int] = {}
+        for _, _, legs, _ in history:
+            for account, delta in legs:
+                net[account] = net.get(account, 0) + delta
+        start = min((when for when, _, _, _ in history), default=datetime.now())
+        openings = []
+        for club_id, club in clubs.items():
+            opening = round(club['budget'] * 100) - net.get(club_id, 0)
+            openings.append((start, 'opening', [(club_id, opening), (league_account(guild_of(club_id)), -opening)], None))
+        # Sorting is stable, so openings stay ahead of transfers made at the same moment
+        posted = self.ledger.post_history(openings + history)
+        if posted:
+            logger.info(f"Posted {len(posted)} ledger entries from existing budgets and transfers")
+    
+    def _reconcile_ledger(self):
+        """Post entries for clubs whose budget differs from their ledger balance"""
+        clubs = self.get_clubs()
+        if not self.ledger.entries:
+            self._backfill_ledger(clubs, self.get_transfers())
+        postings = []
+        for club_id, club in clubs.items():
+            delta = round(club['budget'] * 100) - self.ledger.balance(club_id)
+            kind = 'opening' if not self.ledger.count(club_id) else 'adjustment'
+            postings.append((kind, [(club_id, delta), (league_account(guild_of(club_id)), -delta)], None))
+        for account in list(self.ledger.accounts):
+            if account not in clubs and not account.endswith('_@league'):
+                balance = self.ledger.balance(account)
+                postings.append(('closure', [(account, -balance), (league_account(guild_of(account)), balance)], None))
+        posted = self.ledger.post_many(postings)
+        if posted:
+            logger.info(f"Reconciled {len(posted)} club budget(s) with the ledger")
+    
+    def _post_budgets(self, budgets: Dict[str, float], kind: str, memo: Optional[str] = None):
+        """Post the change from each club's ledger balance to its new budget against the league account"""
+        postings = []
+        for club_id, budget in budgets.items():
+            delta = round(budget * 100) - self.ledger.balance(club_id)
+            postings.append((kind, [(club_id, delta), (league_account(guild_of(club_id)), -delta)], memo))
+        self.ledger.post_many(postings)
+    
+    @lock_free
+    def get_data_version(self, guild_id) -> int:
+        """Get the current data version of a guild"""
+        return self._versions.get(str(guild_id), 0)
     
     # Club management methods
     def get_clubs(self) -> Dict:
@@ -77,32 +288,67 @@ class Database:
                 'players': [],
                 'created_at': datetime.now().isoformat()
             }
-            self._write_json(self.clubs_file, data)
+            self._write_json(self.clubs_file, data, [club_id])
+            self._post_budgets({club_id: budget}, 'opening')
+            self._touch(guild_of(club_id))
             return True
         except Exception as e:
             logger.error(f"Error adding club: {e}")
             return False
     
-    def update_club_budget(self, club_id: str, new_budget: float) -> bool:
-        """Update club budget"""
+    def update_club_budget(self, club_id: str, new_budget: float, reason: str = 'adjustment',
+                           memo: Optional[str] = None) -> bool:
+        """Update club budget, recording the change in the ledger under reason"""
         try:
             data = self._read_json(self.clubs_file)
             if club_id in data['clubs']:
                 data['clubs'][club_id]['budget'] = new_budget
-                self._write_json(self.clubs_file, data)
+                self._write_json(self.clubs_file, data, [club_id])
+                self._post_budgets({club_id: new_budget}, reason, memo)
+                self._touch(guild_of(club_id))
                 return True
             return False
         except Exception as e:
             logger.error(f"Error updating club budget: {e}")
             return False
     
+    def bulk_update_club_budgets(self, budgets: Dict[str, float], reason: str = 'adjustment',
+                                 memo: Optional[str] = None, changeset: Optional[Changeset] = None) -> int:
+        """Update many club budgets with a single write, recording them in changeset if given; returns how many clubs were updated"""
+        try:
+            updated = self._set_club_budgets(budgets, reason, memo, changeset)
+            if updated and changeset is not None:
+                self.changesets.save(changeset)
+            return len(updated)
+        except Exception as e:
+            logger.error(f"Error bulk updating club budgets: {e}")
+            return 0
+    
+    def _set_club_budgets(self, budgets: Dict[str, float], reason: str, memo: Optional[str],
+                          changeset: Optional[Changeset]) -> List[str]:
+        """Write of bulk_update_club_budgets that raises on failure and leaves saving changeset to the caller"""
+        data = self._read_json(self.clubs_file)
+        updated = [cid for cid in budgets if cid in data['clubs']]
+        for club_id in updated:
+            if changeset is not None:
+                changeset.touch('clubs', club_id, {'budget': data['clubs'][club_id]['budget']}, {'budget': budgets[club_id]})
+            data['clubs'][club_id]['budget'] = budgets[club_id]
+        if updated:
+            self._write_json(self.clubs_file, data, updated)
+            self._post_budgets({cid: budgets[cid] for cid in updated}, reason, memo)
+            for guild_id in {guild_of(cid) for cid in updated}:
+                self._touch(guild_id)
+        return updated
+    
     def delete_club(self, club_id: str) -> bool:
         """Delete club"""
         try:
             data = self._read_json(self.clubs_file)
             if club_id in data['clubs']:
                 del data['clubs'][club_id]
-                self._write_json(self.clubs_file, data)
+                self._write_json(self.clubs_file, data, [club_id])
+                self._post_budgets({club_id: 0}, 'closure')
+                self._touch(guild_of(club_id))
                 return True
             return False
         except Exception as e:
@@ -132,30 +378,114 @@ class Database:
                 'contract_expires': None,
                 'created_at': datetime.now().isoformat()
             }
-            self._write_json(self.players_file, data)
+            self._write_json(self.players_file, data, [player_id])
+            self.contracts.remove(player_id)
+            self.value_history.remove([player_id])
+            self.value_history.record([(player_id, time.time(), value)])
             
             # Add player to club if specified
             if club_id:
                 self._add_player_to_club(club_id, player_id)
             
+            self._touch(guild_of(player_id))
             return True
         except Exception as e:
             logger.error(f"Error adding player: {e}")
             return False
     
+    def bulk_add_players(self, players: Dict[str, Dict]) -> int:
+        """Add many players (player_id -> name, value, club_id, position, age, optionally contract_expires and created_at) with one write per file"""
+        try:
+            data = self._read_json(self.players_file)
+            clubs_data = self._read_json(self.clubs_file)
+            now = datetime.now().isoformat()
+            for player_id, player in players.items():
+                data['players'][player_id] = {
+                    'name': player['name'],
+                    'value': player['value'],
+                    'club_id': player.get('club_id'),
+                    'position': player.get('position', ''),
+                    'age': player.get('age', 0),
+                    'contract_expires': player.get('contract_expires'),
+                    'created_at': player.get('created_at', now)
+                }
+                club = clubs_data['clubs'].get(player.get('club_id'))
+                if club is not None and player_id not in club['players']:
+                    club['players'].append(player_id)
+            if players:
+                self._write_json(self.players_file, data, players)
+                self._write_json(self.clubs_file, clubs_data, {player.get('club_id') for player in players.values()})
+                for player_id, player in players.items():
+                    self.contracts.set(guild_of(player_id), player_id, player.get('contract_expires'))
+                self.value_history.remove(players)
+                now = time.time()
+                self.value_history.record((player_id, now, player['value']) for player_id, player in players.items())
+                for guild_id in {guild_of(pid) for pid in players}:
+                    self._touch(guild_id)
+            return len(players)
+        except Exception as e:
+            logger.error(f"Error bulk adding players: {e}")
+            return 0
+    
     def update_player_value(self, player_id: str, new_value: float) -> bool:
         """Update player value"""
         try:
             data = self._read_json(self.players_file)
             if player_id in data['players']:
+                self._record_values(data['players'], {player_id: new_value})
                 data['players'][player_id]['value'] = new_value
-                self._write_json(self.players_file, data)
+                self._write_json(self.players_file, data, [player_id])
+                self._touch(guild_of(player_id))
                 return True
             return False
         except Exception as e:
             logger.error(f"Error updating player value: {e}")
             return False
     
+    def bulk_update_player_values(self, values: Dict[str, float], changeset: Optional[Changeset] = None) -> int:
+        """Update many player values with a single write, recording them in changeset if given; returns how many players were updated"""
+        try:
+            updated = self._set_player_values(values, changeset)
+            if updated and changeset is not None:
+                self.changesets.save(changeset)
+            return len(updated)
+        except Exception as e:
+            logger.error(f"Error bulk updating player values: {e}")
+            return 0
+    
+    def _set_player_values(self, values: Dict[str, float], changeset: Optional[Changeset]) -> List[str]:
+        """Write of bulk_update_player_values that raises on failure and leaves saving changeset to the caller"""
+        data = self._read_json(self.players_file)
+        updated = [pid for pid in values if pid in data['players']]
+        self._record_values(data['players'], {pid: values[pid] for pid in updated})
+        for player_id in updated:
+            if changeset is not None:
+                changeset.touch('players', player_id, {'value': data['players'][player_id]['value']}, {'value': values[player_id]})
+            data['players'][player_id]['value'] = values[player_id]
+        if updated:
+            self._write_json(self.players_file, data, updated)
+            for guild_id in {guild_of(pid) for pid in updated}:
+                self._touch(guild_id)
+        return updated
+    
+    def update_player_fields(self, player_id: str, **fields) -> bool:
+        """Update arbitrary fields of a player (position, age, contract_expires, ...)"""
+        try:
+            data = self._read_json(self.players_file)
+            if player_id in data['players']:
+                if 'value' in fields:
+                    self._record_values(data['players'], {player_id: fields['value']})
+                data['players'][player_id].update(fields)
+                self._write_json(self.players_file, data, [player_id])
+                if 'contract_expires' in fields:
+                    self.contracts.set(guild_of(player_id), player_id, fields['contract_expires'])
+                self._touch(guild_of(player_id))
+                return True
+            return False
+        except Exception as e:
+            logger.error(f"Error updating player fields: {e}")
+            return False
+    
     def delete_player(self, player_id: str) -> bool:
         """Delete player"""
         try:
@@ -164,12 +494,15 @@ class Database:
             if player_id in players_data['players']:
                 club_id = players_data['players'][player_id].get('club_id')
                 del players_data['players'][player_id]
-                self._write_json(self.players_file, players_data)
+                self._write_json(self.players_file, players_data, [player_id])
+                self.contracts.remove(player_id)
+                self.value_history.remove([player_id])
                 
                 # Remove from club if assigned
                 if club_id:
                     self._remove_player_from_club(club_id, player_id)
                 
+                self._touch(guild_of(player_id))
                 return True
             return False
         except Exception as e:
@@ -182,7 +515,7 @@ class Database:
         if club_id in data['clubs']:
             if player_id not in data['clubs'][club_id]['players']:
                 data['clubs'][club_id]['players'].append(player_id)
-                self._write_json(self.clubs_file, data)
+                self._write_json(self.clubs_file, data, [club_id])
     
     def _remove_player_from_club(self, club_id: str, player_id: str):
         """Remove player from club's roster"""
@@ -190,7 +523,7 @@ class Database:
         if club_id in data['clubs']:
             if player_id in data['clubs'][club_id]['players']:
                 data['clubs'][club_id]['players'].remove(player_id)
-                self._write_json(self.clubs_file, data)
+                self._write_json(self.clubs_file, data, [club_id])
     
     # Transfer management methods
     def get_transfers(self) -> List:
@@ -204,7 +537,7 @@ class Database:
             players_data = self._read_json(self.players_file)
             if player_id in players_data['players']:
                 players_data['players'][player_id]['club_id'] = to_club
-                self._write_json(self.players_file, players_data)
+                self._write_json(self.players_file, players_data, [player_id])
             
             # Update club rosters
             if from_club:
@@ -213,11 +546,19 @@ class Database:
             
             # Update club budgets
             clubs_data = self._read_json(self.clubs_file)
+            league = league_account(guild_of(player_id))
+            legs = []
             if from_club and from_club in clubs_data['clubs']:
                 clubs_data['clubs'][from_club]['budget'] += amount
+                legs.append((from_club, round(amount * 100)))
             if to_club in clubs_data['clubs']:
                 clubs_data['clubs'][to_club]['budget'] -= amount
-            self._write_json(self.clubs_file, clubs_data)
+                legs.append((to_club, -round(amount * 100)))
+            self._write_json(self.clubs_file, clubs_data, [from_club, to_club])
+            if len(legs) == 1:
+                # The other side is a free agent signing or a club that no longer exists
+                legs.append((league, -legs[0][1]))
+            self.ledger.post('transfer', legs, memo=player_id)
             
             # Record transfer
             transfers_data = self._read_json(self.transfers_file)
@@ -230,7 +571,570 @@ class Database:
             })
             self._write_json(self.transfers_file, transfers_data)
             
+            self._touch(guild_of(player_id))
             return True
         except Exception as e:
             logger.error(f"Error recording transfer: {e}")
             return False
+    
+    # Contract methods
+    def get_expiring_contracts(self, guild_id, start: datetime, end: datetime) -> List[Tuple[str, datetime]]:
+        """(player_id, expiry) of a guild's contracts expiring between start and end, soonest first"""
+        return [(player_id, datetime.fromtimestamp(expires_at))
+                for expires_at, player_id in self.contracts.window(guild_id, start.timestamp(), end.timestamp())]
+    
+    def next_contract_expiry(self) -> Optional[datetime]:
+        """When the next contract in any guild expires"""
+        expires_at = self.contracts.next_expiry()
+        return datetime.fromtimestamp(expires_at) if expires_at is not None else None
+    
+    def release_expired_contracts(self, now: datetime, limit: int = 100) -> List[Dict]:
+        """Release up to limit players whose contracts expired to free agency, with one write per file"""
+        player_ids = self.contracts.due(now.timestamp(), limit)
+        if not player_ids:
+            return []
+        try:
+            players_data = self._read_json(self.players_file)
+            clubs_data = self._read_json(self.clubs_file)
+            transfers_data = self._read_json(self.transfers_file)
+            date = now.isoformat()
+            
+            released = []
+            club_ids = set()
+            for player_id in player_ids:
+                self.contracts.remove(player_id)
+                player = players_data['players'].get(player_id)
+                if player is None:
+                    continue
+                club_id = player.get('club_id')
+                club_ids.add(club_id)
+                player['contract_expires'] = None
+                player['club_id'] = None
+                club = clubs_data['clubs'].get(club_id)
+                if club is not None and player_id in club['players']:
+                    club['players'].remove(player_id)
+                if club_id:
+                    transfers_data['transfers'].append({
+                        'player_id': player_id,
+                        'from_club': club_id,
+                        'to_club': None,
+                        'amount': 0,
+                        'date': date
+                    })
+                released.append({
+                    'player_id': player_id,
+                    'name': player['name'],
+                    'club': club['name'] if club else None
+                })
+            
+            self._write_json(self.players_file, players_data, player_ids)
+            self._write_json(self.clubs_file, clubs_data, club_ids)
+            self._write_json(self.transfers_file, transfers_data)
+            for guild_id in {guild_of(pid) for pid in player_ids}:
+                self._touch(guild_id)
+            return released
+        except Exception as e:
+            logger.error(f"Error releasing expired contracts: {e}")
+            return []
+    
+    def release_players(self, player_ids: List[str], changeset: Optional[Changeset] = None) -> List[str]:
+        """Release players from their clubs to free agency with one write per file; returns the ids released"""
+        try:
+            released = self._release_players(player_ids, changeset)
+            if released and changeset is not None:
+                self.changesets.save(changeset)
+            return released
+        except Exception as e:
+            logger.error(f"Error releasing players: {e}")
+            return []
+    
+    def _release_players(self, player_ids: List[str], changeset: Optional[Changeset]) -> List[str]:
+        """Write of release_players that raises on failure and leaves saving changeset to the caller"""
+        players_data = self._read_json(self.players_file)
+        clubs_data = self._read_json(self.clubs_file)
+        transfers_data = self._read_json(self.transfers_file)
+        date = datetime.now().isoformat()
+        
+        released = []
+        club_ids = set()
+        for player_id in player_ids:
+            player = players_data['players'].get(player_id)
+            if player is None or not player.get('club_id'):
+                continue
+            club_id = player['club_id']
+            club_ids.add(club_id)
+            club = clubs_data['clubs'].get(club_id)
+            if club is not None and player_id in club['players']:
+                club['players'].remove(player_id)
+            player['club_id'] = None
+            transfer = {
+                'player_id': player_id,
+                'from_club': club_id,
+                'to_club': None,
+                'amount': 0,
+                'date': date
+            }
+            transfers_data['transfers'].append(transfer)
+            if changeset is not None:
+                changeset.touch('players', player_id, {'club_id': club_id}, {'club_id': None})
+                changeset.transfers['added'].append(transfer)
+            released.append(player_id)
+        
+        if released:
+            self._write_json(self.players_file, players_data, released)
+            self._write_json(self.clubs_file, clubs_data, club_ids)
+            self._write_json(self.transfers_file, transfers_data)
+            for guild_id in {guild_of(pid) for pid in released}:
+                self._touch(guild_id)
+        return released
+    
+    def apply_plan(self, plan: ChangePlan, changeset: Optional[Changeset] = None,
+                   snapshot: Optional[str] = None) -> bool:
+        """Write a plan's precomputed changes, snapshotting the guild under a label first if given
+        
+        Returns False without writing if the guild's data changed since the plan was computed.
+        Raises if a write fails; changeset is saved once, after every write succeeded.
+        """
+        if self.get_data_version(plan.guild) != plan.version:
+            return False
+        if snapshot:
+            self.snapshots.take(plan.guild, snapshot)
+        if plan.values:
+            self._set_player_values(plan.new_values(), changeset)
+        if plan.budgets:
+            self._set_club_budgets(plan.new_budgets(), plan.reason, None, changeset)
+        if plan.releases:
+            self._release_players(list(plan.releases), changeset)
+        if changeset is not None and len(changeset):
+            self.changesets.save(changeset)
+        return True
+    
+    # Bulk maintenance methods
+    def rename_club(self, old_club_id: str, new_club_id: str, new_name: str) -> bool:
+        """Move a club to a new id, keeping its roster, player links and transfer history"""
+        try:
+            clubs_data = self._read_json(self.clubs_file)
+            club = clubs_data['clubs'].pop(old_club_id, None)
+            if club is None or new_club_id in clubs_data['clubs']:
+                return False
+            club['name'] = new_name
+            clubs_data['clubs'][new_club_id] = club
+            self._write_json(self.clubs_file, clubs_data, [old_club_id, new_club_id])
+            
+            players_data = self._read_json(self.players_file)
+            moved = []
+            for player_id, player in players_data['players'].items():
+                if player.get('club_id') == old_club_id:
+                    player['club_id'] = new_club_id
+                    moved.append(player_id)
+            self._write_json(self.players_file, players_data, moved)
+            
+            transfers_data = self._read_json(self.transfers_file)
+            for transfer in transfers_data['transfers']:
+                if transfer.get('from_club') == old_club_id:
+                    transfer['from_club'] = new_club_id
+                if transfer.get('to_club') == old_club_id:
+                    transfer['to_club'] = new_club_id
+            self._write_json(self.transfers_file, transfers_data)
+            self.ledger.rename(old_club_id, new_club_id)
+            self.results.rename_club(old_club_id, new_club_id, new_name)
+            
+            self._touch(guild_of(new_club_id))
+            return True
+        except Exception as e:
+            logger.error(f"Error renaming club: {e}")
+            return False
+    
+    def rename_player(self, old_player_id: str, new_player_id: str, new_name: str) -> bool:
+        """Move a player to a new id, keeping their club roster entry and transfer history"""
+        try:
+            players_data = self._read_json(self.players_file)
+            player = players_data['players'].pop(old_player_id, None)
+            if player is None or new_player_id in players_data['players']:
+                return False
+            player['name'] = new_name
+            players_data['players'][new_player_id] = player
+            self._write_json(self.players_file, players_data, [old_player_id, new_player_id])
+            self.contracts.remove(old_player_id)
+            self.contracts.set(guild_of(new_player_id), new_player_id, player.get('contract_expires'))
+            self.value_history.rename(old_player_id, new_player_id)
+            self.results.rename_player(old_player_id, new_player_id, new_name)
+            self.player_stats.rename(old_player_id, new_player_id, new_name)
+            
+            club_id = player.get('club_id')
+            if club_id:
+                clubs_data = self._read_json(self.clubs_file)
+                roster = clubs_data['clubs'].get(club_id, {}).get('players')
+                if roster is not None and old_player_id in roster:
+                    roster[roster.index(old_player_id)] = new_player_id
+                    self._write_json(self.clubs_file, clubs_data, [club_id])
+            
+            transfers_data = self._read_json(self.transfers_file)
+            for transfer in transfers_data['transfers']:
+                if transfer.get('player_id') == old_player_id:
+                    transfer['player_id'] = new_player_id
+            self._write_json(self.transfers_file, transfers_data)
+            
+            self._touch(guild_of(new_player_id))
+            return True
+        except Exception as e:
+            logger.error(f"Error renaming player: {e}")
+            return False
+    
+    def clear_guild_data(self, guild_id, changeset: Optional[Changeset] = None) -> Tuple[int, int]:
+        """Delete all clubs, players, transfers, results and box scores of a guild, keeping the first three in changeset if given; returns (clubs, players) removed"""
+        prefix = f"{guild_id}_"
+        
+        clubs_data = self._read_json(self.clubs_file)
+        clubs_to_remove = [k for k in clubs_data['clubs'] if k.startswith(prefix)]
+        for club_id in clubs_to_remove:
+            club = clubs_data['clubs'].pop(club_id)
+            if changeset is not None:
+                changeset.touch('clubs', club_id, club, None)
+        self._write_json(self.clubs_file, clubs_data, clubs_to_remove)
+        
+        players_data = self._read_json(self.players_file)
+        players_to_remove = [k for k in players_data['players'] if k.startswith(prefix)]
+        for player_id in players_to_remove:
+            player = players_data['players'].pop(player_id)
+            if changeset is not None:
+                changeset.touch('players', player_id, player, None)
+        self._write_json(self.players_file, players_data, players_to_remove)
+        
+        transfers_data = self._read_json(self.transfers_file)
+        if changeset is not None:
+            changeset.transfers['removed'] = [[i, t] for i, t in enumerate(transfers_data['transfers']) if t['player_id'].startswith(prefix)]
+        transfers_data['transfers'] = [t for t in transfers_data['transfers'] if not t['player_id'].startswith(prefix)]
+        self._write_json(self.transfers_file, transfers_data)
+        if changeset is not None:
+            self.changesets.save(changeset)
+        
+        self.contracts.clear_guild(guild_id)
+        self.value_history.remove(players_to_remove)
+        self.ledger.clear_guild(guild_id)
+        self.snapshots.clear_guild(guild_id)
+        self.results.clear_guild(guild_id)
+        self.player_stats.clear_guild(guild_id)
+        self._touch(guild_id)
+        return len(clubs_to_remove), len(players_to_remove)
+    
+    def reset(self) -> Tuple[int, int, int]:
+        """Delete all clubs, players and transfers for every guild; returns the counts removed"""
+        clubs = self.get_clubs()
+        players = self.get_players()
+        transfers = self.get_transfers()
+        guild_ids = {guild_of(k) for k in clubs} | {guild_of(k) for k in players}
+        
+        self._write_json(self.clubs_file, {"clubs": {}, "last_updated": None})
+        self._write_json(self.players_file, {"players": {}, "last_updated": None})
+        self._write_json(self.transfers_file, {"transfers": [], "last_updated": None})
+        self.contracts.clear()
+        self.value_history.clear()
+        self.ledger.clear()
+        self.snapshots.clear()
+        self.changesets.clear()
+        self.results.clear()
+        self.player_stats.clear()
+        
+        for guild_id in guild_ids:
+            self._touch(guild_id)
+        return len(clubs), len(players), len(transfers)
+    
+    # Guild settings methods
+    def get_guild_settings(self, guild_id) -> Dict:
+        """Get settings for a guild"""
+        return self._read_json(self.settings_file).get('guilds', {}).get(str(guild_id), {})
+    
+    def update_guild_settings(self, guild_id, **settings) -> bool:
+        """Update settings for a guild"""
+        try:
+            data = self._read_json(self.settings_file)
+            guild_settings = data.setdefault('guilds', {}).setdefault(str(guild_id), {})
+            guild_settings.update(settings)
+            self._write_json(self.settings_file, data)
+            return True
+        except Exception as e:
+            logger.error(f"Error updating guild settings: {e}")
+            return False
+    
+    # Ledger methods
+    def get_ledger(self, club_id: str, offset: int = 0, limit: int = 10) -> Tuple[int, List[Dict]]:
+        """Get (entry count, entries newest first) of a club's ledger with change, balance and counterparties"""
+        rows = []
+        for entry, change, balance in self.ledger.history(club_id, offset, limit):
+            rows.append({
+                'id': entry['id'],
+                'date': datetime.fromtimestamp(entry['ts']),
+                'kind': entry['kind'],
+                'memo': entry.get('memo'),
+                'change': change / 100,
+                'balance': balance / 100,
+                'counterparties': [account for account, _ in entry['legs'] if account != club_id]
+            })
+        return self.ledger.count(club_id), rows
+    
+    def get_balance_at(self, club_id: str, when: datetime) -> float:
+        """Get a club's budget as it was at a point in time"""
+        return self.ledger.balance_at(club_id, when) / 100
+    
+    def get_ledger_totals(self, club_id: str) -> Dict[str, Dict]:
+        """Get per-kind credited, debited and entry count totals of a club's ledger"""
+        return {kind: {'credited': credited / 100, 'debited': debited / 100, 'count': count}
+                for kind, (credited, debited, count) in self.ledger.totals(club_id).items()}
+    
+    # Snapshot methods
+    def take_snapshot(self, guild_id, label: str) -> Dict:
+        """Name the current state of a guild's clubs and players"""
+        snapshot = self.snapshots.take(guild_id, label)
+        return {'label': label, 'version': snapshot['version'], 'date': datetime.fromtimestamp(snapshot['ts'])}
+    
+    def get_snapshot(self, guild_id, label: str) -> Optional[Dict]:
+        """Get the newest snapshot of a guild with this label"""
+        snapshot = self.snapshots.find(guild_id, label)
+        if snapshot is None:
+            return None
+        return {'label': label, 'version': snapshot['version'], 'date': datetime.fromtimestamp(snapshot['ts'])}
+    
+    def get_snapshots(self, guild_id) -> List[Dict]:
+        """Get a guild's snapshots, newest first"""
+        return [{'label': s['label'], 'version': s['version'], 'date': datetime.fromtimestamp(s['ts'])}
+                for s in reversed(self.snapshots.snapshots.get(str(guild_id), []))]
+    
+    def get_snapshot_version(self, when: datetime) -> int:
+        """Get the snapshot version that was current at a point in time"""
+        return self.snapshots.version_at(when)
+    
+    def get_league_at(self, guild_id, version: int) -> Tuple[Dict, Dict]:
+        """Get (clubs, players) of a guild as they were at a snapshot version; the records are read-only"""
+        return (self.snapshots.records_at('clubs', guild_id, version),
+                self.snapshots.records_at('players', guild_id, version))
+    
+    # Match result methods
+    def record_results(self, guild_id, matches: List[Dict]) -> List[Dict]:
+        """Record match results with one journal write and update the standings; returns them with their ids
+        
+        Raises ValueError if a club already has a result on one of the matches' matchdays.
+        """
+        for matchday in {match['matchday'] for match in matches if match['matchday'] is not None}:
+            recorded = self.results.on_matchday(guild_id, matchday)
+            clashes = [match[side + '_name'] for match in matches if match['matchday'] == matchday
+                       for side in ('home', 'away') if match[side] in recorded]
+            if clashes:
+                raise ValueError(f"{', '.join(clashes[:5])} already played on matchday {matchday}")
+        stored = self.results.add(guild_id, matches)
+        if stored:
+            self._touch(guild_id)
+        return copy.deepcopy(stored)
+    
+    def delete_result(self, guild_id, match_id: int) -> Optional[Tuple[Dict, int]]:
+        """Delete a recorded match and its box scores, taking it out of the standings; returns (match, box scores removed), or None if the guild has no such match"""
+        match = self.results.delete(guild_id, match_id)
+        if match is None:
+            return None
+        removed = self.player_stats.remove_match(guild_id, match_id)
+        self._touch(guild_id)
+        return copy.deepcopy(match), removed
+    
+    def get_results(self, guild_id, club_id: Optional[str] = None, offset: int = 0,
+                    limit: int = 10) -> Tuple[int, List[Dict]]:
+        """Get (match count, matches most recently recorded first) of a guild or one of its clubs"""
+        return (self.results.count(guild_id, club_id),
+                copy.deepcopy(self.results.results(guild_id, club_id, offset, limit)))
+    
+    def get_standings(self, guild_id) -> List[Dict]:
+        """Get a guild's standings table, top first; each row holds club_id and its totals"""
+        return [{'club_id': club_id, **standing.to_dict()} for club_id, standing in self.results.table(guild_id)]
+    
+    def get_played_fixtures(self, guild_id) -> Dict[Tuple[str, str], int]:
+        """Get how often each (home, away) pairing of a guild has been played"""
+        return self.results.played(guild_id)
+    
+    def get_matchday_results(self, guild_id, matchday: int) -> Dict[str, List[Dict]]:
+        """Get each club's recorded matches of a matchday"""
+        return copy.deepcopy(self.results.on_matchday(guild_id, matchday))
+    
+    # Player statistics methods
+    def record_box_scores(self, guild_id, columns: Dict[str, List]) -> int:
+        """Add box score rows (match, player, name and each stat column) in one append; returns rows added
+        
+        Raises ValueError if a player already has a box score for one of the matches.
+        """
+        duplicates = self.player_stats.duplicates(guild_id, columns['match'], columns['player'])
+        if duplicates:
+            shown = ", ".join(f"{columns['name'][i]} in #{columns['match'][i]}" for i in duplicates[:5])
+            raise ValueError(f"{len(duplicates)} box score(s) already recorded: {shown}")
+        added = self.player_stats.add(guild_id, columns)
+        if added:
+            self._touch(guild_id)
+        return added
+    
+    def get_stat_leaders(self, guild_id, stat: str, limit: int = 10) -> List[Dict]:
+        """Get the top players of a guild by goals or assists, each with player_id, name and season totals"""
+        return [{'player_id': player_id, 'name': name, **totals}
+                for player_id, name, totals in self.player_stats.leaders(guild_id, stat, limit)]
+    
+    def get_player_season_stats(self, player_id: str) -> Optional[Dict[str, int]]:
+        """Get a player's appearances and stat totals, or None without box scores"""
+        return self.player_stats.totals(player_id)
+    
+    # Changeset methods
+    @staticmethod
+    def _changeset_summary(changeset: Changeset) -> Dict:
+        return {
+            'id': changeset.id,
+            'operation': changeset.operation,
+            'user': changeset.user,
+            'date': datetime.fromtimestamp(changeset.ts),
+            'records': len(changeset),
+            'undone': changeset.undone
+        }
+    
+    def get_changesets(self, guild_id) -> List[Dict]:
+        """Get summaries of a guild's recent bulk operations, newest first"""
+        return [self._changeset_summary(c) for c in reversed(self.changesets.changesets.get(str(guild_id), []))]
+    
+    def get_changeset(self, guild_id, changeset_id: Optional[str] = None) -> Optional[Dict]:
+        """Get the summary of a guild's changeset, or of its newest one not undone yet"""
+        changeset = self.changesets.get(guild_id, changeset_id) if changeset_id else self.changesets.latest(guild_id)
+        return self._changeset_summary(changeset) if changeset else None
+    
+    def undo_changeset(self, guild_id, changeset_id: str) -> Tuple[int, List[str]]:
+        """Restore the old values of a changeset with one write per file; returns (records restored, conflicting ids)
+        
+        Nothing changes if any touched record was modified since, or if the changeset is unknown or already undone.
+        """
+        changeset = self.changesets.get(guild_id, changeset_id)
+        if changeset is None or changeset.undone:
+            return 0, []
+        try:
+            players_data = self._read_json(self.players_file)
+            clubs_data = self._read_json(self.clubs_file)
+            players, clubs = players_data['players'], clubs_data['clubs']
+            club_changes, player_changes = changeset.records['clubs'], changeset.records['players']
+            
+            conflicts = []
+            for records, changes in ((clubs, club_changes), (players, player_changes)):
+                for record_id, (old, new) in changes.items():
+                    current = records.get(record_id)
+                    if new is None:
+                        changed = current is not None
+                    else:
+                        changed = current is None or any(current.get(field) != value for field, value in new.items())
+                    if changed:
+                        conflicts.append(record_id)
+            # Released players can only go back to clubs that still exist or come back with them
+            restored_clubs = {club_id for club_id, (old, new) in club_changes.items() if new is None}
+            for player_id, (old, new) in player_changes.items():
+                club_id = old.get('club_id') if old and new else None
+                if club_id and club_id not in clubs and club_id not in restored_clubs:
+                    conflicts.append(club_id)
+            if conflicts:
+                return 0, conflicts
+            
+            # Value history first, while players still hold the values being replaced
+            self._record_values(players, {pid: old['value'] for pid, (old, new) in player_changes.items()
+                                          if old and new and 'value' in old})
+            
+            budgets = {}
+            # Clubs whose fields come back, and those whose rosters gain or lose a player below
+            touched_clubs = set(club_changes)
+            for club_id, (old, new) in club_changes.items():
+                if old is None:
+                    del clubs[club_id]
+                    budgets[club_id] = 0
+                elif new is None:
+                    clubs[club_id] = copy.deepcopy(old)
+                    budgets[club_id] = old['budget']
+                else:
+                    clubs[club_id].update(old)
+                    if 'budget' in old:
+                        budgets[club_id] = old['budget']
+            
+            now = time.time()
+            for player_id, (old, new) in player_changes.items():
+                if old is None:
+                    player = players.pop(player_id)
+                    touched_clubs.add(player.get('club_id'))
+                    roster = clubs.get(player.get('club_id'), {}).get('players')
+                    if roster is not None and player_id in roster:
+                        roster.remove(player_id)
+                    self.contracts.remove(player_id)
+                    self.value_history.remove([player_id])
+                elif new is None:
+                    players[player_id] = copy.deepcopy(old)
+                    self.contracts.set(guild_of(player_id), player_id, old.get('contract_expires'))
+                    self.value_history.record([(player_id, now, old['value'])])
+                else:
+                    player = players[player_id]
+                    if 'club_id' in old and old['club_id'] != player.get('club_id'):
+                        touched_clubs.update((old['club_id'], player.get('club_id')))
+                        roster = clubs.get(player.get('club_id'), {}).get('players')
+                        if roster is not None and player_id in roster:
+                            roster.remove(player_id)
+                        roster = clubs.get(old['club_id'], {}).get('players')
+                        if roster is not None and player_id not in roster:
+                            roster.append(player_id)
+                    player.update(old)
+            
+            self._write_json(self.clubs_file, clubs_data, touched_clubs)
+            self._write_json(self.players_file, players_data, player_changes)
+            if changeset.transfers['added'] or changeset.transfers['removed']:
+                transfers_data = self._read_json(self.transfers_file)
+                key = lambda t: (t['player_id'], t['from_club'], t['to_club'], t['amount'], t['date'])
+                added = {key(t) for t in changeset.transfers['added']}
+                kept = iter(t for t in transfers_data['transfers'] if key(t) not in added)
+                # Put removed transfers back at their old positions, merging in one pass
+                transfers = []
+                for position, transfer in changeset.transfers['removed']:
+                    while len(transfers) < position:
+                        following = next(kept, None)
+                        if following is None:
+                            break
+                        transfers.append(following)
+                    transfers.append(transfer)
+                transfers.extend(kept)
+                transfers_data['transfers'] = transfers
+                self._write_json(self.transfers_file, transfers_data)
+            self._post_budgets(budgets, 'undo', changeset.id)
+            self.changesets.mark_undone(changeset)
+            
+            self._touch(guild_id)
+            return len(changeset), []
+        except Exception as e:
+            logger.error(f"Error undoing changeset {changeset_id}: {e}")
+            return 0, []
+    
+    # Value history methods
+    def get_value_history(self, player_id: str) -> Tuple[int, List[Tuple[datetime, float]]]:
+        """Get (series version, [(time, value)]) of a player's recorded values, oldest first"""
+        points = [(datetime.fromtimestamp(ts), value) for ts, value in self.value_history.points(player_id)]
+        return self.value_history.version(player_id), points
+    
+    # Scheduled job methods
+    def get_jobs(self) -> Dict:
+        """Get all scheduled jobs"""
+        return self._read_json(self.jobs_file).get('jobs', {})
+    
+    def save_job(self, job_id: str, job: Dict) -> bool:
+        """Create or replace a scheduled job"""
+        try:
+            data = self._read_json(self.jobs_file)
+            data.setdefault('jobs', {})[job_id] = job
+            self._write_json(self.jobs_file, data)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving job: {e}")
+            return False
+    
+    def delete_job(self, job_id: str) -> bool:
+        """Delete a scheduled job"""
+        try:
+            data = self._read_json(self.jobs_file)
+            if job_id in data.get('jobs', {}):
+                del data['jobs'][job_id]
+                self._write_json(self.jobs_file, data)
+                return True
+            return False
+        except Exception as e:
+            logger.error(f"Error deleting job: {e}")
+            return False
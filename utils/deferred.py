@@ -0,0 +1,145 @@
+"""
+Deferred responses for slow commands
+Acknowledges the interaction before the command does any work and turns the
+command's response into an edit of the "thinking..." placeholder. Blocking work
+runs on a worker thread with run_blocking, and long operations can show progress.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import discord
+
+from utils.profiling import profiler
+
+logger = logging.getLogger(__name__)
+
+# Storage calls serialize on the Database lock anyway; a small pool keeps them queued here
+# instead of many threads contending for that lock with the event loop thread
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv('BLOCKING_WORKERS', 1)), thread_name_prefix='blocking')
+
+class DeferredResponse:
+    """Stands in for InteractionResponse after the interaction was deferred"""
+    
+    def __init__(self, interaction: discord.Interaction, ephemeral: bool):
+        self._interaction = interaction
+        self._ephemeral = ephemeral
+        self._sent = False
+    
+    def is_done(self) -> bool:
+        return self._sent
+    
+    async def defer(self, **kwargs):
+        """Already deferred"""
+    
+    async def send_message(self, content: Optional[str] = None, *, embed: Optional[discord.Embed] = None,
+                           embeds=None, file: Optional[discord.File] = None, files=None,
+                           view: Optional[discord.ui.View] = None, ephemeral: bool = False):
+        """Replace the placeholder with the command's response"""
+        if self._sent:
+            raise discord.InteractionResponded(self._interaction)
+        self._sent = True
+        
+        if embed is not None:
+            embeds = [embed]
+        if file is not None:
+            files = [file]
+        
+        if ephemeral and not self._ephemeral:
+            # The placeholder is public; swap it for a private followup
+            kwargs = {key: value for key, value in
+                      (('embeds', embeds), ('files', files), ('view', view)) if value is not None}
+            await self._interaction.delete_original_response()
+            await self._interaction.followup.send(content, ephemeral=True, **kwargs)
+            return
+        
+        kwargs = {'content': content, 'embeds': embeds or [], 'attachments': files or []}
+        if view is not None:
+            kwargs['view'] = view
+        await self._interaction.edit_original_response(**kwargs)
+
+class DeferredInteraction:
+    """Interaction proxy whose response methods target the deferred placeholder"""
+    
+    def __init__(self, interaction: discord.Interaction, ephemeral: bool):
+        self._interaction = interaction
+        self.response = DeferredResponse(interaction, ephemeral)
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._interaction, name)
+
+def deferred(ephemeral: bool = False):
+    """Decorator for slow command callbacks: defer first, then answer by editing the placeholder"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            if interaction.response.is_done():
+                return await func(self, interaction, *args, **kwargs)
+            await interaction.response.defer(thinking=True, ephemeral=ephemeral)
+            return await func(self, DeferredInteraction(interaction, ephemeral), *args, **kwargs)
+        return wrapper
+    return decorator
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run blocking or CPU-bound work on a worker thread so the event loop keeps serving other guilds
+    
+    Calls made for an interaction under /profile are profiled on the worker and included in the report.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor, functools.partial(context.run, profiler.run, func, *args, **kwargs))
+
+class Progress:
+    """Periodically edits the original response with how far a long operation got
+    
+    Use as `async with Progress(interaction, title, total) as progress:` and call
+    progress.advance() from the work, including from a run_blocking thread. Nothing
+    is shown for operations that finish within the first interval.
+    """
+    
+    def __init__(self, interaction: discord.Interaction, title: str, total: int, interval: float = 1.5):
+        self.interaction = interaction
+        self.title = title
+        self.total = max(total, 1)
+        self.interval = interval
+        self.done = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    def advance(self, count: int = 1):
+        self.done += count
+    
+    def embed(self) -> discord.Embed:
+        fraction = min(self.done / self.total, 1.0)
+        filled = int(fraction * 20)
+        return discord.Embed(
+            title=self.title,
+            description=f"`{'█' * filled}{'░' * (20 - filled)}` {fraction:.0%}\n{self.done:,} of {self.total:,}",
+            color=discord.Color.blue()
+        )
+    
+    async def _report(self):
+        shown = None
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.done == shown:
+                continue
+            shown = self.done
+            try:
+                await self.interaction.edit_original_response(embed=self.embed(), view=None)
+            except discord.HTTPException as e:
+                logger.warning(f"Could not update progress for {self.title}: {e}")
+    
+    async def __aenter__(self) -> 'Progress':
+        self._task = asyncio.create_task(self._report())
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
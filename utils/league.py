@@ -0,0 +1,66 @@
+"""
+League data helpers shared by the web API and the live dashboard
+Filters storage records down to one guild and builds league table rows
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+def guild_clubs(db, guild_id) -> Dict:
+    """Get the clubs belonging to a guild"""
+    prefix = f"{guild_id}_"
+    return {k: v for k, v in db.get_clubs().items() if k.startswith(prefix)}
+
+def guild_players(db, guild_id) -> Dict:
+    """Get the players belonging to a guild"""
+    prefix = f"{guild_id}_"
+    return {k: v for k, v in db.get_players().items() if k.startswith(prefix)}
+
+def guild_transfers(db, guild_id) -> List:
+    """Get the transfers belonging to a guild, oldest first"""
+    prefix = f"{guild_id}_"
+    return [t for t in db.get_transfers() if t['player_id'].startswith(prefix)]
+
+def league_as_of(db, guild_id, as_of: str) -> Tuple[Dict, Dict, datetime, str]:
+    """Get (clubs, players, time, description) of a guild at a snapshot name or a date
+    
+    A date (YYYY-MM-DD) means the end of that day; YYYY-MM-DD HH:MM is also accepted.
+    Raises ValueError for unknown snapshots, malformed dates and dates in the future.
+    """
+    as_of = as_of.strip()
+    snapshot = db.get_snapshot(guild_id, as_of)
+    if snapshot is not None:
+        clubs, players = db.get_league_at(guild_id, snapshot['version'])
+        return clubs, players, snapshot['date'], f"Snapshot '{as_of}' ({snapshot['date']:%Y-%m-%d %H:%M})"
+    
+    for date_format, span in (("%Y-%m-%d %H:%M", timedelta(minutes=1)), ("%Y-%m-%d", timedelta(days=1))):
+        try:
+            start = datetime.strptime(as_of, date_format)
+        except ValueError:
+            continue
+        if start > datetime.now():
+            raise ValueError(f"{as_of} is in the future")
+        when = start + span - timedelta(microseconds=1)
+        clubs, players = db.get_league_at(guild_id, db.get_snapshot_version(when))
+        return clubs, players, when, f"As of {as_of}"
+    raise ValueError(f"'{as_of}' is not a snapshot name or a date (YYYY-MM-DD)")
+
+def league_rows(clubs: Dict, players: Dict) -> List[Dict]:
+    """Rank clubs by total value (budget + squad value), as in /league_table"""
+    rows = []
+    for club_id, club in clubs.items():
+        club_players = [players[pid] for pid in club.get('players', []) if pid in players]
+        squad_value = sum(player['value'] for player in club_players)
+        rows.append({
+            "id": club_id,
+            "name": club['name'],
+            "total_value": club['budget'] + squad_value,
+            "budget": club['budget'],
+            "squad_value": squad_value,
+            "player_count": len(club_players)
+        })
+    
+    rows.sort(key=lambda r: r['total_value'], reverse=True)
+    for rank, row in enumerate(rows, 1):
+        row['rank'] = rank
+    return rows
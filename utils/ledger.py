@@ -0,0 +1,204 @@
+"""
+Budget ledger
+Every change to a club budget is posted as a double-entry record whose legs sum
+to zero: transfers move money between the two clubs, and admin changes move it
+between a club and its league account. Entries are appended to a journal file,
+and each account keeps the running balance after every entry, so the current
+balance and the balance at any date take a binary search.
+"""
+
+import bisect
+import json
+import logging
+import os
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def league_account(guild_id) -> str:
+    """Account on the other side of budget changes that do not come from another club"""
+    return f"{guild_id}_@league"
+
+def _guild(account: str) -> str:
+    return account.split('_', 1)[0]
+
+class Account:
+    """Entries of one account with the running balance after each"""
+    
+    __slots__ = ('times', 'balances', 'entries', 'totals')
+    
+    def __init__(self):
+        self.times = array('d')
+        self.balances = array('q')
+        self.entries = array('q')
+        # kind -> [credited cents, debited cents, entry count]
+        self.totals: Dict[str, List[int]] = {}
+    
+    @property
+    def balance(self) -> int:
+        return self.balances[-1] if self.balances else 0
+    
+    def add(self, ts: float, delta: int, entry_id: int, kind: str):
+        # Entries arrive in time order, except when the clock steps back
+        self.times.append(max(ts, self.times[-1]) if self.times else ts)
+        self.balances.append(self.balance + delta)
+        self.entries.append(entry_id)
+        totals = self.totals.setdefault(kind, [0, 0, 0])
+        totals[0 if delta > 0 else 1] += abs(delta)
+        totals[2] += 1
+
+class Ledger:
+    """Append-only double-entry budget ledger
+    
+    Amounts are integer cents. Not thread-safe on its own; Database calls it under its lock.
+    """
+    
+    def __init__(self, journal_file: str):
+        self.journal_file = journal_file
+        self.entries: Dict[int, Dict] = {}
+        self.accounts: Dict[str, Account] = {}
+        self.next_id = 1
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                metrics.observe_read(os.path.basename(self.journal_file), os.fstat(f.fileno()).st_size)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-write
+                        break
+                    if 'legs' in record:
+                        self._apply(record)
+                    elif record.get('op') == 'rename':
+                        self._rename(record['old'], record['new'])
+                    elif record.get('op') == 'clear_guild':
+                        self._clear_guild(record['guild'])
+        except FileNotFoundError:
+            pass
+    
+    def _journal(self, records: List[Dict]):
+        if not records:
+            return
+        text = ''.join(json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n' for record in records)
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(text)
+            metrics.observe_write(os.path.basename(self.journal_file), len(text))
+        except OSError as e:
+            logger.error(f"Error writing {self.journal_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.journal_file))
+    
+    def _apply(self, entry: Dict):
+        self.entries[entry['id']] = entry
+        self.next_id = max(self.next_id, entry['id'] + 1)
+        for account, delta in entry['legs']:
+            self.accounts.setdefault(account, Account()).add(entry['ts'], delta, entry['id'], entry['kind'])
+    
+    def _rename(self, old: str, new: str):
+        account = self.accounts.pop(old, None)
+        if account is None:
+            return
+        self.accounts[new] = account
+        for entry_id in account.entries:
+            for leg in self.entries[entry_id]['legs']:
+                if leg[0] == old:
+                    leg[0] = new
+    
+    def _clear_guild(self, guild_id: str):
+        for account in [a for a in self.accounts if _guild(a) == guild_id]:
+            for entry_id in self.accounts.pop(account).entries:
+                self.entries.pop(entry_id, None)
+    
+    def _post(self, ts: float, kind: str, legs: List[Tuple[str, int]], memo: Optional[str]) -> Optional[Dict]:
+        legs = [[account, int(cents)] for account, cents in legs if cents]
+        if not legs:
+            return None
+        if sum(cents for _, cents in legs) != 0:
+            raise ValueError(f"unbalanced {kind} entry: {legs}")
+        entry = {'id': self.next_id, 'ts': ts, 'kind': kind, 'legs': legs}
+        if memo:
+            entry['memo'] = memo
+        self._apply(entry)
+        return entry
+    
+    def post_many(self, postings: Iterable[Tuple[str, List[Tuple[str, int]], Optional[str]]],
+                  when: Optional[datetime] = None) -> List[Dict]:
+        """Post (kind, [(account, cents)], memo) entries with one journal write; zero legs are dropped"""
+        ts = (when or datetime.now()).timestamp()
+        posted = [entry for entry in (self._post(ts, kind, legs, memo) for kind, legs, memo in postings) if entry]
+        self._journal(posted)
+        return posted
+    
+    def post_history(self, postings: Iterable[Tuple[datetime, str, List[Tuple[str, int]], Optional[str]]]) -> List[Dict]:
+        """Post dated (when, kind, legs, memo) entries, oldest first, with one journal write"""
+        postings = sorted(postings, key=lambda posting: posting[0])
+        posted = [entry for entry in (self._post(when.timestamp(), kind, legs, memo)
+                                      for when, kind, legs, memo in postings) if entry]
+        self._journal(posted)
+        return posted
+    
+    def post(self, kind: str, legs: List[Tuple[str, int]], memo: Optional[str] = None,
+             when: Optional[datetime] = None) -> Optional[Dict]:
+        """Post one entry; returns None when every leg is zero"""
+        posted = self.post_many([(kind, legs, memo)], when)
+        return posted[0] if posted else None
+    
+    def rename(self, old: str, new: str):
+        """Move an account's history to a new id"""
+        self._rename(old, new)
+        self._journal([{'op': 'rename', 'old': old, 'new': new}])
+    
+    def clear_guild(self, guild_id):
+        """Forget every account and entry of a guild"""
+        self._clear_guild(str(guild_id))
+        self._journal([{'op': 'clear_guild', 'guild': str(guild_id)}])
+    
+    def clear(self):
+        """Forget everything and empty the journal"""
+        self.entries.clear()
+        self.accounts.clear()
+        try:
+            open(self.journal_file, 'w').close()
+        except OSError as e:
+            logger.error(f"Error clearing {self.journal_file}: {e}")
+    
+    def balance(self, account: str) -> int:
+        found = self.accounts.get(account)
+        return found.balance if found else 0
+    
+    def balance_at(self, account: str, when: datetime) -> int:
+        """Balance of an account just after when"""
+        found = self.accounts.get(account)
+        if found is None:
+            return 0
+        position = bisect.bisect_right(found.times, when.timestamp())
+        return found.balances[position - 1] if position else 0
+    
+    def count(self, account: str) -> int:
+        found = self.accounts.get(account)
+        return len(found.entries) if found else 0
+    
+    def history(self, account: str, offset: int = 0, limit: int = 10) -> List[Tuple[Dict, int, int]]:
+        """(entry, change, balance after) for an account, newest first"""
+        found = self.accounts.get(account)
+        if found is None:
+            return []
+        end = len(found.entries) - offset
+        rows = []
+        for position in range(end - 1, max(end - limit, 0) - 1, -1):
+            entry = self.entries[found.entries[position]]
+            previous = found.balances[position - 1] if position else 0
+            rows.append((entry, found.balances[position] - previous, found.balances[position]))
+        return rows
+    
+    def totals(self, account: str) -> Dict[str, List[int]]:
+        """kind -> [credited cents, debited cents, entry count] for an account"""
+        found = self.accounts.get(account)
+        return {kind: list(values) for kind, values in found.totals.items()} if found else {}
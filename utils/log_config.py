@@ -0,0 +1,108 @@
+"""
+Logging configuration
+Log records are queued on the calling thread and written to disk by a
+background listener, with size-based rotation, gzip-compressed backups and
+optional JSON output carrying per-interaction correlation ids.
+"""
+
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+from utils.metrics import current_labels
+
+# Id of the interaction being handled on this task, attached to every log record
+correlation_id: ContextVar[Optional[str]] = ContextVar('correlation_id', default=None)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s%(correlation)s - %(message)s'
+
+class CorrelationFilter(logging.Filter):
+    """Copy the correlation id and command labels onto records while still in the caller's context"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        cid = correlation_id.get()
+        command, guild = current_labels.get()
+        record.correlation_id = cid
+        record.command = command if cid else None
+        record.guild = guild if cid else None
+        record.correlation = f" [{cid}]" if cid else ""
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, 'correlation_id', None):
+            entry["correlation_id"] = record.correlation_id
+            entry["command"] = record.command
+            entry["guild"] = record.guild
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Renders message arguments and tracebacks on the caller, leaving layout to the listener"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def setup_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """Install a queue-backed root logger; stop the returned listener on shutdown
+    
+    LOG_FILE (default bot.log), LOG_MAX_BYTES (default 10 MiB), LOG_BACKUP_COUNT
+    (default 5) and LOG_FORMAT (text or json) control the output.
+    """
+    formatter = JsonFormatter() if os.getenv('LOG_FORMAT', 'text').lower() == 'json' else logging.Formatter(TEXT_FORMAT)
+    
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.getenv('LOG_FILE', 'bot.log'),
+        maxBytes=int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        backupCount=int(os.getenv('LOG_BACKUP_COUNT', 5)),
+        encoding='utf-8'
+    )
+    file_handler.namer = _gzip_namer
+    file_handler.rotator = _gzip_rotator
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationFilter())
+    
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    
+    listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
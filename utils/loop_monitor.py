@@ -0,0 +1,119 @@
+"""
+Event loop lag monitor and blocking-call watchdog
+Measures how late the bot's event loop wakes up and logs what blocked it
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class LoopMonitor:
+    """Background task that samples event loop lag, plus a watchdog thread"""
+    
+    def __init__(self, interval: float = 0.25, threshold: float = 0.5, window: int = 2400):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples = deque(maxlen=window)
+        self.stalls = 0
+        self._heartbeat = time.monotonic()
+        self._reported_heartbeat = None
+        self._loop_thread_id = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start sampling on the running loop and launch the watchdog thread"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._watchdog.start()
+        logger.info(f"Event loop monitor started (threshold {self.threshold * 1000:.0f}ms)")
+    
+    def stop(self):
+        """Stop sampling and the watchdog thread"""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    async def _sample(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.samples.append(lag)
+            self._heartbeat = time.monotonic()
+            if lag > self.threshold:
+                logger.warning(f"Event loop lag of {lag * 1000:.0f}ms")
+    
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for > self.threshold and self._reported_heartbeat != heartbeat:
+                self._reported_heartbeat = heartbeat
+                self.stalls += 1
+                self._report_stall(blocked_for)
+    
+    def _report_stall(self, blocked_for: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        project_frames = [f for f in stack if f.filename.startswith(PROJECT_ROOT)]
+        
+        location = "outside project code"
+        if project_frames:
+            culprit = project_frames[-1]
+            location = f"{culprit.name} ({self._relative(culprit.filename)}:{culprit.lineno})"
+            if len(project_frames) > 1:
+                caller = project_frames[-2]
+                location += f" called from {caller.name} ({self._relative(caller.filename)}:{caller.lineno})"
+        
+        logger.warning(
+            f"Event loop blocked for {blocked_for * 1000:.0f}ms in {location}\n"
+            + "".join(traceback.format_list(stack[-12:]))
+        )
+    
+    @staticmethod
+    def _relative(filename: str) -> str:
+        return os.path.relpath(filename, PROJECT_ROOT)
+    
+    def current_block(self) -> float:
+        """Seconds the loop has currently been unresponsive beyond the sample interval"""
+        if self._task is None:
+            return 0.0
+        return max(0.0, time.monotonic() - self._heartbeat - self.interval)
+    
+    def percentiles(self) -> Dict[str, float]:
+        """Lag percentiles over the sample window, in milliseconds"""
+        samples = sorted(self.samples)
+        if not samples:
+            return {"p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        
+        def pick(fraction):
+            return round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000, 2)
+        
+        return {
+            "p50_ms": pick(0.50),
+            "p90_ms": pick(0.90),
+            "p99_ms": pick(0.99),
+            "max_ms": round(samples[-1] * 1000, 2)
+        }
+
+loop_monitor = LoopMonitor()
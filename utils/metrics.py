@@ -0,0 +1,203 @@
+"""
+Metrics registry for command latency and storage I/O
+Collects counters and histograms and renders them in Prometheus text format
+"""
+
+import functools
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (command, guild) of the interaction currently being handled on this task
+current_labels: ContextVar[Tuple[str, str]] = ContextVar('current_labels', default=('none', 'none'))
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets"""
+    
+    __slots__ = ('counts', 'total', 'count')
+    
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Thread-safe store for all bot metrics"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.command_latency: Dict[Tuple, Histogram] = {}
+        self.command_calls: Dict[Tuple, int] = {}
+        self.command_errors: Dict[Tuple, int] = {}
+        self.db_latency: Dict[Tuple, Histogram] = {}
+        self.db_calls: Dict[Tuple, int] = {}
+        self.db_errors: Dict[Tuple, int] = {}
+        self.storage_reads: Dict[Tuple, int] = {}
+        self.storage_writes: Dict[Tuple, int] = {}
+        self.storage_read_bytes: Dict[Tuple, int] = {}
+        self.storage_write_bytes: Dict[Tuple, int] = {}
+        self.storage_errors: Dict[Tuple, int] = {}
+        self.startup_seconds: Dict[Tuple, float] = {}
+        self.admission_decisions: Dict[Tuple, int] = {}
+        self.job_latency: Dict[Tuple, Histogram] = {}
+        self.job_runs: Dict[Tuple, int] = {}
+    
+    @staticmethod
+    def _inc(counter: Dict[Tuple, int], key: Tuple, amount: int = 1):
+        counter[key] = counter.get(key, 0) + amount
+    
+    def observe_command(self, command: str, guild: str, seconds: float, error: bool = False):
+        """Record one finished command invocation"""
+        key = (command, guild)
+        with self._lock:
+            self.command_latency.setdefault(key, Histogram()).observe(seconds)
+            self._inc(self.command_calls, key)
+            if error:
+                self._inc(self.command_errors, key)
+    
+    def observe_db_call(self, method: str, seconds: float, error: bool = False):
+        """Record one Database method call for the current command"""
+        command, _ = current_labels.get()
+        with self._lock:
+            self.db_latency.setdefault((method,), Histogram()).observe(seconds)
+            self._inc(self.db_calls, (method, command))
+            if error:
+                self._inc(self.db_errors, (method, command))
+    
+    def observe_read(self, filename: str, size: int):
+        """Record a JSON file being parsed"""
+        key = current_labels.get() + (filename,)
+        with self._lock:
+            self._inc(self.storage_reads, key)
+            self._inc(self.storage_read_bytes, key, size)
+    
+    def observe_write(self, filename: str, size: int):
+        """Record a JSON file being written"""
+        key = current_labels.get() + (filename,)
+        with self._lock:
+            self._inc(self.storage_writes, key)
+            self._inc(self.storage_write_bytes, key, size)
+    
+    def observe_storage_error(self, filename: str):
+        """Record a failed JSON read or write"""
+        with self._lock:
+            self._inc(self.storage_errors, (filename,))
+    
+    def observe_startup_step(self, step: str, seconds: float):
+        """Record how long a startup step (cog load, command sync) took on this boot"""
+        with self._lock:
+            self.startup_seconds[(step,)] = seconds
+    
+    def observe_admission(self, command: str, guild: str, outcome: str):
+        """Record an admission decision (admitted, delayed, rejected or busy)"""
+        with self._lock:
+            self._inc(self.admission_decisions, (command, guild, outcome))
+    
+    def observe_job(self, kind: str, seconds: float, outcome: str):
+        """Record one scheduled job run (ok or failed)"""
+        with self._lock:
+            self.job_latency.setdefault((kind,), Histogram()).observe(seconds)
+            self._inc(self.job_runs, (kind, outcome))
+    
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            self._render_histogram(lines, 'bot_command_duration_seconds', 'Slash command latency',
+                                   ('command', 'guild'), self.command_latency)
+            self._render_counter(lines, 'bot_command_calls_total', 'Slash command invocations',
+                                 ('command', 'guild'), self.command_calls)
+            self._render_counter(lines, 'bot_command_errors_total', 'Slash command failures',
+                                 ('command', 'guild'), self.command_errors)
+            self._render_histogram(lines, 'bot_db_method_duration_seconds', 'Database method latency',
+                                   ('method',), self.db_latency)
+            self._render_counter(lines, 'bot_db_method_calls_total', 'Database method calls',
+                                 ('method', 'command'), self.db_calls)
+            self._render_counter(lines, 'bot_db_method_errors_total', 'Database method failures',
+                                 ('method', 'command'), self.db_errors)
+            self._render_counter(lines, 'bot_storage_reads_total', 'JSON files parsed',
+                                 ('command', 'guild', 'file'), self.storage_reads)
+            self._render_counter(lines, 'bot_storage_read_bytes_total', 'Bytes read from JSON files',
+                                 ('command', 'guild', 'file'), self.storage_read_bytes)
+            self._render_counter(lines, 'bot_storage_writes_total', 'JSON files written',
+                                 ('command', 'guild', 'file'), self.storage_writes)
+            self._render_counter(lines, 'bot_storage_write_bytes_total', 'Bytes written to JSON files',
+                                 ('command', 'guild', 'file'), self.storage_write_bytes)
+            self._render_counter(lines, 'bot_storage_errors_total', 'Failed JSON reads and writes',
+                                 ('file',), self.storage_errors)
+            self._render_counter(lines, 'bot_admission_decisions_total', 'Admission control decisions',
+                                 ('command', 'guild', 'outcome'), self.admission_decisions)
+            self._render_histogram(lines, 'bot_job_duration_seconds', 'Scheduled job run time',
+                                   ('kind',), self.job_latency)
+            self._render_counter(lines, 'bot_job_runs_total', 'Scheduled job runs',
+                                 ('kind', 'outcome'), self.job_runs)
+            self._render_gauge(lines, 'bot_startup_step_seconds', 'Duration of startup steps on the last boot',
+                               ('step',), self.startup_seconds)
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    def _labels(names: Tuple, values: Tuple, extra: str = '') -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}'
+    
+    def _render_counter(self, lines: list, name: str, help_text: str, label_names: Tuple, values: Dict):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for key, value in values.items():
+            lines.append(f'{name}{self._labels(label_names, key)} {value}')
+    
+    def _render_gauge(self, lines: list, name: str, help_text: str, label_names: Tuple, values: Dict):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        for key, value in values.items():
+            lines.append(f'{name}{self._labels(label_names, key)} {value}')
+    
+    def _render_histogram(self, lines: list, name: str, help_text: str, label_names: Tuple, values: Dict):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for key, histogram in values.items():
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += count
+                bucket_labels = self._labels(label_names, key, 'le="%s"' % bound)
+                lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+            bucket_labels = self._labels(label_names, key, 'le="+Inf"')
+            lines.append(f'{name}_bucket{bucket_labels} {histogram.count}')
+            lines.append(f'{name}_sum{self._labels(label_names, key)} {histogram.total}')
+            lines.append(f'{name}_count{self._labels(label_names, key)} {histogram.count}')
+
+metrics = MetricsRegistry()
+
+def instrument(cls):
+    """Class decorator that times every public method of a storage class"""
+    for name, func in list(vars(cls).items()):
+        if name.startswith('_') or not callable(func):
+            continue
+        setattr(cls, name, _timed(name, func))
+    return cls
+
+def _timed(name: str, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            metrics.observe_db_call(name, time.perf_counter() - start, error=True)
+            raise
+        metrics.observe_db_call(name, time.perf_counter() - start)
+        return result
+    return wrapper
@@ -6,33 +6,88 @@ Handles admin permission checking and validation
 import discord
 from discord.ext import commands
 import logging
+from typing import Dict, Set, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_ADMIN_ROLE_NAMES = ['Admin', 'Administrator', 'Moderator', 'Staff']
+
+class PermissionCache:
+    """Per-guild cache of admin role ids and per-member admin flags
+    
+    Member flags are keyed on the member's current role ids, taken from the
+    interaction payload, so role changes are picked up without the members
+    intent or a cached member list.
+    """
+    
+    def __init__(self):
+        self._admin_role_ids: Dict[int, Set[int]] = {}
+        self._member_flags: Dict[int, Dict[Tuple[int, Tuple[int, ...]], bool]] = {}
+    
+    def get_admin_role_names(self, interaction: discord.Interaction) -> List[str]:
+        """Get the configured admin role names for the interaction's guild"""
+        db = getattr(interaction.client, 'db', None)
+        if db is None:
+            return DEFAULT_ADMIN_ROLE_NAMES
+        return db.get_guild_settings(interaction.guild.id).get('admin_roles', DEFAULT_ADMIN_ROLE_NAMES)
+    
+    def get_admin_role_ids(self, interaction: discord.Interaction) -> Set[int]:
+        """Resolve admin role names to role ids, once per guild"""
+        guild = interaction.guild
+        role_ids = self._admin_role_ids.get(guild.id)
+        if role_ids is None:
+            role_names = set(self.get_admin_role_names(interaction))
+            role_ids = {role.id for role in guild.roles if role.name in role_names}
+            self._admin_role_ids[guild.id] = role_ids
+        return role_ids
+    
+    def is_admin(self, interaction: discord.Interaction) -> bool:
+        """Check the cached admin flag, resolving it on first use"""
+        guild = interaction.guild
+        member = interaction.user
+        guild_flags = self._member_flags.setdefault(guild.id, {})
+        key = (member.id, tuple(sorted(role.id for role in member.roles)))
+        
+        flag = guild_flags.get(key)
+        if flag is None:
+            flag = (
+                member.guild_permissions.administrator
+                or guild.owner_id == member.id
+                or any(role.id in self.get_admin_role_ids(interaction) for role in member.roles)
+            )
+            guild_flags[key] = flag
+        return flag
+    
+    def invalidate_guild(self, guild_id: int):
+        """Drop all cached permission data for a guild"""
+        self._admin_role_ids.pop(guild_id, None)
+        self._member_flags.pop(guild_id, None)
+    
+    def invalidate_member(self, guild_id: int, member_id: int):
+        """Drop the cached admin flags for a single member"""
+        guild_flags = self._member_flags.get(guild_id, {})
+        for key in [key for key in guild_flags if key[0] == member_id]:
+            del guild_flags[key]
+
+permission_cache = PermissionCache()
+
 def check_admin(interaction: discord.Interaction) -> bool:
     """Check if user has administrator permissions"""
     try:
-        # Check if user has administrator permission
-        if interaction.user.guild_permissions.administrator:
-            return True
-        
-        # Check if user is server owner
-        if interaction.guild.owner_id == interaction.user.id:
-            return True
-        
-        # Check for specific admin roles (optional)
-        admin_role_names = ['Admin', 'Administrator', 'Moderator', 'Staff']
-        user_roles = [role.name for role in interaction.user.roles]
-        
-        for role_name in admin_role_names:
-            if role_name in user_roles:
-                return True
-        
-        return False
+        return permission_cache.is_admin(interaction)
     except Exception as e:
         logger.error(f"Error checking admin permissions: {e}")
         return False
 
+def check_server_admin(interaction: discord.Interaction) -> bool:
+    """Check if user is the server owner or has Discord's Administrator permission, ignoring admin roles"""
+    try:
+        member = interaction.user
+        return member.guild_permissions.administrator or interaction.guild.owner_id == member.id
+    except Exception as e:
+        logger.error(f"Error checking server admin permissions: {e}")
+        return False
+
 def admin_only():
     """Decorator to restrict commands to admins only"""
     async def predicate(interaction: discord.Interaction):
@@ -0,0 +1,53 @@
+"""
+Change plans for bulk operations
+A bulk command first computes every new value into a ChangePlan and shows a preview;
+applying writes exactly those values, and only if the guild's data version is still
+the one the plan was computed from.
+"""
+
+import heapq
+from typing import Dict, List, Tuple
+
+# Largest changes listed in a preview
+PREVIEW_MOVERS = 5
+
+class ChangePlan:
+    """Precomputed old and new values of one bulk operation on a guild"""
+    
+    def __init__(self, guild_id, operation: str, version: int, reason: str = 'adjustment'):
+        self.guild = str(guild_id)
+        self.operation = operation
+        # Guild data version the plan was computed from
+        self.version = version
+        # Ledger reason for budget changes
+        self.reason = reason
+        # record id -> (old, new)
+        self.values: Dict[str, Tuple[float, float]] = {}
+        self.budgets: Dict[str, Tuple[float, float]] = {}
+        # player id -> club the player is released from
+        self.releases: Dict[str, str] = {}
+        # record id -> display name
+        self.names: Dict[str, str] = {}
+    
+    def __len__(self) -> int:
+        return len(self.values) + len(self.budgets) + len(self.releases)
+    
+    def new_values(self) -> Dict[str, float]:
+        return {record_id: new for record_id, (old, new) in self.values.items()}
+    
+    def new_budgets(self) -> Dict[str, float]:
+        return {record_id: new for record_id, (old, new) in self.budgets.items()}
+    
+    @staticmethod
+    def delta(changes: Dict[str, Tuple[float, float]]) -> float:
+        """Total change of values or budgets"""
+        return sum(new - old for old, new in changes.values())
+    
+    def movers(self, changes: Dict[str, Tuple[float, float]], limit: int = PREVIEW_MOVERS) -> List[str]:
+        """Lines for the largest absolute changes"""
+        largest = heapq.nlargest(limit, changes.items(), key=lambda item: abs(item[1][1] - item[1][0]))
+        lines = []
+        for record_id, (old, new) in largest:
+            percent = f" ({(new / old - 1) * 100:+.1f}%)" if old else ""
+            lines.append(f"• {self.names.get(record_id, record_id)}: €{old:,.2f} → €{new:,.2f}{percent}")
+        return lines
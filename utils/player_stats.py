@@ -0,0 +1,240 @@
+"""
+Player match statistics
+Box scores are stored per guild as columns (match, player, minutes, goals, ...) in
+numpy arrays, and a whole matchday is added with one slice assignment per column and
+one journal line. Per-player season totals are updated from the same batch with
+np.add.at. Leaderboards rank by a stat and then by when a player was first recorded,
+so a player's rank key only changes when the player is in a batch and then only gets
+better; re-ranking a leaderboard's current members with the batch's players therefore
+keeps it exact.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STAT_COLUMNS = ('minutes', 'goals', 'assists', 'clean_sheets', 'yellow_cards', 'red_cards')
+# Season totals: appearances, then one row per stat column
+TOTAL_ROWS = ('appearances',) + STAT_COLUMNS
+# Stats with a maintained leaderboard, and how many players each keeps
+LEADERBOARD_STATS = ('goals', 'assists')
+LEADERBOARD_SIZE = 50
+
+def _guild(player_id: str) -> str:
+    return player_id.split('_', 1)[0]
+
+def _grow(array: np.ndarray, needed: int) -> np.ndarray:
+    """Array with room for needed entries along its last axis, doubling the capacity"""
+    capacity = array.shape[-1]
+    if needed <= capacity:
+        return array
+    grown = np.zeros(array.shape[:-1] + (max(needed, capacity * 2, 64),), dtype=array.dtype)
+    grown[..., :capacity] = array
+    return grown
+
+class GuildStats:
+    """Box score columns, per-player totals and leaderboards of one guild"""
+    
+    def __init__(self):
+        self.size = 0
+        self.matches = np.zeros(0, dtype=np.int64)
+        self.players = np.zeros(0, dtype=np.int32)
+        self.stats = np.zeros((len(STAT_COLUMNS), 0), dtype=np.int32)
+        # Player index -> id and name; ids are stable, so renames only relabel
+        self.player_ids: List[str] = []
+        self.names: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.totals = np.zeros((len(TOTAL_ROWS), 0), dtype=np.int64)
+        self.leaders: Dict[str, np.ndarray] = {stat: np.zeros(0, dtype=np.int64) for stat in LEADERBOARD_STATS}
+        # (match id, player index) pairs with a box score, to reject duplicates
+        self.recorded: Set[Tuple[int, int]] = set()
+    
+    def player_index(self, player_id: str, name: str) -> int:
+        index = self.index.get(player_id)
+        if index is None:
+            index = self.index[player_id] = len(self.player_ids)
+            self.player_ids.append(player_id)
+            self.names.append(name)
+            self.totals = _grow(self.totals, index + 1)
+        return index
+    
+    def append(self, matches: np.ndarray, players: np.ndarray, stats: np.ndarray):
+        """Add a batch of box score rows; stats has one row per STAT_COLUMNS entry"""
+        count = len(matches)
+        end = self.size + count
+        self.matches = _grow(self.matches, end)
+        self.players = _grow(self.players, end)
+        self.stats = _grow(self.stats, end)
+        self.matches[self.size:end] = matches
+        self.players[self.size:end] = players
+        self.stats[:, self.size:end] = stats
+        self.size = end
+        
+        np.add.at(self.totals[0], players, 1)
+        np.add.at(self.totals[1:], (slice(None), players), stats)
+        self.recorded.update(zip(matches.tolist(), players.tolist()))
+        
+        touched = np.unique(players)
+        for stat in LEADERBOARD_STATS:
+            candidates = np.union1d(self.leaders[stat], touched)
+            self.leaders[stat] = self._rank(stat, candidates)[:LEADERBOARD_SIZE]
+    
+    def remove_match(self, match_id: int) -> int:
+        """Drop a match's box score rows and subtract them from the totals; returns how many rows went"""
+        rows = self.matches[:self.size] == match_id
+        count = int(rows.sum())
+        if not count:
+            return 0
+        players = self.players[:self.size][rows]
+        np.subtract.at(self.totals[0], players, 1)
+        np.subtract.at(self.totals[1:], (slice(None), players), self.stats[:, :self.size][:, rows])
+        self.recorded.difference_update((match_id, player) for player in players.tolist())
+        
+        kept = ~rows
+        end = self.size - count
+        self.matches[:end] = self.matches[:self.size][kept]
+        self.players[:end] = self.players[:self.size][kept]
+        self.stats[:, :end] = self.stats[:, :self.size][:, kept]
+        self.size = end
+        
+        # Totals only went down, so players outside a leaderboard may now belong in it
+        everyone = np.arange(len(self.player_ids))
+        for stat in LEADERBOARD_STATS:
+            self.leaders[stat] = self._rank(stat, everyone)[:LEADERBOARD_SIZE]
+        return count
+    
+    def _rank(self, stat: str, candidates: np.ndarray) -> np.ndarray:
+        """Candidates with the stat, highest first, ties going to the player recorded first
+        
+        The tie-break must not change for players outside a batch, so it cannot be minutes.
+        """
+        values = self.totals[TOTAL_ROWS.index(stat), candidates]
+        order = np.lexsort((candidates, -values))
+        ranked = candidates[order]
+        return ranked[self.totals[TOTAL_ROWS.index(stat), ranked] > 0]
+    
+    def player_totals(self, index: int) -> Dict[str, int]:
+        return {row: int(self.totals[i, index]) for i, row in enumerate(TOTAL_ROWS)}
+
+class PlayerStats:
+    """Box scores of every guild, backed by an append-only journal of column batches
+    
+    Not thread-safe on its own; Database calls it under its lock.
+    """
+    
+    def __init__(self, journal_file: str):
+        self.journal_file = journal_file
+        self.guilds: Dict[str, GuildStats] = {}
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                metrics.observe_read(os.path.basename(self.journal_file), os.fstat(f.fileno()).st_size)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-write
+                        break
+                    if record.get('op') == 'add':
+                        self._apply(record['guild'], record['columns'])
+                    elif record.get('op') == 'remove_match':
+                        self._remove_match(record['guild'], record['match'])
+                    elif record.get('op') == 'rename':
+                        self._rename(record['old'], record['new'], record['name'])
+                    elif record.get('op') == 'clear_guild':
+                        self.guilds.pop(record['guild'], None)
+        except FileNotFoundError:
+            pass
+    
+    def _journal(self, record: Dict):
+        text = json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n'
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(text)
+            metrics.observe_write(os.path.basename(self.journal_file), len(text))
+        except OSError as e:
+            logger.error(f"Error writing {self.journal_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.journal_file))
+    
+    def _apply(self, guild_id: str, columns: Dict[str, List]):
+        guild = self.guilds.setdefault(guild_id, GuildStats())
+        players = np.array([guild.player_index(player_id, name)
+                            for player_id, name in zip(columns['player'], columns['name'])], dtype=np.int32)
+        stats = np.array([columns[stat] for stat in STAT_COLUMNS], dtype=np.int32).reshape(len(STAT_COLUMNS), -1)
+        guild.append(np.array(columns['match'], dtype=np.int64), players, stats)
+    
+    def _remove_match(self, guild_id: str, match_id: int) -> int:
+        guild = self.guilds.get(guild_id)
+        return guild.remove_match(match_id) if guild is not None else 0
+    
+    def _rename(self, old: str, new: str, name: str):
+        guild = self.guilds.get(_guild(old))
+        if guild is None or old not in guild.index:
+            return
+        index = guild.index.pop(old)
+        guild.index[new] = index
+        guild.player_ids[index] = new
+        guild.names[index] = name
+    
+    def duplicates(self, guild_id, matches: List[int], player_ids: List[str]) -> List[int]:
+        """Positions of the (match id, player id) pairs that already have a box score"""
+        guild = self.guilds.get(str(guild_id))
+        if guild is None:
+            return []
+        return [i for i, (match, player_id) in enumerate(zip(matches, player_ids))
+                if player_id in guild.index and (match, guild.index[player_id]) in guild.recorded]
+    
+    def add(self, guild_id, columns: Dict[str, List]) -> int:
+        """Add box score rows given as equal-length columns: match, player, name and every stat"""
+        if not columns['match']:
+            return 0
+        self._apply(str(guild_id), columns)
+        self._journal({'op': 'add', 'guild': str(guild_id), 'columns': columns})
+        return len(columns['match'])
+    
+    def leaders(self, guild_id, stat: str, limit: int) -> List[Tuple[str, str, Dict[str, int]]]:
+        """(player id, name, totals) of the top players by a leaderboard stat"""
+        guild = self.guilds.get(str(guild_id))
+        if guild is None:
+            return []
+        return [(guild.player_ids[i], guild.names[i], guild.player_totals(i)) for i in guild.leaders[stat][:limit].tolist()]
+    
+    def totals(self, player_id: str) -> Optional[Dict[str, int]]:
+        guild = self.guilds.get(_guild(player_id))
+        if guild is None or player_id not in guild.index:
+            return None
+        return guild.player_totals(guild.index[player_id])
+    
+    def remove_match(self, guild_id, match_id: int) -> int:
+        """Drop every box score of a match; returns how many there were"""
+        removed = self._remove_match(str(guild_id), match_id)
+        if removed:
+            self._journal({'op': 'remove_match', 'guild': str(guild_id), 'match': match_id})
+        return removed
+    
+    def rename(self, old: str, new: str, name: str):
+        """Move a player's box scores to a new id and name"""
+        self._rename(old, new, name)
+        self._journal({'op': 'rename', 'old': old, 'new': new, 'name': name})
+    
+    def clear_guild(self, guild_id):
+        """Forget every box score of a guild"""
+        self.guilds.pop(str(guild_id), None)
+        self._journal({'op': 'clear_guild', 'guild': str(guild_id)})
+    
+    def clear(self):
+        """Forget everything and empty the journal"""
+        self.guilds.clear()
+        try:
+            open(self.journal_file, 'w').close()
+        except OSError as e:
+            logger.error(f"Error clearing {self.journal_file}: {e}")
@@ -0,0 +1,175 @@
+"""
+On-demand command profiling
+Runs cProfile around a guild's next interactions and builds a text report
+"""
+
+import asyncio
+import contextvars
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Session profiling the current interaction; run_blocking copies the context, so worker calls see it too
+profiled_session: contextvars.ContextVar[Optional['ProfileSession']] = contextvars.ContextVar('profiled_session', default=None)
+
+class ProfileSession:
+    """A profiling window for one guild"""
+    
+    def __init__(self, guild_id: int, channel, interactions: int, seconds: int, started_by: str):
+        self.guild_id = guild_id
+        self.channel = channel
+        self.remaining = interactions
+        self.seconds = seconds
+        self.started_by = started_by
+        self.started_at = datetime.now()
+        self.profile = cProfile.Profile()
+        # One profile per run_blocking call, merged into the report
+        self.worker_profiles: List[cProfile.Profile] = []
+        self.active = 0
+        self.profiled = 0
+        # cog name -> command name -> [calls, total seconds]
+        self.command_times: Dict[str, Dict[str, list]] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class Profiler:
+    """Manages the single active profiling session"""
+    
+    def __init__(self):
+        self.session: Optional[ProfileSession] = None
+    
+    def start(self, guild_id: int, channel, interactions: int, seconds: int, started_by: str) -> bool:
+        """Start profiling a guild's next interactions; False if a session is already running"""
+        if self.session is not None:
+            return False
+        self.session = ProfileSession(guild_id, channel, interactions, seconds, started_by)
+        if seconds > 0:
+            self.session.timer = asyncio.get_running_loop().call_later(seconds, self._stop, self.session)
+        logger.info(f"Profiling started for guild {guild_id}: {interactions} interaction(s), {seconds}s")
+        return True
+    
+    def begin(self, interaction: discord.Interaction):
+        """Enable the profiler when a profiled guild's interaction starts"""
+        session = self.session
+        if session is None or interaction.guild_id != session.guild_id or session.remaining <= 0:
+            return
+        session.remaining -= 1
+        interaction.extras['profile_started_at'] = time.perf_counter()
+        if session.active == 0:
+            session.profile.enable()
+        session.active += 1
+        profiled_session.set(session)
+    
+    def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Call func on a worker thread, under its own profiler if the calling interaction is being profiled"""
+        session = profiled_session.get()
+        if session is None or session is not self.session:
+            return func(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            session.worker_profiles.append(profile)
+    
+    def end(self, interaction: discord.Interaction):
+        """Disable the profiler when a profiled interaction finishes"""
+        started_at = interaction.extras.pop('profile_started_at', None)
+        session = self.session
+        if started_at is None or session is None:
+            return
+        session.active -= 1
+        if session.active == 0:
+            session.profile.disable()
+        session.profiled += 1
+        
+        command = interaction.command
+        cog_name = command.binding.__class__.__name__ if command and command.binding else 'NoCog'
+        command_name = command.qualified_name if command else 'unknown'
+        entry = session.command_times.setdefault(cog_name, {}).setdefault(command_name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += time.perf_counter() - started_at
+        
+        if session.remaining <= 0 and session.active == 0:
+            self._stop(session)
+    
+    def _stop(self, session: ProfileSession):
+        if self.session is not session:
+            return
+        self.session = None
+        if session.timer is not None:
+            session.timer.cancel()
+        if session.active:
+            session.profile.disable()
+        asyncio.get_running_loop().create_task(self._send_report(session))
+    
+    async def _send_report(self, session: ProfileSession):
+        report = build_report(session)
+        filename = f"profile_{session.guild_id}_{session.started_at.strftime('%Y%m%d_%H%M%S')}.txt"
+        try:
+            await session.channel.send(
+                f"📈 Profiling finished: {session.profiled} interaction(s) captured.",
+                file=discord.File(fp=io.BytesIO(report.encode('utf-8')), filename=filename)
+            )
+        except discord.HTTPException as e:
+            logger.error(f"Failed to send profile report: {e}")
+
+def _module_group(filename: str) -> str:
+    """Group a profiled file into a cog, a project module or a library"""
+    if filename.startswith(PROJECT_ROOT):
+        relative = os.path.relpath(filename, PROJECT_ROOT)
+        return relative[:-3] if relative.endswith('.py') else relative
+    if 'discord' in filename.split(os.sep):
+        return 'discord.py'
+    if filename.startswith('~') or filename.startswith('<'):
+        return 'builtins'
+    return 'stdlib/other'
+
+def build_report(session: ProfileSession) -> str:
+    """Render per-cog timings and cumulative cProfile stats as text"""
+    out = io.StringIO()
+    out.write(f"Profile for guild {session.guild_id}\n")
+    out.write(f"Started {session.started_at.isoformat()} by {session.started_by}\n")
+    out.write(f"Interactions captured: {session.profiled}\n")
+    out.write(f"Worker calls captured: {len(session.worker_profiles)}\n")
+    out.write("Note: the event loop thread is profiled as a whole, so overlapping work from other guilds can appear;\n"
+              "run_blocking calls are profiled on their worker thread and merged in.\n\n")
+    
+    out.write("== Wall time per cog and command ==\n")
+    for cog_name, commands in sorted(session.command_times.items(), key=lambda x: -sum(t for _, t in x[1].values())):
+        cog_total = sum(t for _, t in commands.values())
+        out.write(f"{cog_name}: {cog_total * 1000:.1f}ms\n")
+        for command_name, (calls, total) in sorted(commands.items(), key=lambda x: -x[1][1]):
+            out.write(f"    /{command_name}: {calls} call(s), {total * 1000:.1f}ms total, {total / calls * 1000:.1f}ms avg\n")
+    
+    if session.profiled == 0:
+        out.write("\nNo interactions were profiled.\n")
+        return out.getvalue()
+    
+    stats = pstats.Stats(session.profile)
+    if session.worker_profiles:
+        stats.add(*session.worker_profiles)
+    
+    out.write("\n== Self time by module ==\n")
+    module_times: Dict[str, float] = {}
+    for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items():
+        group = _module_group(filename)
+        module_times[group] = module_times.get(group, 0.0) + tottime
+    for group, tottime in sorted(module_times.items(), key=lambda x: -x[1]):
+        out.write(f"{tottime * 1000:10.1f}ms  {group}\n")
+    
+    out.write("\n== Functions by cumulative time ==\n")
+    stats.stream = out
+    stats.sort_stats('cumulative').print_stats(60)
+    return out.getvalue()
+
+profiler = Profiler()
@@ -0,0 +1,338 @@
+"""
+Match results and standings
+Results are appended to a journal, one line per batch, so a whole matchday is stored
+atomically. Each guild's standings table is kept in memory and updated per result by
+adding it to the two clubs' rows, so recording a result never recomputes the table.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Results shown in a club's form guide
+FORM_LENGTH = 5
+
+def _guild(club_id: str) -> str:
+    return club_id.split('_', 1)[0]
+
+def _outcome(scored: int, conceded: int) -> str:
+    return 'W' if scored > conceded else 'D' if scored == conceded else 'L'
+
+class Standing:
+    """One club's row of the standings table"""
+    
+    __slots__ = ('name', 'played', 'won', 'drawn', 'lost', 'goals_for', 'goals_against', 'points', 'form')
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.played = self.won = self.drawn = self.lost = 0
+        self.goals_for = self.goals_against = self.points = 0
+        self.form = deque(maxlen=FORM_LENGTH)
+    
+    @property
+    def goal_difference(self) -> int:
+        return self.goals_for - self.goals_against
+    
+    def record(self, scored: int, conceded: int):
+        self.played += 1
+        self.goals_for += scored
+        self.goals_against += conceded
+        if scored > conceded:
+            self.won += 1
+            self.points += 3
+        elif scored == conceded:
+            self.drawn += 1
+            self.points += 1
+        else:
+            self.lost += 1
+        self.form.append(_outcome(scored, conceded))
+    
+    def unrecord(self, scored: int, conceded: int):
+        """Subtract a result recorded earlier; form is left to the caller, who knows the remaining matches"""
+        self.played -= 1
+        self.goals_for -= scored
+        self.goals_against -= conceded
+        if scored > conceded:
+            self.won -= 1
+            self.points -= 3
+        elif scored == conceded:
+            self.drawn -= 1
+            self.points -= 1
+        else:
+            self.lost -= 1
+    
+    def to_dict(self) -> Dict:
+        return {'name': self.name, 'played': self.played, 'won': self.won, 'drawn': self.drawn, 'lost': self.lost,
+                'goals_for': self.goals_for, 'goals_against': self.goals_against,
+                'goal_difference': self.goal_difference, 'points': self.points, 'form': ''.join(self.form)}
+
+class MatchResults:
+    """Match results of every guild and their standings, backed by an append-only journal
+    
+    A match is {id, home, away, home_name, away_name, home_goals, away_goals, date, matchday,
+    scorers}, where scorers is a list of {player, name, club}.
+    Not thread-safe on its own; Database calls it under its lock.
+    """
+    
+    def __init__(self, journal_file: str):
+        self.journal_file = journal_file
+        # guild id -> matches in the order they were recorded
+        self.matches: Dict[str, List[Dict]] = {}
+        # guild id -> club id -> positions of its matches in the guild's list
+        self.club_matches: Dict[str, Dict[str, List[int]]] = {}
+        self.standings: Dict[str, Dict[str, Standing]] = {}
+        self.next_id = 1
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                metrics.observe_read(os.path.basename(self.journal_file), os.fstat(f.fileno()).st_size)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-write
+                        break
+                    if record.get('op') == 'add':
+                        for match in record['matches']:
+                            self._apply(record['guild'], match)
+                    elif record.get('op') == 'delete':
+                        self._delete(record['guild'], record['match'])
+                    elif record.get('op') == 'rename_club':
+                        self._rename_club(record['old'], record['new'], record['name'])
+                    elif record.get('op') == 'rename_player':
+                        self._rename_player(record['old'], record['new'], record['name'])
+                    elif record.get('op') == 'clear_guild':
+                        self._clear_guild(record['guild'])
+        except FileNotFoundError:
+            pass
+    
+    def _journal(self, record: Dict):
+        text = json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n'
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(text)
+            metrics.observe_write(os.path.basename(self.journal_file), len(text))
+        except OSError as e:
+            logger.error(f"Error writing {self.journal_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.journal_file))
+    
+    def _apply(self, guild_id: str, match: Dict):
+        self.next_id = max(self.next_id, match['id'] + 1)
+        matches = self.matches.setdefault(guild_id, [])
+        club_matches = self.club_matches.setdefault(guild_id, {})
+        standings = self.standings.setdefault(guild_id, {})
+        for side, other in (('home', 'away'), ('away', 'home')):
+            club_id = match[side]
+            club_matches.setdefault(club_id, []).append(len(matches))
+            standing = standings.get(club_id)
+            if standing is None:
+                standing = standings[club_id] = Standing(match[f'{side}_name'])
+            standing.record(match[f'{side}_goals'], match[f'{other}_goals'])
+        matches.append(match)
+    
+    def _delete(self, guild_id: str, match_id: int) -> Optional[Dict]:
+        matches = self.matches.get(guild_id, [])
+        position = next((i for i, match in enumerate(matches) if match['id'] == match_id), None)
+        if position is None:
+            return None
+        match = matches.pop(position)
+        # Later matches moved down one place
+        club_matches = self.club_matches[guild_id] = {}
+        for i, played in enumerate(matches):
+            club_matches.setdefault(played['home'], []).append(i)
+            club_matches.setdefault(played['away'], []).append(i)
+        standings = self.standings[guild_id]
+        for side, other in (('home', 'away'), ('away', 'home')):
+            club_id = match[side]
+            standing = standings[club_id]
+            standing.unrecord(match[f'{side}_goals'], match[f'{other}_goals'])
+            if not standing.played:
+                del standings[club_id]
+                continue
+            standing.form.clear()
+            for i in club_matches[club_id][-FORM_LENGTH:]:
+                played = matches[i]
+                us, them = ('home', 'away') if played['home'] == club_id else ('away', 'home')
+                standing.form.append(_outcome(played[f'{us}_goals'], played[f'{them}_goals']))
+        return match
+    
+    def _rename_club(self, old: str, new: str, name: str):
+        guild_id = _guild(old)
+        positions = self.club_matches.get(guild_id, {}).pop(old, None)
+        if positions is None:
+            return
+        self.club_matches[guild_id][new] = positions
+        standing = self.standings[guild_id].pop(old)
+        standing.name = name
+        self.standings[guild_id][new] = standing
+        matches = self.matches[guild_id]
+        for position in positions:
+            match = matches[position]
+            for side in ('home', 'away'):
+                if match[side] == old:
+                    match[side] = new
+                    match[f'{side}_name'] = name
+            for scorer in match['scorers']:
+                if scorer['club'] == old:
+                    scorer['club'] = new
+    
+    def _rename_player(self, old: str, new: str, name: str):
+        for match in self.matches.get(_guild(old), []):
+            for scorer in match['scorers']:
+                if scorer['player'] == old:
+                    scorer['player'] = new
+                    scorer['name'] = name
+    
+    def _clear_guild(self, guild_id: str):
+        self.matches.pop(guild_id, None)
+        self.club_matches.pop(guild_id, None)
+        self.standings.pop(guild_id, None)
+    
+    def add(self, guild_id, matches: List[Dict]) -> List[Dict]:
+        """Record matches with one journal write, numbering them; returns the stored matches"""
+        guild_id = str(guild_id)
+        stored = []
+        for match in matches:
+            match = {**match, 'id': self.next_id}
+            self._apply(guild_id, match)
+            stored.append(match)
+        if stored:
+            self._journal({'op': 'add', 'guild': guild_id, 'matches': stored})
+        return stored
+    
+    def count(self, guild_id, club_id: Optional[str] = None) -> int:
+        if club_id is None:
+            return len(self.matches.get(str(guild_id), []))
+        return len(self.club_matches.get(str(guild_id), {}).get(club_id, []))
+    
+    def results(self, guild_id, club_id: Optional[str] = None, offset: int = 0, limit: int = 10) -> List[Dict]:
+        """A page of a guild's or club's matches, most recently recorded first"""
+        matches = self.matches.get(str(guild_id), [])
+        if club_id is None:
+            positions = range(len(matches))
+        else:
+            positions = self.club_matches.get(str(guild_id), {}).get(club_id, [])
+        end = len(positions) - offset
+        return [matches[positions[i]] for i in range(end - 1, max(end - limit, 0) - 1, -1)]
+    
+    def table(self, guild_id) -> List[Tuple[str, Standing]]:
+        """(club id, standing) rows ordered by points, goal difference, goals scored and name"""
+        standings = self.standings.get(str(guild_id), {})
+        return sorted(standings.items(), key=lambda item: (-item[1].points, -item[1].goal_difference,
+                                                            -item[1].goals_for, item[1].name.lower()))
+    
+    def played(self, guild_id) -> Dict[Tuple[str, str], int]:
+        """How often each (home, away) pairing has been played"""
+        pairings: Dict[Tuple[str, str], int] = {}
+        for match in self.matches.get(str(guild_id), []):
+            key = (match['home'], match['away'])
+            pairings[key] = pairings.get(key, 0) + 1
+        return pairings
+    
+    def on_matchday(self, guild_id, matchday: int) -> Dict[str, List[Dict]]:
+        """club id -> its matches recorded for a matchday"""
+        clubs: Dict[str, List[Dict]] = {}
+        for match in self.matches.get(str(guild_id), []):
+            if match['matchday'] == matchday:
+                clubs.setdefault(match['home'], []).append(match)
+                clubs.setdefault(match['away'], []).append(match)
+        return clubs
+    
+    def delete(self, guild_id, match_id: int) -> Optional[Dict]:
+        """Remove a match and subtract it from both clubs' standings; returns it, or None if the guild has no such match"""
+        match = self._delete(str(guild_id), match_id)
+        if match is not None:
+            self._journal({'op': 'delete', 'guild': str(guild_id), 'match': match_id})
+        return match
+    
+    def rename_club(self, old: str, new: str, name: str):
+        """Move a club's results and standing to a new id and name"""
+        self._rename_club(old, new, name)
+        self._journal({'op': 'rename_club', 'old': old, 'new': new, 'name': name})
+    
+    def rename_player(self, old: str, new: str, name: str):
+        """Move a player's goals to a new id and name"""
+        self._rename_player(old, new, name)
+        self._journal({'op': 'rename_player', 'old': old, 'new': new, 'name': name})
+    
+    def clear_guild(self, guild_id):
+        """Forget every result of a guild"""
+        self._clear_guild(str(guild_id))
+        self._journal({'op': 'clear_guild', 'guild': str(guild_id)})
+    
+    def clear(self):
+        """Forget everything and empty the journal"""
+        self.matches.clear()
+        self.club_matches.clear()
+        self.standings.clear()
+        try:
+            open(self.journal_file, 'w').close()
+        except OSError as e:
+            logger.error(f"Error clearing {self.journal_file}: {e}")
+
+def parse_match(guild_id, clubs: Dict, players: Dict, home: str, away: str, home_goals: int, away_goals: int,
+                scorers: Optional[List[str]] = None, date: Optional[str] = None,
+                matchday: Optional[int] = None) -> Dict:
+    """Validate a result entered by name into a match record; raises ValueError with the reason
+    
+    Scorers are player names, once per goal, and must play for one of the two clubs.
+    """
+    home_id = f"{guild_id}_{home.strip().lower().replace(' ', '_')}"
+    away_id = f"{guild_id}_{away.strip().lower().replace(' ', '_')}"
+    for name, club_id in ((home, home_id), (away, away_id)):
+        if club_id not in clubs:
+            raise ValueError(f"Club '{name.strip()}' not found")
+    if home_id == away_id:
+        raise ValueError("A club cannot play itself")
+    if not (0 <= home_goals <= 99 and 0 <= away_goals <= 99):
+        raise ValueError("Scores must be between 0 and 99")
+    if matchday is not None and matchday < 1:
+        raise ValueError("Matchday must be positive")
+    
+    played = datetime.now()
+    if date:
+        try:
+            played = datetime.strptime(date.strip(), "%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"'{date}' is not a date (YYYY-MM-DD)")
+        if played > datetime.now():
+            raise ValueError(f"{date} is in the future")
+    
+    goals = {home_id: home_goals, away_id: away_goals}
+    scored = []
+    for name in scorers or []:
+        name = name.strip()
+        if not name:
+            continue
+        player_id = f"{guild_id}_{name.lower().replace(' ', '_')}"
+        player = players.get(player_id)
+        if player is None:
+            raise ValueError(f"Player '{name}' not found")
+        if player.get('club_id') not in goals:
+            raise ValueError(f"{player['name']} does not play for either club")
+        scored.append({'player': player_id, 'name': player['name'], 'club': player['club_id']})
+    for club_id, count in goals.items():
+        listed = sum(1 for scorer in scored if scorer['club'] == club_id)
+        if listed > count:
+            raise ValueError(f"{listed} scorer(s) listed for {clubs[club_id]['name']}, who scored {count}")
+    
+    return {
+        'home': home_id,
+        'away': away_id,
+        'home_name': clubs[home_id]['name'],
+        'away_name': clubs[away_id]['name'],
+        'home_goals': home_goals,
+        'away_goals': away_goals,
+        'date': played.isoformat(),
+        'matchday': matchday,
+        'scorers': scored,
+    }
@@ -0,0 +1,268 @@
+"""
+Recurring job scheduler
+Per-guild jobs with cron-style schedules are stored in jobs.json and run by one
+timer task that sleeps until the next job is due. Runs missed while the bot was
+offline are caught up once at startup, and due jobs are spread out with random
+jitter and run under a concurrency limit so nightly jobs do not all start at once.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from utils.database import guild_of
+from utils.deferred import run_blocking
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CRON_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+
+# (name, lowest, highest) of the five cron fields
+CRON_FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+# Re-check the job list at least this often, in case the system clock jumps
+MAX_SCHEDULER_SLEEP = 3600
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day month weekday) in local time
+    
+    Fields accept *, numbers, ranges (1-5), lists (1,15) and steps (*/6, 0-30/10).
+    Weekdays run from 0 (Sunday) to 6, with 7 also meaning Sunday. As in cron, when
+    both day and weekday are restricted a time matching either one is due.
+    """
+    
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = CRON_ALIASES.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError("a schedule needs 5 fields: minute hour day month weekday")
+        
+        parsed = [self._parse_field(text, name, low, high) for text, (name, low, high) in zip(fields, CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+        
+        # Rejects schedules that can never fire, such as 30 February
+        self.next_after(datetime.now())
+    
+    @staticmethod
+    def _parse_field(text: str, name: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for part in text.split(','):
+            base, _, step = part.partition('/')
+            try:
+                step = int(step) if step else 1
+                if base == '*':
+                    start, end = low, high
+                elif '-' in base:
+                    start, end = (int(bound) for bound in base.split('-', 1))
+                else:
+                    start = end = int(base)
+                    if step > 1:
+                        end = high
+            except ValueError:
+                raise ValueError(f"invalid {name} field '{text}'")
+            if step < 1 or start < low or end > high or start > end:
+                raise ValueError(f"{name} must be between {low} and {high}, got '{part}'")
+            values.update(range(start, end + 1, step))
+        return values
+    
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+    
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Skip whole months, days and hours that cannot match; five years covers every leap day
+        limit = candidate + timedelta(days=5 * 366)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                month_start = candidate.replace(day=1, hour=0, minute=0)
+                candidate = (month_start + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"schedule '{self.expression}' never runs")
+    
+    def shortest_interval(self, runs: int = 24) -> timedelta:
+        """Smallest gap between the next few runs"""
+        previous = self.next_after(datetime.now())
+        shortest = None
+        for _ in range(runs):
+            following = self.next_after(previous)
+            gap = following - previous
+            shortest = gap if shortest is None else min(shortest, gap)
+            previous = following
+        return shortest
+
+JobHandler = Callable[[Dict], Awaitable[str]]
+
+class JobScheduler:
+    """Keeps every guild's jobs in memory and runs them when due through registered handlers"""
+    
+    def __init__(self, db, ready: Optional[Callable[[], Awaitable]] = None):
+        self.db = db
+        # Awaited by the timer task before the first job is dispatched
+        self.ready = ready
+        self.concurrency = int(os.getenv('JOB_CONCURRENCY', 2))
+        self.max_jitter = float(os.getenv('JOB_JITTER', 120))
+        self.handlers: Dict[str, JobHandler] = {}
+        self.jobs: Dict[str, Dict] = {}
+        self.schedules: Dict[str, CronSchedule] = {}
+        self.running: Dict[str, asyncio.Task] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+    
+    def register(self, kind: str, handler: JobHandler):
+        """Run handler(job) for jobs of this kind; it returns a one-line summary"""
+        self.handlers[kind] = handler
+    
+    async def start(self):
+        """Load stored jobs and start the timer task; jobs whose run was missed become due now"""
+        self._slots = asyncio.Semaphore(self.concurrency)
+        stored = await run_blocking(self.db.get_jobs)
+        now = datetime.now()
+        missed = 0
+        for job_id, job in stored.items():
+            try:
+                self.schedules[job_id] = CronSchedule(job['schedule'])
+            except ValueError as e:
+                logger.error(f"Skipping job {job_id} with invalid schedule: {e}")
+                continue
+            self.jobs[job_id] = job
+            if datetime.fromisoformat(job['next_run']) <= now:
+                missed += 1
+        if missed:
+            logger.info(f"Catching up on {missed} scheduled job(s) missed while offline")
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Cancel the timer task and any job still running"""
+        # wait_for can swallow a cancel that races with a wakeup, so the loop also checks this flag
+        self._stopping = True
+        tasks = [task for task in [self._task, *self.running.values()] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+    
+    def guild_jobs(self, guild_id) -> List[Dict]:
+        """Jobs of a guild, next due first"""
+        jobs = [job for job_id, job in self.jobs.items() if guild_of(job_id) == str(guild_id)]
+        return sorted(jobs, key=lambda job: job['next_run'])
+    
+    def add_job(self, guild_id, kind: str, schedule: CronSchedule, params: Dict, created_by: int) -> Optional[Dict]:
+        """Store a new job and wake the timer; returns None if it could not be saved"""
+        job_id = f"{guild_id}_{uuid.uuid4().hex[:6]}"
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'schedule': schedule.expression,
+            'params': params,
+            'created_by': created_by,
+            'created_at': datetime.now().isoformat(),
+            'next_run': schedule.next_after(datetime.now()).isoformat(),
+            'last_run': None,
+            'last_result': None
+        }
+        if not self.db.save_job(job_id, job):
+            return None
+        self.jobs[job_id] = job
+        self.schedules[job_id] = schedule
+        self._wakeup.set()
+        return job
+    
+    def remove_job(self, job_id: str) -> bool:
+        """Delete a job; a run already in progress is allowed to finish"""
+        if job_id not in self.jobs or not self.db.delete_job(job_id):
+            return False
+        del self.jobs[job_id]
+        del self.schedules[job_id]
+        self._wakeup.set()
+        return True
+    
+    async def _run(self):
+        """Start every due job, then sleep until the next one is due or the job list changes"""
+        if self.ready is not None:
+            await self.ready()
+        while not self._stopping:
+            try:
+                self._wakeup.clear()
+                now = datetime.now()
+                next_due = None
+                for job_id, job in self.jobs.items():
+                    if job_id in self.running:
+                        continue
+                    due_at = datetime.fromisoformat(job['next_run'])
+                    if due_at <= now:
+                        self.running[job_id] = asyncio.create_task(self._dispatch(job))
+                    elif next_due is None or due_at < next_due:
+                        next_due = due_at
+                
+                delay = MAX_SCHEDULER_SLEEP if next_due is None else (next_due - now).total_seconds()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), min(max(delay, 0), MAX_SCHEDULER_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job scheduler failed: {e}")
+                await asyncio.sleep(60)
+    
+    async def _dispatch(self, job: Dict):
+        """Wait a random jitter and a free slot, run the job's handler and schedule its next run"""
+        job_id = job['id']
+        try:
+            await asyncio.sleep(random.uniform(0, self.max_jitter))
+            async with self._slots:
+                if job_id not in self.jobs:
+                    return
+                handler = self.handlers.get(job['kind'])
+                started = time.perf_counter()
+                try:
+                    if handler is None:
+                        raise RuntimeError(f"no handler for job kind '{job['kind']}'")
+                    result = await handler(job)
+                    outcome = 'ok'
+                    logger.info(f"Scheduled {job['kind']} job {job_id} finished: {result}")
+                except Exception as e:
+                    result = f"failed: {e}"
+                    outcome = 'failed'
+                    logger.error(f"Scheduled {job['kind']} job {job_id} failed: {e}")
+                metrics.observe_job(job['kind'], time.perf_counter() - started, outcome)
+            
+            if job_id not in self.jobs:
+                return
+            # A run that was missed several times is caught up once; the next run counts from now
+            now = datetime.now()
+            job['last_run'] = now.isoformat()
+            job['last_result'] = result
+            job['next_run'] = self.schedules[job_id].next_after(now).isoformat()
+            await run_blocking(self.db.save_job, job_id, dict(job))
+        finally:
+            self.running.pop(job_id, None)
+            self._wakeup.set()
@@ -0,0 +1,226 @@
+"""
+Season engine
+Builds double round-robin fixtures for a guild's clubs, rates each club from its squad
+value and position balance, and projects the final table by simulating the fixtures
+still to play, on top of the recorded results, with Poisson-distributed goals. Seasons
+are simulated in batches as numpy arrays and the batches are spread over a process
+pool, so projections do not hold the event loop, the GIL or the storage worker.
+"""
+
+import asyncio
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Minimum players per position, as in /club_squad_analysis
+SQUAD_MINIMUMS = {"GK": 2, "DEF": 4, "MID": 3, "FWD": 2}
+# Rating lost per missing player below those minimums
+SHORTFALL_PENALTY = 0.25
+# Average goals per team per match, and the log-scale boost the home side gets
+BASE_GOALS = 1.35
+HOME_ADVANTAGE = 0.12
+# How strongly a rating difference moves expected goals
+RATING_WEIGHT = 0.3
+GOAL_RATE_RANGE = (0.15, 6.0)
+
+TOP_PLACES = 4
+RELEGATION_PLACES = 3
+
+# Matches simulated per numpy batch; bounds worker memory to a few hundred MiB
+BATCH_MATCHES = 2_000_000
+
+def round_robin(club_ids: List[str]) -> List[List[Tuple[str, str]]]:
+    """Double round-robin matchdays of (home, away) pairs, by the circle method
+    
+    Clubs are ordered by id, so the same clubs always get the same fixtures. With an odd
+    number of clubs one club sits out each matchday. The second half mirrors the first
+    with home and away swapped.
+    """
+    clubs: List[Optional[str]] = sorted(club_ids)
+    if len(clubs) < 2:
+        return []
+    if len(clubs) % 2:
+        clubs.append(None)
+    n = len(clubs)
+    first_half = []
+    for round_number in range(n - 1):
+        matchday = []
+        for i in range(n // 2):
+            home, away = clubs[i], clubs[n - 1 - i]
+            # Alternate the fixed club's venue so it does not play every match at home
+            if i == 0 and round_number % 2:
+                home, away = away, home
+            if home is not None and away is not None:
+                matchday.append((home, away))
+        first_half.append(matchday)
+        # Keep the first club fixed and rotate the rest
+        clubs = [clubs[0], clubs[-1]] + clubs[1:-1]
+    return first_half + [[(away, home) for home, away in matchday] for matchday in first_half]
+
+def team_strengths(clubs: Dict, players: Dict) -> Dict[str, float]:
+    """Rating of each club: log squad value, minus a penalty per missing position, centred on zero"""
+    ratings = {}
+    for club_id, club in clubs.items():
+        squad = [players[pid] for pid in club.get('players', []) if pid in players]
+        counts = {position: 0 for position in SQUAD_MINIMUMS}
+        for player in squad:
+            if player.get('position') in counts:
+                counts[player['position']] += 1
+        shortfall = sum(max(minimum - counts[position], 0) for position, minimum in SQUAD_MINIMUMS.items())
+        ratings[club_id] = math.log1p(sum(player['value'] for player in squad)) - SHORTFALL_PENALTY * shortfall
+    if ratings:
+        mean = sum(ratings.values()) / len(ratings)
+        ratings = {club_id: rating - mean for club_id, rating in ratings.items()}
+    return ratings
+
+def remaining_fixtures(fixtures: List[List[Tuple[str, str]]], played: Dict[Tuple[str, str], int]) -> List[Tuple[str, str]]:
+    """Fixtures not played yet, each recorded (home, away) result ticking off one occurrence"""
+    played = dict(played)
+    remaining = []
+    for matchday in fixtures:
+        for match in matchday:
+            if played.get(match, 0) > 0:
+                played[match] -= 1
+            else:
+                remaining.append(match)
+    return remaining
+
+def goal_rates(pairs: List[Tuple[str, str]], strengths: Dict[str, float],
+               club_ids: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(home index, away index, home goal rate, away goal rate) arrays for every fixture"""
+    index = {club_id: i for i, club_id in enumerate(club_ids)}
+    home = np.array([index[h] for h, _ in pairs], dtype=np.int64)
+    away = np.array([index[a] for _, a in pairs], dtype=np.int64)
+    rating = np.array([strengths[club_id] for club_id in club_ids])
+    difference = RATING_WEIGHT * (rating[home] - rating[away])
+    low, high = GOAL_RATE_RANGE
+    home_rate = np.clip(BASE_GOALS * np.exp(HOME_ADVANTAGE + difference), low, high)
+    away_rate = np.clip(BASE_GOALS * np.exp(-HOME_ADVANTAGE - difference), low, high)
+    return home, away, home_rate, away_rate
+
+def simulate_seasons(home: np.ndarray, away: np.ndarray, home_rate: np.ndarray, away_rate: np.ndarray,
+                     base: np.ndarray, seasons: int, seed) -> Tuple[np.ndarray, np.ndarray]:
+    """Simulate the remaining fixtures; returns (club x final position counts, total points per club)
+    
+    base holds each club's points, goal difference and goals scored so far, one row each.
+    Ties on points are split by goal difference, then goals scored, then at random.
+    Runs in a worker process, so it only takes and returns plain arrays.
+    """
+    rng = np.random.default_rng(seed)
+    matches = len(home)
+    n_clubs = base.shape[1]
+    base_points, base_difference, base_goals = base
+    # One-hot club of each match side, so per-club totals are a matrix product
+    home_onehot = np.zeros((matches, n_clubs), dtype=np.float32)
+    home_onehot[np.arange(matches), home] = 1
+    away_onehot = np.zeros((matches, n_clubs), dtype=np.float32)
+    away_onehot[np.arange(matches), away] = 1
+    sides = home_onehot - away_onehot
+    
+    positions = np.zeros(n_clubs * n_clubs, dtype=np.int64)
+    points_total = np.zeros(n_clubs, dtype=np.float64)
+    batch = max(1, BATCH_MATCHES // max(matches, 1))
+    ranks = np.arange(n_clubs)
+    for start in range(0, seasons, batch):
+        size = min(batch, seasons - start)
+        home_goals = rng.poisson(home_rate, size=(size, matches)).astype(np.float32)
+        away_goals = rng.poisson(away_rate, size=(size, matches)).astype(np.float32)
+        margin = home_goals - away_goals
+        draws = margin == 0
+        home_points = 3 * (margin > 0) + draws
+        away_points = 3 * (margin < 0) + draws
+        
+        points = home_points.astype(np.float32) @ home_onehot + away_points.astype(np.float32) @ away_onehot + base_points
+        goal_difference = margin @ sides + base_difference
+        goals_for = home_goals @ home_onehot + away_goals @ away_onehot + base_goals
+        # Integers well below 2**53, so the sort key is exact
+        key = (points.astype(np.float64) * 1e8 + (goal_difference + 5000) * 1e4 + goals_for
+               + rng.random((size, n_clubs)))
+        order = np.argsort(-key, axis=1)
+        positions += np.bincount((order * n_clubs + ranks).ravel(), minlength=n_clubs * n_clubs)
+        points_total += points.sum(axis=0)
+    return positions.reshape(n_clubs, n_clubs), points_total
+
+class SeasonSimulator:
+    """Runs Monte Carlo season projections on a lazily started process pool"""
+    
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or int(os.getenv('SIMULATION_WORKERS', os.cpu_count() or 1))
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Fresh interpreters rather than forks of a process with running threads
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+    
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    async def project(self, clubs: Dict, players: Dict, seasons: int, standings: Optional[List[Dict]] = None,
+                      played: Optional[Dict[Tuple[str, str], int]] = None, seed=None) -> Dict:
+        """Simulate the rest of a guild's season; returns fixtures, strengths and per-club place probabilities
+        
+        Results recorded so far (standings rows and played (home, away) counts) are kept and
+        only the fixtures still to play are simulated. Each club's result holds 'title', 'top' and 'relegation' probabilities, expected
+        points and its full 'positions' distribution.
+        """
+        club_ids = sorted(clubs)
+        fixtures = round_robin(club_ids)
+        strengths = team_strengths(clubs, players)
+        n_clubs = len(club_ids)
+        top = min(TOP_PLACES, n_clubs // 2)
+        relegated = min(RELEGATION_PLACES, n_clubs // 4)
+        
+        started = time.perf_counter()
+        remaining = remaining_fixtures(fixtures, played or {})
+        home, away, home_rate, away_rate = goal_rates(remaining, strengths, club_ids)
+        base = np.zeros((3, n_clubs), dtype=np.float32)
+        index = {club_id: i for i, club_id in enumerate(club_ids)}
+        for row in standings or []:
+            if row['club_id'] in index:
+                base[:, index[row['club_id']]] = (row['points'], row['goal_difference'], row['goals_for'])
+        chunks = min(self.workers, seasons)
+        sizes = [seasons // chunks + (1 if i < seasons % chunks else 0) for i in range(chunks)]
+        seeds = np.random.SeedSequence(seed).spawn(chunks)
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._executor(), simulate_seasons, home, away, home_rate, away_rate,
+                                 base, size, chunk_seed)
+            for size, chunk_seed in zip(sizes, seeds)
+        ))
+        positions = sum(result[0] for result in results)
+        points = sum(result[1] for result in results)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Simulated {seasons} seasons of {n_clubs} clubs in {elapsed:.2f}s on {chunks} worker(s)")
+        
+        projection = {}
+        for i, club_id in enumerate(club_ids):
+            counts = positions[i]
+            projection[club_id] = {
+                'strength': strengths[club_id],
+                'title': float(counts[0] / seasons),
+                'top': float(counts[:top].sum() / seasons),
+                'relegation': float(counts[n_clubs - relegated:].sum() / seasons) if relegated else 0.0,
+                'expected_points': float(points[i] / seasons),
+                'positions': (counts / seasons).tolist(),
+            }
+        return {
+            'clubs': projection,
+            'fixtures': fixtures,
+            'remaining': len(remaining),
+            'seasons': seasons,
+            'top_places': top,
+            'relegation_places': relegated,
+            'seconds': elapsed,
+        }
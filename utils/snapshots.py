@@ -0,0 +1,410 @@
+"""
+League snapshots
+Writes of the clubs or players file name the records they touched, and each of those is
+compared with the last stored version of that record. Only the fields that changed are
+appended to a journal and to the record's version chain, with a full copy every
+KEYFRAME_EVERY versions so reading an old version back stays cheap. Everything one
+Database call writes becomes a single version. The league as of any moment is then the
+newest version of each record at or before it, so a named snapshot is just a version
+number and costs O(1).
+The journal is folded into the base file at startup and once it grows large; versions
+older than THIN_AFTER_DAYS are thinned to the last one per record per day.
+"""
+
+import bisect
+import copy
+import json
+import logging
+import os
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KINDS = ('clubs', 'players')
+# A chain stores a full copy of its record after this many diffs in a row
+KEYFRAME_EVERY = 32
+# Versions older than this are thinned to the last one per record per day on compaction
+THIN_AFTER_DAYS = 30
+
+# Flat (field, value, field, value, ...) changes against the previous version; a few
+# bytes per changed field where a dict would cost hundreds per record
+Diff = Tuple
+# Value of a removed field in a Diff
+_REMOVED = object()
+# A full record, a Diff, or None for a deletion
+Entry = Union[Dict, Diff, None]
+
+def _guild(record_id: str) -> str:
+    return record_id.split('_', 1)[0]
+
+# Field values that can be stored without copying
+_IMMUTABLE = (str, int, float, bool, type(None))
+
+def _diff(old: Dict, new: Dict) -> Diff:
+    diff = []
+    for field, value in new.items():
+        if field not in old or old[field] != value:
+            diff += (field, value if isinstance(value, _IMMUTABLE) else copy.deepcopy(value))
+    for field in old:
+        if field not in new:
+            diff += (field, _REMOVED)
+    return tuple(diff)
+
+def _patch(record: Dict, diff: Diff) -> Dict:
+    patched = dict(record)
+    for i in range(0, len(diff), 2):
+        if diff[i + 1] is _REMOVED:
+            patched.pop(diff[i], None)
+        else:
+            patched[diff[i]] = diff[i + 1]
+    return patched
+
+def _encode(entry: Entry):
+    if entry is None:
+        return None
+    if isinstance(entry, dict):
+        return {'=': entry}
+    encoded = {'~': {entry[i]: entry[i + 1] for i in range(0, len(entry), 2) if entry[i + 1] is not _REMOVED}}
+    removed = [entry[i] for i in range(0, len(entry), 2) if entry[i + 1] is _REMOVED]
+    if removed:
+        encoded['-'] = removed
+    return encoded
+
+def _decode(encoded) -> Entry:
+    if encoded is None:
+        return None
+    if '=' in encoded:
+        return encoded['=']
+    diff = []
+    for field, value in encoded['~'].items():
+        diff += (field, value)
+    for field in encoded.get('-', ()):
+        diff += (field, _REMOVED)
+    return tuple(diff)
+
+class Chain:
+    """Versions of one record; each entry is a full record, a Diff against the one before, or None for a deletion"""
+    
+    __slots__ = ('versions', 'entries', 'current', 'since_full')
+    
+    def __init__(self):
+        self.versions = array('q')
+        self.entries: List[Entry] = []
+        # The newest version in full, so new writes are diffed without replaying the chain
+        self.current: Optional[Dict] = None
+        self.since_full = 0
+    
+    def add(self, version: int, entry: Entry):
+        self.versions.append(version)
+        self.entries.append(entry)
+        if entry is None or isinstance(entry, dict):
+            self.current = entry
+            self.since_full = 0
+        else:
+            self.current = _patch(self.current, entry)
+            self.since_full += 1
+    
+    def at(self, version: int) -> Optional[Dict]:
+        position = bisect.bisect_right(self.versions, version)
+        if position == len(self.entries):
+            return self.current
+        if not position:
+            return None
+        # Diffs always follow a full record, at most KEYFRAME_EVERY back
+        start = position - 1
+        while isinstance(self.entries[start], tuple):
+            start -= 1
+        record = self.entries[start]
+        for diff in islice(self.entries, start + 1, position):
+            record = _patch(record, diff)
+        return record
+
+class SnapshotStore:
+    """Versioned club and player records backed by a base file and an append-only journal
+    
+    Stored records are shared between versions and must be treated as read-only.
+    Not thread-safe on its own; Database calls it under its lock.
+    """
+    
+    def __init__(self, base_file: str, journal_file: str, compact_after: int = 200_000):
+        self.base_file = base_file
+        self.journal_file = journal_file
+        self.compact_after = compact_after
+        self.version = 0
+        # Time of each version; version n is at times[n - 1]
+        self.times = array('d')
+        self.chains: Dict[str, Dict[str, Chain]] = {kind: {} for kind in SNAPSHOT_KINDS}
+        self._live: Dict[str, Set[str]] = {kind: set() for kind in SNAPSHOT_KINDS}
+        # kind -> guild id -> ids of every record the guild ever had
+        self._guild_ids: Dict[str, Dict[str, Set[str]]] = {kind: {} for kind in SNAPSHOT_KINDS}
+        # guild id -> named snapshots, oldest first
+        self.snapshots: Dict[str, List[Dict]] = {}
+        # kind -> (newest records, ids touched or None for all) observed during a batch
+        self._pending: Optional[Dict[str, Tuple[Dict, Optional[Set[str]]]]] = None
+        self.journal_entries = 0
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.base_file, 'r', encoding='utf-8') as f:
+                metrics.observe_read(os.path.basename(self.base_file), os.fstat(f.fileno()).st_size)
+                base = json.load(f)
+        except FileNotFoundError:
+            base = {}
+        except json.JSONDecodeError as e:
+            logger.error(f"Error reading {self.base_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.base_file))
+            base = {}
+        self.version = base.get('version', 0)
+        self.times = array('d', base.get('times', []))
+        for kind, chains in base.get('chains', {}).items():
+            for record_id, stored in chains.items():
+                chain = self._chain(kind, record_id)
+                for version, encoded in zip(stored['versions'], stored['entries']):
+                    chain.add(version, _decode(encoded))
+                if chain.current is not None:
+                    self._live[kind].add(record_id)
+        self.snapshots = base.get('snapshots', {})
+        
+        # Replay changes recorded since the last compaction
+        replayed = 0
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                metrics.observe_read(os.path.basename(self.journal_file), os.fstat(f.fileno()).st_size)
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-write
+                        break
+                    replayed += 1
+                    if 'changes' in record:
+                        self._apply({kind: {record_id: _decode(encoded) for record_id, encoded in changes.items()}
+                                     for kind, changes in record['changes'].items()}, record['ts'])
+                    elif 'records' in record:
+                        # Journals written before diffs held full records
+                        self._apply({record['kind']: record['records']}, record['ts'])
+                    elif record.get('op') == 'snapshot':
+                        self.snapshots.setdefault(record['guild'], []).append(record['snapshot'])
+                    elif record.get('op') == 'clear_guild':
+                        self._clear_guild(record['guild'])
+        except FileNotFoundError:
+            pass
+        if replayed:
+            self.compact()
+    
+    def _journal(self, record: Dict, entries: int = 1):
+        text = json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n'
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(text)
+            metrics.observe_write(os.path.basename(self.journal_file), len(text))
+        except OSError as e:
+            logger.error(f"Error writing {self.journal_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.journal_file))
+        self.journal_entries += entries
+        if self.journal_entries >= self.compact_after:
+            self.compact()
+    
+    def _chain(self, kind: str, record_id: str) -> Chain:
+        chain = self.chains[kind].get(record_id)
+        if chain is None:
+            chain = self.chains[kind][record_id] = Chain()
+            self._guild_ids[kind].setdefault(_guild(record_id), set()).add(record_id)
+        return chain
+    
+    def _apply(self, changes: Dict[str, Dict[str, Entry]], ts: float):
+        self.version += 1
+        # Versions stay in time order even if the clock steps back
+        self.times.append(max(ts, self.times[-1]) if self.times else ts)
+        for kind, entries in changes.items():
+            live = self._live[kind]
+            for record_id, entry in entries.items():
+                self._chain(kind, record_id).add(self.version, entry)
+                if entry is None:
+                    live.discard(record_id)
+                else:
+                    live.add(record_id)
+    
+    def _clear_guild(self, guild_id: str):
+        for kind in SNAPSHOT_KINDS:
+            for record_id in self._guild_ids[kind].pop(guild_id, ()):
+                self.chains[kind].pop(record_id, None)
+                self._live[kind].discard(record_id)
+        self.snapshots.pop(guild_id, None)
+    
+    def _changes(self, kind: str, records: Dict[str, Dict], touched: Optional[Iterable[str]]) -> Dict[str, Entry]:
+        chains = self.chains[kind]
+        if touched is None:
+            touched = records.keys() | self._live[kind]
+        changes = {}
+        for record_id in touched:
+            record = records.get(record_id)
+            chain = chains.get(record_id)
+            current = chain.current if chain is not None else None
+            if record is None:
+                if current is not None:
+                    changes[record_id] = None
+            elif current is None or chain.since_full >= KEYFRAME_EVERY:
+                if current != record:
+                    changes[record_id] = copy.deepcopy(record)
+            elif current != record:
+                changes[record_id] = _diff(current, record)
+        return changes
+    
+    def _commit(self, changes: Dict[str, Dict[str, Entry]]):
+        changes = {kind: entries for kind, entries in changes.items() if entries}
+        if not changes:
+            return
+        ts = time.time()
+        self._apply(changes, ts)
+        self._journal({'ts': ts, 'changes': {kind: {record_id: _encode(entry) for record_id, entry in entries.items()}
+                                             for kind, entries in changes.items()}},
+                      sum(len(entries) for entries in changes.values()))
+    
+    def _flush(self):
+        pending, self._pending = self._pending, {}
+        self._commit({kind: self._changes(kind, records, touched) for kind, (records, touched) in pending.items()})
+    
+    @contextmanager
+    def batch(self):
+        """Store everything observed inside as one version; nested batches join the outer one"""
+        if self._pending is not None:
+            yield
+            return
+        self._pending = {}
+        try:
+            yield
+        finally:
+            self._flush()
+            self._pending = None
+    
+    def observe(self, kind: str, records: Dict[str, Dict], touched: Optional[Iterable[str]] = None):
+        """Store a new version of the touched records (all of them if None) that differ from their last version"""
+        if self._pending is None:
+            self._commit({kind: self._changes(kind, records, touched)})
+            return
+        if kind in self._pending:
+            _, seen = self._pending[kind]
+            touched = None if seen is None or touched is None else seen.union(touched)
+        elif touched is not None:
+            touched = set(touched)
+        self._pending[kind] = (records, touched)
+    
+    def version_at(self, when: datetime) -> int:
+        """Latest version written at or before when"""
+        return bisect.bisect_right(self.times, when.timestamp())
+    
+    def records_at(self, kind: str, guild_id, version: int) -> Dict[str, Dict]:
+        """A guild's records as they were at a version"""
+        chains = self.chains[kind]
+        records = {}
+        for record_id in self._guild_ids[kind].get(str(guild_id), ()):
+            record = chains[record_id].at(version)
+            if record is not None:
+                records[record_id] = record
+        return records
+    
+    def take(self, guild_id, label: str) -> Dict:
+        """Name the current version of a guild's league"""
+        if self._pending:
+            # Writes made earlier in the same call belong before the snapshot
+            self._flush()
+        snapshot = {'label': label, 'version': self.version, 'ts': time.time()}
+        self.snapshots.setdefault(str(guild_id), []).append(snapshot)
+        self._journal({'op': 'snapshot', 'guild': str(guild_id), 'snapshot': snapshot})
+        return snapshot
+    
+    def find(self, guild_id, label: str) -> Optional[Dict]:
+        """Newest snapshot of a guild with this label"""
+        for snapshot in reversed(self.snapshots.get(str(guild_id), [])):
+            if snapshot['label'] == label:
+                return snapshot
+        return None
+    
+    def clear_guild(self, guild_id):
+        """Forget every version and snapshot of a guild"""
+        self._clear_guild(str(guild_id))
+        self._journal({'op': 'clear_guild', 'guild': str(guild_id)})
+    
+    def clear(self):
+        """Forget everything and empty both files"""
+        self.version = 0
+        self.times = array('d')
+        self.chains = {kind: {} for kind in SNAPSHOT_KINDS}
+        self._live = {kind: set() for kind in SNAPSHOT_KINDS}
+        self._guild_ids = {kind: {} for kind in SNAPSHOT_KINDS}
+        self.snapshots.clear()
+        self.compact()
+    
+    def _thin(self, chain: Chain, cutoff: float, pinned: List[int]) -> Optional[Chain]:
+        """A copy of chain keeping only the last version per day before cutoff and any a snapshot can see, or None if nothing goes"""
+        versions = chain.versions
+        day = lambda version: datetime.fromtimestamp(self.times[version - 1]).date()
+        kept = []
+        for position in range(len(versions) - 1):
+            start, end = versions[position], versions[position + 1]
+            if self.times[start - 1] >= cutoff or day(start) != day(end):
+                kept.append(position)
+                continue
+            pin = bisect.bisect_left(pinned, start)
+            if pin < len(pinned) and pinned[pin] < end:
+                kept.append(position)
+        if len(kept) == len(versions) - 1:
+            return None
+        kept.append(len(versions) - 1)
+        
+        thinned = Chain()
+        previous = None
+        for position in kept:
+            record = chain.at(versions[position])
+            if thinned.entries and record == previous:
+                continue
+            if record is None or previous is None or thinned.since_full >= KEYFRAME_EVERY:
+                thinned.add(versions[position], record)
+            else:
+                thinned.add(versions[position], _diff(previous, record))
+            previous = record
+        return thinned
+    
+    def compact(self):
+        """Thin old versions, rewrite the base file and empty the journal"""
+        cutoff = time.time() - THIN_AFTER_DAYS * 86400
+        for kind, chains in self.chains.items():
+            for record_id, chain in chains.items():
+                if len(chain.versions) < 2 or self.times[chain.versions[0] - 1] >= cutoff:
+                    continue
+                pinned = sorted(s['version'] for s in self.snapshots.get(_guild(record_id), ()))
+                thinned = self._thin(chain, cutoff, pinned)
+                if thinned is not None:
+                    chains[record_id] = thinned
+        
+        data = {
+            'version': self.version,
+            'times': self.times.tolist(),
+            'chains': {kind: {record_id: {'versions': chain.versions.tolist(),
+                                          'entries': [_encode(entry) for entry in chain.entries]}
+                              for record_id, chain in chains.items()}
+                       for kind, chains in self.chains.items()},
+            'snapshots': self.snapshots,
+            'last_updated': datetime.now().isoformat()
+        }
+        temp_file = self.base_file + '.tmp'
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+                metrics.observe_write(os.path.basename(self.base_file), f.tell())
+            os.replace(temp_file, self.base_file)
+            # Only drop the journal once everything in it is in the base file
+            open(self.journal_file, 'w').close()
+            self.journal_entries = 0
+        except OSError as e:
+            logger.error(f"Error compacting {self.base_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.base_file))
@@ -0,0 +1,245 @@
+"""
+Player value history
+Every value change is appended to a journal and kept per player as a byte string of
+zigzag varint deltas (seconds, cents), a few bytes per point. The journal is folded
+into the series file once it grows large, and long series are downsampled so old
+points thin out to one per day, week or month.
+"""
+
+import base64
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# (minimum age in days, bucket seconds): points older than the age keep only the last point per bucket
+DOWNSAMPLE_TIERS = ((30, 86400), (180, 7 * 86400), (730, 30 * 86400))
+# Series are only downsampled once they hold more points than this
+DOWNSAMPLE_AFTER = 90
+
+def _zigzag(n: int) -> int:
+    return (n << 1) ^ (n >> 63)
+
+def _unzigzag(n: int) -> int:
+    return (n >> 1) ^ -(n & 1)
+
+def _put_varint(buffer: bytearray, n: int):
+    n = _zigzag(n)
+    while n >= 0x80:
+        buffer.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buffer.append(n)
+
+def encode_points(points: Iterable[Tuple[int, int]], previous: Tuple[int, int] = (0, 0)) -> bytearray:
+    """Delta-encode (timestamp, cents) points following previous"""
+    buffer = bytearray()
+    last_ts, last_cents = previous
+    for ts, cents in points:
+        _put_varint(buffer, ts - last_ts)
+        _put_varint(buffer, cents - last_cents)
+        last_ts, last_cents = ts, cents
+    return buffer
+
+def decode_points(buffer: bytes) -> List[Tuple[int, int]]:
+    """Inverse of encode_points"""
+    points = []
+    values = []
+    n = shift = 0
+    for byte in buffer:
+        n |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(_unzigzag(n))
+        n = shift = 0
+    ts = cents = 0
+    for i in range(0, len(values) - 1, 2):
+        ts += values[i]
+        cents += values[i + 1]
+        points.append((ts, cents))
+    return points
+
+def downsample(points: List[Tuple[int, int]], now: int) -> List[Tuple[int, int]]:
+    """Keep recent points as recorded and the last point per day, week or month for older ones"""
+    kept = []
+    for ts, cents in points:
+        age_days = (now - ts) / 86400
+        bucket = None
+        for min_age, bucket_seconds in DOWNSAMPLE_TIERS:
+            if age_days >= min_age:
+                bucket = (bucket_seconds, ts // bucket_seconds)
+        if bucket is not None and kept and kept[-1][0] == bucket:
+            kept[-1] = (bucket, (ts, cents))
+        else:
+            kept.append((bucket, (ts, cents)))
+    return [point for _, point in kept]
+
+class ValueHistory:
+    """Per-player value series backed by a series file and an append-only journal
+    
+    Not thread-safe on its own; Database calls it under its lock.
+    """
+    
+    def __init__(self, series_file: str, journal_file: str, compact_after: int = 200_000):
+        self.series_file = series_file
+        self.journal_file = journal_file
+        self.compact_after = compact_after
+        self._series: Dict[str, bytearray] = {}
+        # player id -> [last timestamp, last cents, point count]
+        self._tail: Dict[str, List[int]] = {}
+        self._versions: Dict[str, int] = {}
+        self.journal_entries = 0
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.series_file, 'r', encoding='utf-8') as f:
+                metrics.observe_read(os.path.basename(self.series_file), os.fstat(f.fileno()).st_size)
+                stored = json.load(f).get('series', {})
+        except FileNotFoundError:
+            stored = {}
+        except json.JSONDecodeError as e:
+            logger.error(f"Error reading {self.series_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.series_file))
+            stored = {}
+        for player_id, blob in stored.items():
+            buffer = bytearray(base64.b64decode(blob))
+            points = decode_points(buffer)
+            if points:
+                self._series[player_id] = buffer
+                self._tail[player_id] = [*points[-1], len(points)]
+        
+        # Replay changes recorded since the last compaction
+        entries = []
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-write
+                        break
+        except FileNotFoundError:
+            pass
+        for entry in entries:
+            if entry[0] == '+':
+                self._append(entry[1], entry[2], entry[3])
+            elif entry[0] == '-':
+                self._drop(entry[1])
+            elif entry[0] == '>':
+                self._move(entry[1], entry[2])
+        if entries:
+            self.compact()
+    
+    def _append(self, player_id: str, ts: int, cents: int):
+        tail = self._tail.get(player_id)
+        if tail is None:
+            self._series[player_id] = encode_points([(ts, cents)])
+            self._tail[player_id] = [ts, cents, 1]
+        else:
+            self._series[player_id] += encode_points([(ts, cents)], (tail[0], tail[1]))
+            tail[0], tail[1] = ts, cents
+            tail[2] += 1
+        self._versions[player_id] = self._versions.get(player_id, 0) + 1
+    
+    def _drop(self, player_id: str):
+        self._series.pop(player_id, None)
+        self._tail.pop(player_id, None)
+        self._versions[player_id] = self._versions.get(player_id, 0) + 1
+    
+    def _move(self, old_player_id: str, new_player_id: str):
+        self._drop(new_player_id)
+        if old_player_id in self._series:
+            self._series[new_player_id] = self._series.pop(old_player_id)
+            self._tail[new_player_id] = self._tail.pop(old_player_id)
+        self._versions[old_player_id] = self._versions.get(old_player_id, 0) + 1
+    
+    def _journal(self, entries: List[list]):
+        if not entries:
+            return
+        text = ''.join(json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + '\n' for entry in entries)
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(text)
+            metrics.observe_write(os.path.basename(self.journal_file), len(text))
+        except OSError as e:
+            logger.error(f"Error writing {self.journal_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.journal_file))
+        self.journal_entries += len(entries)
+        if self.journal_entries >= self.compact_after:
+            self.compact()
+    
+    def has(self, player_id: str) -> bool:
+        return player_id in self._tail
+    
+    def record(self, points: Iterable[Tuple[str, float, float]]):
+        """Append (player id, timestamp, value) points, skipping values equal to the last one"""
+        entries = []
+        for player_id, ts, value in points:
+            ts, cents = int(ts), round(value * 100)
+            tail = self._tail.get(player_id)
+            if tail is not None and tail[1] == cents:
+                continue
+            if tail is not None and ts < tail[0]:
+                ts = tail[0]
+            self._append(player_id, ts, cents)
+            entries.append(['+', player_id, ts, cents])
+        self._journal(entries)
+    
+    def remove(self, player_ids: Iterable[str]):
+        """Forget the series of deleted players"""
+        entries = [['-', player_id] for player_id in player_ids if player_id in self._tail]
+        for _, player_id in entries:
+            self._drop(player_id)
+        self._journal(entries)
+    
+    def rename(self, old_player_id: str, new_player_id: str):
+        """Move a series to a player's new id"""
+        self._move(old_player_id, new_player_id)
+        self._journal([['>', old_player_id, new_player_id]])
+    
+    def clear(self):
+        self.remove(list(self._tail))
+    
+    def version(self, player_id: str) -> int:
+        """Changes whenever the player's series changes, for caching rendered charts"""
+        return self._versions.get(player_id, 0)
+    
+    def points(self, player_id: str) -> List[Tuple[int, float]]:
+        """(timestamp, value) points of a player, oldest first"""
+        buffer = self._series.get(player_id)
+        if buffer is None:
+            return []
+        return [(ts, cents / 100) for ts, cents in decode_points(buffer)]
+    
+    def compact(self):
+        """Downsample long series, rewrite the series file and empty the journal"""
+        now = int(time.time())
+        for player_id, tail in self._tail.items():
+            if tail[2] > DOWNSAMPLE_AFTER:
+                points = downsample(decode_points(self._series[player_id]), now)
+                self._series[player_id] = encode_points(points)
+                tail[2] = len(points)
+        
+        data = {
+            'series': {player_id: base64.b64encode(buffer).decode('ascii') for player_id, buffer in self._series.items()},
+            'last_updated': datetime.now().isoformat()
+        }
+        temp_file = self.series_file + '.tmp'
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+                metrics.observe_write(os.path.basename(self.series_file), f.tell())
+            os.replace(temp_file, self.series_file)
+            # Only drop the journal once everything in it is in the series file
+            open(self.journal_file, 'w').close()
+            self.journal_entries = 0
+        except OSError as e:
+            logger.error(f"Error compacting {self.series_file}: {e}")
+            metrics.observe_storage_error(os.path.basename(self.series_file))
@@ -0,0 +1,70 @@
+"""
+Reusable interactive views
+Button confirmation for destructive operations
+"""
+
+import discord
+import logging
+from typing import Optional
+from utils.admission import admission
+
+logger = logging.getLogger(__name__)
+
+class ConfirmView(discord.ui.View):
+    """Confirm/Cancel buttons that only the invoking user can press"""
+    
+    def __init__(self, author_id: int, confirm_label: str = "Confirm", timeout: float = 30.0):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.value: Optional[bool] = None
+        self.confirm.label = confirm_label
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Only the user who ran this command can confirm it.", ephemeral=True)
+            return False
+        return True
+    
+    async def _finish(self, interaction: discord.Interaction, value: bool):
+        self.value = value
+        for item in self.children:
+            item.disabled = True
+        await interaction.response.edit_message(view=self)
+        self.stop()
+    
+    @discord.ui.button(label="Confirm", style=discord.ButtonStyle.danger, emoji="⚠️")
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._finish(interaction, True)
+    
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.secondary)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._finish(interaction, False)
+
+async def confirm_action(interaction: discord.Interaction, embed: discord.Embed,
+                         confirm_label: str = "Confirm", timeout: float = 30.0) -> bool:
+    """Show embed with Confirm/Cancel buttons and wait for the invoking user
+    
+    Responds to the interaction. On confirm, the caller reports its result with
+    interaction.edit_original_response; on cancel or timeout the prompt is replaced.
+    """
+    view = ConfirmView(interaction.user.id, confirm_label, timeout)
+    await interaction.response.send_message(embed=embed, view=view)
+    # Do not hold a heavy command slot while waiting for a click
+    admission.pause(interaction)
+    await view.wait()
+    
+    if view.value:
+        await admission.reacquire(interaction)
+        return True
+    
+    cancel_embed = discord.Embed(
+        title="❌ Cancelled",
+        description="Timed out waiting for confirmation. No data was modified." if view.value is None
+        else "The operation was cancelled. No data was modified.",
+        color=discord.Color.orange()
+    )
+    try:
+        await interaction.edit_original_response(embed=cancel_embed, view=None)
+    except discord.HTTPException as e:
+        logger.warning(f"Could not update cancelled confirmation: {e}")
+    return False
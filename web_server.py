@@ -1,35 +1,329 @@
 """
-Flask Web Server for Keep-Alive Functionality
-Simple status page to keep the bot running on hosting platforms
+aiohttp Web Server for Keep-Alive Functionality
+Runs on the bot's own event loop so routes can read bot state directly,
+and serves a read-only JSON API over each guild's league data
 """
 
-from flask import Flask, render_template
+from aiohttp import web
+import asyncio
+import html
 import logging
 import datetime
+import functools
+import hmac
+import os
+import re
+from utils.metrics import metrics
+from utils.loop_monitor import loop_monitor
+from utils.league import guild_clubs, guild_players, guild_transfers, league_rows
+from utils.dashboard import DashboardBroker
+from utils.admission import admission
+from utils.deferred import run_blocking
 
-app = Flask(__name__)
 logger = logging.getLogger(__name__)
 
-@app.route('/')
-def status():
-    """Main status page"""
-    return render_template('status.html', 
-                         status="Bot is running",
-                         timestamp=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+SSE_KEEPALIVE_SECONDS = 15
 
-@app.route('/health')
-def health():
-    """Health check endpoint"""
+@functools.lru_cache(maxsize=None)
+def load_template(name: str) -> str:
+    """Read a template once; later renders reuse the cached text"""
+    with open(os.path.join(TEMPLATE_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+def render_template(name: str, **context) -> str:
+    """Fill {{ key }} placeholders in a template with escaped values"""
+    return re.sub(r'\{\{\s*(\w+)\s*\}\}', lambda m: html.escape(str(context.get(m.group(1), ''))), load_template(name))
+
+def query_number(query, name: str, cast=float, default=None, minimum=None, maximum=None):
+    """Parse a numeric query parameter, answering 400 when it is malformed"""
+    raw = query.get(name)
+    if raw is None or raw == '':
+        return default
+    try:
+        value = cast(raw)
+    except ValueError:
+        raise web.HTTPBadRequest(text=f'{{"error": "{name} must be a number"}}', content_type='application/json')
+    if minimum is not None:
+        value = max(minimum, value)
+    if maximum is not None:
+        value = min(maximum, value)
+    return value
+
+def paginate(query, items: list) -> dict:
+    """Slice a list according to page/per_page query parameters"""
+    page = query_number(query, 'page', int, 1, minimum=1)
+    per_page = query_number(query, 'per_page', int, DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+    start = (page - 1) * per_page
     return {
-        "status": "healthy",
-        "timestamp": datetime.datetime.now().isoformat(),
-        "service": "Football Club Management Bot"
+        "page": page,
+        "per_page": per_page,
+        "total": len(items),
+        "items": items[start:start + per_page]
     }
 
-@app.route('/ping')
-def ping():
-    """Simple ping endpoint for uptime monitoring"""
-    return "pong"
+def name_to_id(guild_id: str, name: str) -> str:
+    """Build a club/player id from a display name the same way the cogs do"""
+    return f"{guild_id}_{name.lower().replace(' ', '_')}"
+
+def list_clubs(db, guild_id: str, query) -> dict:
+    """Clubs filtered by name and budget range"""
+    name = query.get('name', '').lower()
+    min_budget = query_number(query, 'min_budget')
+    max_budget = query_number(query, 'max_budget')
+    sort = query.get('sort', 'name')
+    
+    items = []
+    for club_id, club in guild_clubs(db, guild_id).items():
+        if name and name not in club['name'].lower():
+            continue
+        if min_budget is not None and club['budget'] < min_budget:
+            continue
+        if max_budget is not None and club['budget'] > max_budget:
+            continue
+        items.append({"id": club_id, **club})
+    
+    if sort == 'budget':
+        items.sort(key=lambda c: c['budget'], reverse=True)
+    elif sort == 'players':
+        items.sort(key=lambda c: len(c.get('players', [])), reverse=True)
+    else:
+        items.sort(key=lambda c: c['name'].lower())
+    return paginate(query, items)
+
+def list_players(db, guild_id: str, query) -> dict:
+    """Players filtered by club, position, free agency, value and age"""
+    name = query.get('name', '').lower()
+    club_id = name_to_id(guild_id, query['club']) if query.get('club') else None
+    position = query.get('position', '').upper()
+    free_agent = query.get('free_agent', '').lower() in ('1', 'true', 'yes')
+    min_value = query_number(query, 'min_value')
+    max_value = query_number(query, 'max_value')
+    min_age = query_number(query, 'min_age', int)
+    max_age = query_number(query, 'max_age', int)
+    sort = query.get('sort', 'value')
+    
+    items = []
+    for player_id, player in guild_players(db, guild_id).items():
+        if name and name not in player['name'].lower():
+            continue
+        if club_id and player.get('club_id') != club_id:
+            continue
+        if free_agent and player.get('club_id'):
+            continue
+        if position and player.get('position', '').upper() != position:
+            continue
+        if min_value is not None and player['value'] < min_value:
+            continue
+        if max_value is not None and player['value'] > max_value:
+            continue
+        if min_age is not None and player.get('age', 0) < min_age:
+            continue
+        if max_age is not None and player.get('age', 0) > max_age:
+            continue
+        items.append({"id": player_id, **player})
+    
+    if sort == 'name':
+        items.sort(key=lambda p: p['name'].lower())
+    elif sort == 'age':
+        items.sort(key=lambda p: p.get('age', 0))
+    else:
+        items.sort(key=lambda p: p['value'], reverse=True)
+    return paginate(query, items)
+
+def list_transfers(db, guild_id: str, query) -> dict:
+    """Transfers newest first, filtered by player, club and date"""
+    player_id = name_to_id(guild_id, query['player']) if query.get('player') else None
+    club_id = name_to_id(guild_id, query['club']) if query.get('club') else None
+    since = query.get('since')
+    
+    items = []
+    for transfer in guild_transfers(db, guild_id):
+        if player_id and transfer['player_id'] != player_id:
+            continue
+        if club_id and club_id not in (transfer.get('from_club'), transfer.get('to_club')):
+            continue
+        if since and transfer.get('date', '') < since:
+            continue
+        items.append(transfer)
+    
+    items.sort(key=lambda t: t.get('date', ''), reverse=True)
+    return paginate(query, items)
+
+def league_table(db, guild_id: str, query) -> dict:
+    """Clubs ranked by total value (budget + squad value), as in /league_table"""
+    return paginate(query, league_rows(guild_clubs(db, guild_id), guild_players(db, guild_id)))
+
+def top_players(db, guild_id: str, query) -> dict:
+    """Most valuable players with their club names, as in /top_players_league"""
+    limit = query_number(query, 'limit', int, 10, minimum=1, maximum=MAX_PAGE_SIZE)
+    clubs = guild_clubs(db, guild_id)
+    ranked = sorted(guild_players(db, guild_id).items(), key=lambda item: item[1]['value'], reverse=True)[:limit]
+    items = []
+    for player_id, player in ranked:
+        club = clubs.get(player.get('club_id'))
+        items.append({"id": player_id, **player, "club_name": club['name'] if club else None})
+    return {"total": len(items), "items": items}
 
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=False)
+class WebServer:
+    """Status, health and metrics endpoints served inside the bot's event loop"""
+    
+    def __init__(self, bot, host: str = '0.0.0.0', port: int = 5000):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.runner = None
+        self.broker = DashboardBroker(bot.db)
+        # League data is only served with a token; the keep-alive port is public
+        self.api_token = os.getenv('API_TOKEN')
+        
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get('/', self.status),
+            web.get('/health', self.health),
+            web.get('/metrics', self.prometheus_metrics),
+            web.get('/ping', self.ping),
+        ])
+        if self.api_token:
+            self.app.add_routes([
+                web.get('/api/guilds/{guild_id}/clubs', self.api_route(list_clubs)),
+                web.get('/api/guilds/{guild_id}/players', self.api_route(list_players)),
+                web.get('/api/guilds/{guild_id}/transfers', self.api_route(list_transfers)),
+                web.get('/api/guilds/{guild_id}/league_table', self.api_route(league_table)),
+                web.get('/api/guilds/{guild_id}/top_players', self.api_route(top_players)),
+                web.get('/api/guilds/{guild_id}/events', self.events),
+                web.get('/dashboard/{guild_id}', self.dashboard),
+            ])
+        else:
+            logger.info("API_TOKEN is not set; the JSON API and dashboard are disabled")
+    
+    async def start(self):
+        """Bind the server on the running loop"""
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        logger.info(f"Web server listening on {self.host}:{self.port}")
+    
+    async def stop(self):
+        """Stop accepting connections and wait for in-flight requests"""
+        if self.runner is not None:
+            self.broker.close()
+            await self.runner.cleanup()
+            self.runner = None
+            logger.info("Web server stopped")
+    
+    async def status(self, request: web.Request) -> web.Response:
+        """Main status page"""
+        status = "Bot is running" if self.bot.is_ready() else "Bot is connecting"
+        page = render_template('status.html',
+                               status=status,
+                               timestamp=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        return web.Response(text=page, content_type='text/html')
+    
+    async def health(self, request: web.Request) -> web.Response:
+        """Health check endpoint"""
+        blocked_for = loop_monitor.current_block()
+        healthy = blocked_for <= loop_monitor.threshold
+        return web.json_response({
+            "status": "healthy" if healthy else "degraded",
+            "timestamp": datetime.datetime.now().isoformat(),
+            "service": "Football Club Management Bot",
+            "bot": {
+                "ready": self.bot.is_ready(),
+                "guilds": len(self.bot.guilds),
+                "latency_ms": round(self.bot.latency * 1000, 2) if self.bot.is_ready() else None
+            },
+            "startup": self.bot.startup_report,
+            "admission": admission.snapshot(),
+            "dashboard": {
+                "viewers": self.broker.viewer_count,
+                "events_published": self.broker.events_published,
+                "resyncs": self.broker.resyncs
+            },
+            "event_loop": {
+                "lag": loop_monitor.percentiles(),
+                "blocked_for_ms": round(blocked_for * 1000, 2),
+                "stalls": loop_monitor.stalls
+            }
+        }, status=200 if healthy else 503)
+    
+    async def prometheus_metrics(self, request: web.Request) -> web.Response:
+        """Command latency and storage I/O metrics in Prometheus text format"""
+        return web.Response(body=metrics.render().encode('utf-8'),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+    
+    async def ping(self, request: web.Request) -> web.Response:
+        """Simple ping endpoint for uptime monitoring"""
+        return web.Response(text="pong")
+    
+    def check_request(self, request: web.Request):
+        """Validate the API token and guild id; returns an error response or None"""
+        # EventSource cannot send headers, so the token may also come as ?token=
+        supplied = request.headers.get('Authorization') or f"Bearer {request.query.get('token', '')}"
+        if not self.api_token or not hmac.compare_digest(supplied.encode(), f"Bearer {self.api_token}".encode()):
+            return web.json_response({"error": "unauthorized"}, status=401)
+        if not request.match_info['guild_id'].isdigit():
+            return web.json_response({"error": "guild_id must be numeric"}, status=400)
+        return None
+    
+    def api_route(self, build):
+        """Wrap a league data builder with auth, ETag and 304 handling"""
+        async def handler(request: web.Request) -> web.Response:
+            error = self.check_request(request)
+            if error:
+                return error
+            guild_id = request.match_info['guild_id']
+            
+            # The ETag only depends on the guild's data version, so unchanged data costs no reads
+            db = self.bot.db
+            version = db.get_data_version(guild_id)
+            headers = {'ETag': f'"{db.data_epoch}-{guild_id}-{version}"', 'Cache-Control': 'no-cache'}
+            if headers['ETag'] in request.headers.get('If-None-Match', ''):
+                return web.Response(status=304, headers=headers)
+            
+            payload = await run_blocking(build, db, guild_id, request.query)
+            payload['guild_id'] = guild_id
+            payload['version'] = version
+            return web.json_response(payload, headers=headers)
+        return handler
+    
+    async def dashboard(self, request: web.Request) -> web.Response:
+        """Live league dashboard page for one guild"""
+        error = self.check_request(request)
+        if error:
+            return error
+        page = render_template('dashboard.html', guild_id=request.match_info['guild_id'])
+        return web.Response(text=page, content_type='text/html')
+    
+    async def events(self, request: web.Request) -> web.StreamResponse:
+        """Server-sent event stream of league deltas for one guild"""
+        error = self.check_request(request)
+        if error:
+            return error
+        guild_id = request.match_info['guild_id']
+        
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        await response.prepare(request)
+        
+        queue = await self.broker.subscribe(guild_id)
+        try:
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    payload = b": keepalive\n\n"
+                if payload is None:
+                    break
+                await response.write(payload)
+        except ConnectionResetError:
+            pass
+        finally:
+            self.broker.unsubscribe(guild_id, queue)
+        return response